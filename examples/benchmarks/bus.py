@@ -0,0 +1,109 @@
+"""Fan-out latency and throughput of the shared-memory market data bus against N subscriber processes.
+
+A publisher writes `--messages` market data snapshots at `--rate` per second (0 for as fast as
+possible) to a `MarketDataBus`; every subscriber process polls its own reader and measures the
+time from publish to read. The snapshot timestamp carries the publish time on the monotonic
+`perf_counter` clock, which is shared by all processes on the machine.
+
+    python -m examples.benchmarks.bus --subscribers 1,4,16 --messages 20000 --rate 10000
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+from examples.benchmarks.common import print_table, summarize
+from examples.websocket.bus import MarketDataBus
+from examples.websocket.messages import MarketData
+
+SAMPLE = MarketData(
+    0.0, "DCN-ALPHA_common", 0, "DCN-ALPHA", ["100", "99", "98", "97", "96", "95"],
+    ["101", "102", "103", "104", "105", "106"], ["0.1", "0.5", "1", "5", "10", "20"],
+)
+
+
+def subscribe(path: str, messages: int, ready, results, poll_interval: float):
+    """Read `messages` snapshots from the bus and report latencies, throughput and overruns."""
+    reader = MarketDataBus.open(path).reader()
+    ready.set()
+    latencies, received, first, last = [], 0, None, None
+    while received < messages:
+        idle = True
+        for snapshot in reader.poll():
+            now = time.perf_counter()
+            idle = False
+            if snapshot.sequence_number < 0:
+                # End of the run, snapshots lost to overruns are never coming
+                received = messages
+                break
+            latencies.append(int((now - snapshot.timestamp) * 1e9))
+            received += 1
+            first = first or now
+            last = now
+        if idle:
+            time.sleep(poll_interval)
+    results.put((latencies, (last - first) if first else 0.0, reader.overruns))
+
+
+def run(subscribers: int, messages: int, rate: float, slots: int, poll_interval: float) -> dict[str, float]:
+    path = os.path.join(tempfile.gettempdir(), f"alphastar-bus-bench-{os.getpid()}")
+    bus = MarketDataBus.create(path, slots=slots)
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    ready = [context.Event() for _ in range(subscribers)]
+    processes = [
+        context.Process(target=subscribe, args=(path, messages, event, results, poll_interval))
+        for event in ready
+    ]
+    for process in processes:
+        process.start()
+    for event in ready:
+        event.wait()
+
+    interval = 1 / rate if rate else 0
+    start = time.perf_counter()
+    for sequence in range(messages):
+        if interval:
+            while time.perf_counter() < start + sequence * interval:
+                pass
+        bus.publish(SAMPLE._replace(timestamp=time.perf_counter(), sequence_number=sequence))
+    publish_seconds = time.perf_counter() - start
+    bus.publish(SAMPLE._replace(sequence_number=-1))
+
+    latencies, rates, overruns = [], [], 0
+    for _ in processes:
+        samples, seconds, lost = results.get()
+        latencies += samples
+        rates.append(len(samples) / seconds if seconds else 0.0)
+        overruns += lost
+    for process in processes:
+        process.join()
+    bus.close()
+    os.remove(path)
+
+    stats = summarize(latencies)
+    return {
+        "p50_us": stats["p50_us"],
+        "p99_us": stats["p99_us"],
+        "p99.9_us": stats["p99.9_us"],
+        "publish_msgs_s": messages / publish_seconds,
+        "sub_msgs_s": min(rates),
+        "overruns": overruns,
+    }
+
+
+def main(subscribers: list[int], messages: int, rate: float, slots: int, poll_interval: float):
+    rows = {f"{count} subscribers": run(count, messages, rate, slots, poll_interval) for count in subscribers}
+    print_table(f"Market data bus fan-out, {messages} snapshots at {rate or 'max'}/s, {os.cpu_count()} cpus", rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--subscribers", default="1,2,4,8", help="comma separated subscriber counts")
+    parser.add_argument("--messages", type=int, default=20_000)
+    parser.add_argument("--rate", type=float, default=10_000, help="snapshots per second, 0 for unpaced")
+    parser.add_argument("--slots", type=int, default=4096)
+    parser.add_argument("--poll-interval", type=float, default=0.0001, help="subscriber sleep when idle, seconds")
+    args = parser.parse_args()
+    main([int(count) for count in args.subscribers.split(",")], args.messages, args.rate, args.slots, args.poll_interval)
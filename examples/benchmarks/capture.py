@@ -0,0 +1,61 @@
+"""Hot-path cost of frame capture, write throughput and memory-mapped read throughput.
+
+Records `--messages` market data frames through `CaptureRecorder.inbound` while the background
+writer flushes batches, then iterates the capture with `CaptureReader`.
+
+    python -m examples.benchmarks.capture --messages 500000
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+
+from examples.benchmarks.common import print_table, summarize
+from examples.benchmarks.decode import frame
+from examples.websocket.capture import CaptureReader, CaptureRecorder
+
+
+async def main(messages: int, segment_bytes: int):
+    directory = tempfile.mkdtemp(prefix="alphastar-capture-")
+    message = frame("marketdata").decode()
+    recorder = CaptureRecorder(directory, name="marketdata", segment_bytes=segment_bytes)
+    writer = asyncio.create_task(recorder.run())
+
+    samples = []
+    start = time.perf_counter()
+    for sequence in range(messages):
+        begin = time.perf_counter_ns()
+        recorder.inbound(message)
+        samples.append(time.perf_counter_ns() - begin)
+        if sequence % 1000 == 0:
+            # Let the writer run, as the socket reads would
+            await asyncio.sleep(0)
+    writer.cancel()
+    await recorder.close()
+    record_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with CaptureReader(directory, name="marketdata") as reader:
+        count = sum(1 for _ in reader)
+        segments = len(reader.paths)
+    read_seconds = time.perf_counter() - start
+    shutil.rmtree(directory)
+
+    stats = summarize(samples)
+    print_table(f"Frame capture, {messages} market data frames of {len(message)} bytes", {
+        "record": {"p50_us": stats["p50_us"], "p99_us": stats["p99_us"], "p99.9_us": stats["p99.9_us"],
+                   "msgs_s": messages / record_seconds, "MB_s": recorder.bytes_written / record_seconds / 1e6},
+        "read": {"p50_us": float("nan"), "p99_us": float("nan"), "p99.9_us": float("nan"),
+                 "msgs_s": count / read_seconds, "MB_s": recorder.bytes_written / read_seconds / 1e6},
+    })
+    print(f"{segments} segments, {recorder.bytes_written / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=500_000)
+    parser.add_argument("--segment-bytes", type=int, default=64 << 20)
+    args = parser.parse_args()
+    asyncio.run(main(args.messages, args.segment_bytes))
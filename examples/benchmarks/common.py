@@ -0,0 +1,37 @@
+import math
+
+
+def percentile(sorted_samples: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list of samples.
+    """
+    if not sorted_samples:
+        return float("nan")
+    rank = max(0, math.ceil(pct / 100 * len(sorted_samples)) - 1)
+    return sorted_samples[rank]
+
+
+def summarize(samples_ns: list) -> dict[str, float]:
+    """Summarize latency samples given in nanoseconds as microsecond statistics.
+    """
+    samples = sorted(samples_ns)
+    return {
+        "count": len(samples),
+        "mean_us": sum(samples) / len(samples) / 1e3 if samples else float("nan"),
+        "p50_us": percentile(samples, 50) / 1e3,
+        "p99_us": percentile(samples, 99) / 1e3,
+        "p99.9_us": percentile(samples, 99.9) / 1e3,
+        "max_us": samples[-1] / 1e3 if samples else float("nan"),
+    }
+
+
+def print_table(title: str, rows: dict[str, dict[str, float]]):
+    """Print benchmark results as an aligned table, one row per scenario.
+    """
+    print(title)
+    columns = list(next(iter(rows.values())).keys())
+    width = max(len(name) for name in rows) + 2
+    print("".ljust(width) + "".join(f"{column:>16}" for column in columns))
+    for name, stats in rows.items():
+        print(name.ljust(width) + "".join(
+            f"{value:>16.2f}" if isinstance(value, float) else f"{value:>16}" for value in stats.values()
+        ))
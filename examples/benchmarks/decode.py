@@ -0,0 +1,138 @@
+"""Envelope decoding throughput and memory per message, legacy dict path vs typed decoder.
+
+The legacy path is what every `handle_message` did before: parse the envelope, parse the nested
+"data" string into a dict, branch on the type and read fields by string key. The typed path is
+`examples.websocket.messages.decode` followed by attribute access.
+
+    python -m examples.benchmarks.decode --messages 200000
+"""
+import argparse
+import time
+import tracemalloc
+
+import orjson as json
+
+from examples.benchmarks.common import print_table
+from examples.websocket.messages import decode
+
+SAMPLES = {
+    "marketdata": {
+        "timestamp": 1712784337.795921, "pool_id": "DCN-ALPHA_common", "sequence_number": 300,
+        "symbol": "DCN-ALPHA", "bids": ["100", "99", "98", "97", "96", "95"],
+        "offers": ["101", "102", "103", "104", "105", "106"], "sizes": ["0.1", "0.5", "1", "5", "10", "20"],
+    },
+    "makertrademessage": {
+        "timestamp": 1712784337.795921, "match_timestamp": 1712784337.795921, "wallet_id": "0x1234",
+        "pool_id": "DCN-ALPHA_common", "symbol": "DCN-ALPHA", "trade_id": 1, "taker_wallet_id": "0x5678",
+        "side": "BUY", "requested_quantity": "0.75", "requested_price": "100.0", "quote_price": "100.0",
+        "quote_quantity": "1.0", "quote_id": "abcd1234", "quote_created_at": 1712784337.795921,
+        "valid_until_time": 5.0, "maker_fee": "0.0", "maker_fee_ccy": "ALPHA", "executed_quantity": "0.75",
+        "executed_price": "100.0", "status": "REQUEST", "msg": "system message",
+    },
+    "takertrademessage": {
+        "executed_price": "0.0", "executed_quantity": "0.0", "maker_wallet_id": "",
+        "match_timestamp": 1712784337.795921, "msg": "Trade Miss", "pool_id": "DCN-ALPHA_common",
+        "price": "100.77", "quantity": "0.1", "quote_id": "quote_response_id", "side": "BUY", "status": "REJECT",
+        "symbol": "DCN-ALPHA", "taker_fee": "0.0", "taker_fee_ccy": "ALPHA", "taker_timestamp": 1712784337.795392,
+        "timestamp": 1712784337.795921, "type": "TRADE_RESPONSE", "wallet_id": "taker_wallet",
+    },
+    "quotereject": {
+        "sending_time": 1712784337.795921, "quote_id": "abcd1234", "wallet_id": "0x1234",
+        "pool_id": "DCN-ALPHA_common", "reason": "quote_expired",
+    },
+    "alphastarheartbeat": {"timestamp": 1712784337.795921},
+}
+
+def frame(message_type: str) -> bytes:
+    """Build a frame the way the server sends it, with "data" as a JSON encoded string."""
+    return json.dumps({"type": message_type, "data": json.dumps(SAMPLES[message_type]).decode()})
+
+
+def legacy(message: bytes):
+    data = json.loads(message)
+    message_type = data.get('type')
+    message = json.loads(data["data"])
+    if message_type == 'marketdata':
+        return message['bids']
+    elif message_type == 'makertrademessage':
+        return message['status']
+    elif message_type == 'takertrademessage':
+        return message['status']
+    elif message_type == 'quotereject':
+        return message['reason']
+    elif message_type == 'alphastarheartbeat':
+        return message['timestamp']
+
+
+HANDLERS = {
+    "marketdata": lambda message: message.bids,
+    "makertrademessage": lambda message: message.status,
+    "takertrademessage": lambda message: message.status,
+    "quotereject": lambda message: message.reason,
+    "alphastarheartbeat": lambda message: message.timestamp,
+}
+
+
+def typed(message: bytes):
+    decoded = decode(message)
+    return HANDLERS[decoded.message_type](decoded)
+
+
+def throughput(fn, message: bytes, count: int, repeat: int = 3) -> float:
+    """Best-of-`repeat` messages per second, to filter out scheduling noise."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(count):
+            fn(message)
+        best = min(best, time.perf_counter() - start)
+    return count / best
+
+
+def retained_bytes(decoder, message: bytes, count: int = 10_000) -> float:
+    """Average traced bytes held per decoded message when `count` of them are kept alive."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = [decoder(message) for _ in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return (after - before) / count
+
+
+def allocations(decoder, message: bytes, count: int = 10_000) -> float:
+    """Average number of memory blocks allocated (and not freed) per decoded message."""
+    tracemalloc.start(1)
+    kept = []
+    snapshot_before = tracemalloc.take_snapshot()
+    for _ in range(count):
+        kept.append(decoder(message))
+    snapshot_after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in snapshot_after.compare_to(snapshot_before, "filename"))
+    return blocks / count
+
+
+def legacy_decode(message: bytes):
+    data = json.loads(message)
+    return data.get('type'), json.loads(data["data"])
+
+
+def main(messages: int):
+    rows = {}
+    for message_type in SAMPLES:
+        message = frame(message_type)
+        for name, fn, decoder in (("dict", legacy, legacy_decode), ("typed", typed, decode)):
+            rows[f"{message_type} {name}"] = {
+                "msgs_per_sec": throughput(fn, message, messages),
+                "blocks_per_msg": allocations(decoder, message),
+                "bytes_per_msg": retained_bytes(decoder, message),
+            }
+    print_table(f"Envelope decode, {messages} messages per row", rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=200_000)
+    args = parser.parse_args()
+    main(args.messages)
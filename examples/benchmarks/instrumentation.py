@@ -0,0 +1,59 @@
+"""Per-message cost of the `WebSocketClient` latency instrumentation.
+
+Feeds market data frames through `MarketDataClient.handle_message` with a no-op strategy
+callback, with metrics disabled and enabled, and reports the difference per message. The best
+round of each is compared.
+
+    python -m examples.benchmarks.instrumentation --messages 200000
+"""
+import argparse
+import asyncio
+import time
+
+from examples.benchmarks.common import print_table
+from examples.benchmarks.decode import frame
+from examples.websocket.marketdata import MarketDataClient
+from examples.websocket.metrics import Metrics
+
+
+async def run(client: MarketDataClient, message: bytes, count: int, repeat: int = 3) -> float:
+    """Best-of-`repeat` nanoseconds per message through receive bookkeeping and `handle_message`."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        for _ in range(count):
+            if client.metrics is not None:
+                client._received_ns = time.perf_counter_ns()
+            await client.handle_message(message)
+        best = min(best, time.perf_counter_ns() - start)
+    return best / count
+
+
+async def main(messages: int, rounds: int):
+    async def strategy(data):
+        pass
+
+    message = frame("marketdata")
+    client = MarketDataClient("ws://localhost", {"wallet": "0x0"}, message_handler=strategy)
+    metrics = Metrics()
+    disabled = enabled = float("inf")
+    # Alternate short rounds, so drift in the machine's speed hits both sides alike
+    for _ in range(rounds):
+        client.metrics = None
+        disabled = min(disabled, await run(client, message, messages // rounds, repeat=1))
+        client.metrics = metrics
+        enabled = min(enabled, await run(client, message, messages // rounds, repeat=1))
+
+    print_table(f"Instrumentation overhead, {messages} market data messages", {
+        "disabled": {"ns_per_msg": disabled},
+        "enabled": {"ns_per_msg": enabled},
+        "overhead": {"ns_per_msg": enabled - disabled},
+    })
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=200_000)
+    parser.add_argument("--rounds", type=int, default=20, help="alternating disabled and enabled rounds")
+    args = parser.parse_args()
+    asyncio.run(main(args.messages, args.rounds))
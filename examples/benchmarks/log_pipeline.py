@@ -0,0 +1,90 @@
+"""Per-event latency of the clients' logging: synchronous prints vs the `LogPipeline`.
+
+Two events, each logged the way the clients used to print them and the way they log now:
+    tick   the "market update received" line of `OrderClient.handle_quote`, per market data update
+    trade  the "Trade Initiated" line and the pre-trade balances of both tokens, per order
+
+The print rows write to a line-buffered file, like a terminal, on the calling thread. The pipeline
+rows log through an `EventLog`, which only queues the event; building the record, formatting and
+writing happen on the pipeline thread, which is running during the measurement. The sampled row
+logs one tick in 100.
+
+    python -m examples.benchmarks.log_pipeline --events 100000 --chunk 8
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from examples.benchmarks.common import print_table, summarize
+from examples.fixedpoint import to_wire
+from examples.ledger import BalanceLedger
+from examples.websocket.logs import CHUNK, LogPipeline, Sampler, get_logger
+from examples.websocket.taker import BalanceSnapshot
+
+logger = get_logger("examples.benchmarks.log_pipeline")
+
+POOL_ID = "DCN-ALPHA_common"
+SYMBOL = "DCN-ALPHA"
+
+
+def measure(event, events: int) -> dict[str, float]:
+    samples = []
+    append, clock = samples.append, time.perf_counter_ns
+    for count in range(events):
+        begin = clock()
+        event(count)
+        append(clock() - begin)
+    stats = summarize(samples)
+    return {"mean_us": stats["mean_us"], "p50_us": stats["p50_us"], "p99_us": stats["p99_us"], "p99.9_us": stats["p99.9_us"]}
+
+
+def print_balances(out, ledger: BalanceLedger, title: str):
+    """The balances print of `OrderClient` before the pipeline."""
+    print("---------------------------------------------------", file=out)
+    print(title, file=out)
+    for ccy in SYMBOL.split("-"):
+        token = ledger.token(ccy)
+        print(f"{ccy} -- balance: {to_wire(token.balance)} | in flight: {to_wire(token.in_flight)} | available: {to_wire(token.available)}", file=out)
+    print("---------------------------------------------------", file=out)
+
+
+def main(events: int, chunk: int):
+    ledger = BalanceLedger()
+    ledger.load({"DCN": {"balance": "1000000"}, "ALPHA": {"balance": "1000000"}})
+    directory = tempfile.mkdtemp()
+
+    with open(os.path.join(directory, "print.log"), "w", buffering=1) as out:
+        rows = {
+            "tick print": measure(lambda count: print(f"market update received -- {POOL_ID} -- {count}", file=out), events),
+            "trade print": measure(lambda count: (
+                print(f"Trade Initiated: {POOL_ID} BUY 1 @ 1.01", file=out),
+                print_balances(out, ledger, "Pre-Trade Balances"),
+            ), events),
+        }
+
+    with open(os.path.join(directory, "pipeline.log"), "w", buffering=1) as out:
+        pipeline = LogPipeline(stream=out, logger=logger.name, chunk=chunk).start()
+        ticks = Sampler(100)
+
+        def sampled_tick(count):
+            if ticks():
+                logger.info("market update received -- %s -- %d", POOL_ID, count)
+
+        rows["tick pipeline"] = measure(lambda count: logger.info("market update received -- %s -- %d", POOL_ID, count), events)
+        rows["tick pipeline 1/100"] = measure(sampled_tick, events)
+        rows["trade pipeline"] = measure(lambda count: logger.info(
+            "Trade Initiated: %s %s %s @ %s\n%s", POOL_ID, "BUY", "1", "1.01", BalanceSnapshot("Pre-Trade Balances", ledger, SYMBOL)
+        ), events)
+        pipeline.stop()
+
+    print_table(f"Logging latency per event, {events} events", rows)
+    print(f"\nPipeline wrote {pipeline.written} records in {pipeline.batches} batches")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=100_000)
+    parser.add_argument("--chunk", type=int, default=CHUNK, help="records the writer formats before yielding")
+    args = parser.parse_args()
+    main(args.events, args.chunk)
@@ -0,0 +1,81 @@
+"""Per-tick cost of keeping track of in-flight orders, with many orders outstanding.
+
+Every tick sends one order, answers the oldest one still awaiting an answer -- except every tenth,
+which is left to time out -- and checks for timeouts:
+    scan    orders in a dict, the timeout check walks every outstanding order
+    wheel   `OrderTracker`: the response is a dict lookup, the timeout check empties the due
+            slots of its `TimingWheel`
+
+    python -m examples.benchmarks.orders --outstanding 100,1000,10000
+"""
+import argparse
+from collections import deque
+import time
+
+from examples.benchmarks.common import print_table, summarize
+from examples.websocket.messages import TakerTradeMessage
+from examples.websocket.orders import OrderTracker
+from examples.websocket.router import Route
+
+TIMEOUT = 5.0
+ROUTE = Route("DCN-ALPHA_common", "DCN-ALPHA", "BUY", 10**18, 0, 10**18, 10**18, "1.0")
+
+
+def response(quote_id: str, now: float) -> TakerTradeMessage:
+    return TakerTradeMessage("1.0", "1.0", "0xmaker", now, "", ROUTE.pool_id, "1.0", "1.0", quote_id, "BUY", "ACCEPT",
+                             ROUTE.symbol, "0.0", "ALPHA", now, now)
+
+
+def measure(outstanding: int, count: int) -> dict[str, dict[str, float]]:
+    # Orders are sent every `interval` seconds, so `outstanding` of them fall within the timeout
+    interval = TIMEOUT / outstanding
+    rows = {}
+
+    orders, answers, samples = {}, deque(), []
+    for tick in range(outstanding + count):
+        now = tick * interval
+        begin = time.perf_counter_ns()
+        quote_id = f"q{tick}"
+        orders[quote_id] = now
+        if tick % 10:
+            answers.append(quote_id)
+        if len(answers) > outstanding // 2:
+            orders.pop(answers.popleft(), None)
+        for expired in [key for key, sent_at in orders.items() if now - sent_at >= TIMEOUT]:
+            del orders[expired]
+        samples.append(time.perf_counter_ns() - begin)
+    rows[f"scan {outstanding} outstanding"] = summarize(samples[outstanding:])
+
+    tracker = OrderTracker(timeout=TIMEOUT, max_outstanding=2 * outstanding, resolution=interval)
+    answers, samples = deque(), []
+    for tick in range(outstanding + count):
+        now = tick * interval
+        message = response(answers[0], now) if len(answers) > outstanding // 2 else None
+        begin = time.perf_counter_ns()
+        quote_id = f"q{tick}"
+        tracker.track(quote_id, ROUTE, ROUTE.price, now)
+        if tick % 10:
+            answers.append(quote_id)
+        if message is not None:
+            tracker.complete(message, now)
+            answers.popleft()
+        tracker.expire(now)
+        samples.append(time.perf_counter_ns() - begin)
+    rows[f"wheel {outstanding} outstanding"] = summarize(samples[outstanding:])
+    return rows
+
+
+def main(outstanding: list[int], count: int):
+    rows = {}
+    for orders in outstanding:
+        for name, stats in measure(orders, count).items():
+            rows[name] = {key: stats[key] for key in ("mean_us", "p50_us", "p99_us", "p99.9_us")}
+    print_table(f"Send, answer and timeout check per order, {count} orders", rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--outstanding", default="100,1000,10000", help="comma separated outstanding order counts")
+    parser.add_argument("--orders", type=int, default=20_000)
+    args = parser.parse_args()
+    main([int(count) for count in args.outstanding.split(",")], args.orders)
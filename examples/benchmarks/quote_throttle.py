@@ -0,0 +1,93 @@
+"""Wire load of a fast quoting maker, unthrottled vs `QuoteThrottle` settings.
+
+A `MakerPool` makes a ladder every `--interval` seconds of simulated time while its true mid takes
+a random step every `--mid-every` seconds, and each setting decides which quotes are sent:
+    every      no throttle, every ladder is sent
+    tN         suppress ladders within N ticks of the last quote sent, refreshing it before expiry
+    tN rR      the same, at most R quotes per second with faster ladders merged into the newest
+
+lag_ticks is the largest difference of any rung between the newest ladder made and the quote on
+the wire at that moment: the price of the saved messages.
+
+    python -m examples.benchmarks.quote_throttle --seconds 600 --interval 0.02
+"""
+import argparse
+import random
+
+from examples.benchmarks.common import print_table
+from examples.websocket.pools import MakerPool
+
+SETTINGS = {
+    "every": (0, None),
+    "t1": (1, None),
+    "t2": (2, None),
+    "t1 r10": (1, 10),
+    "t1 r2": (1, 2),
+}
+
+
+def lag(made: tuple[list[int], list[int]], sent: tuple[list[int], list[int]]) -> int:
+    return max(abs(new - old) for new, old in zip(made[0] + made[1], sent[0] + sent[1]))
+
+
+def simulate(threshold_ticks: int, max_rate: float, seconds: float, interval: float, mid_every: float) -> dict[str, float]:
+    random.seed(0)
+    pool = MakerPool("0xmaker", threshold_ticks=threshold_ticks, max_quote_rate=max_rate)
+    pool.true_sigma = 0.005
+    throttle = pool.throttle
+    tick = 10 ** (18 - pool.price_places)
+    frames = size = max_lag = 0
+    flush_at = None
+    wire = None
+    next_mid = mid_every
+
+    def send(bids: list[int], asks: list[int], now: float):
+        nonlocal frames, size, wire
+        quote, _, _ = pool.encode_quote(now, bids, asks)
+        throttle.sent_quote(bids, asks, now, pool.valid_until_time)
+        frames += 1
+        size += len(quote)
+        wire = (bids, asks)
+
+    for step in range(int(seconds / interval)):
+        now = step * interval
+        if flush_at is not None and flush_at <= now:
+            ladder = throttle.flush(flush_at)
+            if ladder is not None:
+                send(*ladder, flush_at)
+            flush_at = None
+        if now >= next_mid:
+            pool.update_true_mid()
+            next_mid += mid_every
+        ladder = pool.make_ladder()
+        delay = throttle.offer(*ladder, now)
+        if delay == 0:
+            send(*ladder, now)
+        elif delay is not None:
+            flush_at = now + delay
+        max_lag = max(max_lag, lag(ladder, wire) // tick)
+
+    stats = throttle.stats()
+    return {
+        **stats,
+        "msgs_per_sec": frames / seconds,
+        "kb_per_sec": size / seconds / 1024,
+        "lag_ticks": max_lag,
+    }
+
+
+def main(seconds: float, interval: float, mid_every: float):
+    rows = {
+        name: simulate(threshold, rate, seconds, interval, mid_every)
+        for name, (threshold, rate) in SETTINGS.items()
+    }
+    print_table(f"{seconds:.0f}s of quotes every {interval * 1000:.0f} ms, mid step every {mid_every}s", rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=600)
+    parser.add_argument("--interval", type=float, default=0.02, help="seconds between ladders")
+    parser.add_argument("--mid-every", type=float, default=0.25, help="seconds between true mid steps")
+    args = parser.parse_args()
+    main(args.seconds, args.interval, args.mid_every)
@@ -0,0 +1,105 @@
+"""Per-quote CPU cost of the maker send path.
+
+Ladder construction: `Decimal` arithmetic vs fixed-point integers. Both paths build the six-rung
+bid and offer ladders exactly as `MakerClient.simulate_quotes` does, from the same random draws,
+and are checked to produce identical wire strings.
+
+Quote encoding: a fresh dict with a `uuid4` quote id through `orjson.dumps` vs the precompiled
+`QuoteEncoder` with monotonic quote ids, checked to produce identical bytes for the same id.
+
+    python -m examples.benchmarks.quotes --quotes 100000
+"""
+import argparse
+from decimal import Decimal
+import random
+import time
+import uuid
+
+import orjson as json
+
+from examples.benchmarks.common import print_table
+from examples.fixedpoint import format_ladder, from_float, to_fixed
+from examples.websocket.quote_encoder import QuoteEncoder
+
+WALLET_ID = "0x1234567890abcdef1234567890abcdef12345678"
+POOL_ID = "DCN-ALPHA_common"
+
+PREMIUMS = ["0.0", "0.01", "0.02", "0.05", "0.10", "0.20"]
+DECIMAL_PREMIUMS = [Decimal(premium) for premium in PREMIUMS]
+FIXED_PREMIUMS = [to_fixed(premium) for premium in PREMIUMS]
+
+
+def decimal_ladder(true_mid: Decimal, bid_spread: float, ask_spread: float):
+    bid = true_mid - Decimal(f"{bid_spread:.2f}")
+    bids = [f"{bid - size_premium:.2f}" for size_premium in DECIMAL_PREMIUMS]
+    ask = true_mid + Decimal(f"{ask_spread:.2f}")
+    asks = [f"{ask + size_premium:.2f}" for size_premium in DECIMAL_PREMIUMS]
+    return bids, asks
+
+
+def fixed_ladder(true_mid: int, bid_spread: float, ask_spread: float):
+    bid = true_mid - from_float(bid_spread, 2)
+    bids = format_ladder([bid - size_premium for size_premium in FIXED_PREMIUMS], 2)
+    ask = true_mid + from_float(ask_spread, 2)
+    asks = format_ladder([ask + size_premium for size_premium in FIXED_PREMIUMS], 2)
+    return bids, asks
+
+
+def dict_quote(sending_time: float, bids: list[str], offers: list[str], quote_id: str = None) -> bytes:
+    quote = {
+        "type": "quote",
+        "data": {
+            "sending_time": sending_time,
+            "quote_id": quote_id or f"{uuid.uuid4()}",
+            "wallet_id": WALLET_ID,
+            "pool_id": POOL_ID,
+            "bid_px": bids,
+            "offer_px": offers,
+            "valid_until_time": 5
+        }
+    }
+    return json.dumps(quote)
+
+
+def time_per_call(fn, args_list: list) -> dict[str, float]:
+    start = time.perf_counter_ns()
+    for args in args_list:
+        fn(*args)
+    elapsed = time.perf_counter_ns() - start
+    return {"ns_per_quote": elapsed / len(args_list), "quotes_per_sec": len(args_list) / (elapsed / 1e9)}
+
+
+def main(quotes: int):
+    rng = random.Random(42)
+    draws = [(max(0, rng.gauss(0.001, 0.0001)) * 100, max(0, rng.gauss(0.001, 0.0001)) * 100) for _ in range(quotes)]
+
+    for bid_spread, ask_spread in draws[:1000]:
+        assert decimal_ladder(Decimal("1.0"), bid_spread, ask_spread) == fixed_ladder(to_fixed("1.0"), bid_spread, ask_spread)
+
+    rows = {}
+    for name, build, mid in (("decimal", decimal_ladder, Decimal("1.0")), ("fixed-point", fixed_ladder, to_fixed("1.0"))):
+        start = time.perf_counter_ns()
+        for bid_spread, ask_spread in draws:
+            build(mid, bid_spread, ask_spread)
+        elapsed = time.perf_counter_ns() - start
+        rows[name] = {"ns_per_quote": elapsed / quotes, "quotes_per_sec": quotes / (elapsed / 1e9)}
+    print_table(f"Ladder construction, {quotes} quotes", rows)
+
+    encoder = QuoteEncoder(WALLET_ID, POOL_ID, valid_until_time=5)
+    ladders = [fixed_ladder(to_fixed("1.0"), bid_spread, ask_spread) for bid_spread, ask_spread in draws]
+    args_list = [(1712784773.339189 + i / 1000, bids, offers) for i, (bids, offers) in enumerate(ladders)]
+    for args in args_list[:1000]:
+        assert dict_quote(*args, quote_id="q-1") == encoder.encode(*args, quote_id="q-1")
+
+    print()
+    print_table(f"Quote encoding, {quotes} quotes", {
+        "dict + orjson": time_per_call(dict_quote, args_list),
+        "QuoteEncoder": time_per_call(encoder.encode, args_list),
+    })
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quotes", type=int, default=100_000)
+    args = parser.parse_args()
+    main(args.quotes)
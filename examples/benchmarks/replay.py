@@ -0,0 +1,71 @@
+"""Replay speed of the backtest engine: a `MakerClient` answering trade REQUESTs while its quote
+and true mid loops run on the virtual clock, and an `OrderClient` fed by a `MarketDataClient`.
+
+    python -m examples.benchmarks.replay --ticks 200000 --requests 5000
+"""
+import argparse
+import asyncio
+import random
+
+import orjson as json
+
+from examples.benchmarks.common import print_table
+from examples.benchmarks.decode import SAMPLES
+from examples.websocket.maker import MakerClient
+from examples.websocket.marketdata import MarketDataClient
+from examples.websocket.replay import ReplayEngine, ReplayFrame
+from examples.websocket.taker import OrderClient
+
+START = 1_712_784_000.0
+
+
+def envelope(message_type: str, data: dict) -> str:
+    return json.dumps({"type": message_type, "data": json.dumps(data).decode()}).decode()
+
+
+def ticks(count: int, interval: float):
+    for sequence in range(count):
+        timestamp = START + sequence * interval
+        yield ReplayFrame(timestamp, envelope("marketdata", {
+            **SAMPLES["marketdata"], "timestamp": timestamp, "sequence_number": sequence,
+        }))
+
+
+def requests(count: int, interval: float):
+    for trade_id in range(count):
+        timestamp = START + trade_id * interval
+        yield ReplayFrame(timestamp, envelope("makertrademessage", {
+            **SAMPLES["makertrademessage"], "timestamp": timestamp, "trade_id": trade_id, "status": "REQUEST",
+        }))
+
+
+async def main(tick_count: int, request_count: int, tick_interval: float):
+    random.seed(0)
+    duration = tick_count * tick_interval
+    maker = MakerClient("ws://replay/ws/maker", {"wallet": "0xmaker"})
+    taker = OrderClient("ws://replay/ws/taker", None, {"wallet": "0xtaker"})
+    # Balances the taker would have loaded from /balances on connect
+    taker.ledger.load({"DCN": {"balance": "1000000"}, "ALPHA": {"balance": "1000000"}})
+    market_data = MarketDataClient("ws://replay/ws/mktdata", {"wallet": "0xtaker"}, message_handler=taker.handle_quote)
+
+    engine = ReplayEngine(keep_sent=False)
+    maker_socket = engine.add_client(
+        maker, requests(request_count, duration / max(1, request_count)),
+        background=[maker.simulate_true_mid, maker.simulate_quotes],
+    )
+    engine.add_client(market_data, ticks(tick_count, tick_interval))
+    taker_socket = engine.add_client(taker, [], background=[taker.expire_orders])
+    stats = await engine.run()
+    await taker.rest.close()
+
+    print_table(f"Replay of {stats['virtual_seconds'] / 3600:.1f} hours", {"replay": stats})
+    print(f"maker sent {maker_socket.count} frames, taker sent {taker_socket.count} frames")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ticks", type=int, default=200_000)
+    parser.add_argument("--requests", type=int, default=5_000)
+    parser.add_argument("--tick-interval", type=float, default=0.5, help="seconds between market data ticks")
+    args = parser.parse_args()
+    asyncio.run(main(args.ticks, args.requests, args.tick_interval))
@@ -0,0 +1,131 @@
+"""Tick-processing latency with and without concurrent `/balances` calls.
+
+Starts a local HTTP stub that answers `/balances` after a simulated round trip, then drives a
+stream of synthetic market data ticks through a handler shaped like `OrderClient.handle_quote`.
+A quarter of the ticks trigger a balance lookup, which is done either
+
+    - not at all (baseline),
+    - with a blocking HTTP call, as the old `requests.post` path did, or
+    - with the pooled `AsyncRestClient` in a background task.
+
+Tick latency is measured from the moment a tick is due to the moment its handler finished.
+
+    python -m examples.benchmarks.rest_client --ticks 2000 --rate 500 --rtt-ms 20
+"""
+import argparse
+import asyncio
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import random
+import threading
+import time
+import urllib.request
+
+import orjson as json
+
+from examples.benchmarks.common import print_table, summarize
+from examples.rest import AsyncRestClient
+
+BALANCES = {"balances": {
+    token: {"contract_balance": "100.0", "balance": "100.0", "in_flight": "0.0", "available": "100.0"}
+    for token in ("DCN", "ALPHA")
+}}
+
+
+class _Account:
+    address = "0x0000000000000000000000000000000000000001"
+
+
+def _headers(account=None):
+    return {"wallet": account.address, "timestamp": "0", "signature": "0x"}
+
+
+def start_stub(rtt: float, port: int = 0):
+    """Start the `/balances` stub on its own thread and return the server and the bound base url.
+
+    The stub must not share the benchmark's event loop, otherwise the blocking scenario would
+    deadlock waiting on a server it is itself blocking.
+    """
+    body = json.dumps(BALANCES)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            time.sleep(rtt)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def _blocking_balances(base_url: str):
+    request = urllib.request.Request(
+        f"{base_url}/balances", data=json.dumps({"account": _Account.address}), method="POST",
+        headers={"Content-Type": "application/json", **_headers(_Account)},
+    )
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())
+
+
+async def run_ticks(mode: str, base_url: str, ticks: int, rate: float, action_percentage: float = 0.25):
+    rng = random.Random(7)
+    interval = 1 / rate
+    samples = []
+    background = set()
+    rest = AsyncRestClient(_Account(), base_url=base_url, header_factory=_headers)
+
+    async def handle_tick(tick: bytes):
+        data = json.loads(tick)
+        if rng.random() < action_percentage:
+            if mode == "blocking":
+                _blocking_balances(base_url)
+            elif mode == "async":
+                task = asyncio.create_task(rest.get_balances())
+                background.add(task)
+                task.add_done_callback(background.discard)
+        json.dumps({"price": data["offers"][0], "quantity": data["sizes"][0]})
+
+    tick = json.dumps({"bids": ["1.0"] * 6, "offers": ["1.01"] * 6, "sizes": ["1"] * 6})
+    start = time.perf_counter_ns()
+    for i in range(ticks):
+        due = start + int(i * interval * 1e9)
+        delay = (due - time.perf_counter_ns()) / 1e9
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await handle_tick(tick)
+        samples.append(time.perf_counter_ns() - due)
+
+    if background:
+        await asyncio.gather(*background, return_exceptions=True)
+    await rest.close()
+    return samples
+
+
+async def main(ticks: int, rate: float, rtt_ms: float):
+    server, base_url = start_stub(rtt_ms / 1e3)
+    rows = {}
+    try:
+        for mode in ("none", "blocking", "async"):
+            rows[mode] = summarize(await run_ticks(mode, base_url, ticks, rate))
+    finally:
+        server.shutdown()
+    print_table(f"Tick latency, {ticks} ticks @ {rate}/s, balances RTT {rtt_ms} ms", rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ticks", type=int, default=2000)
+    parser.add_argument("--rate", type=float, default=500.0)
+    parser.add_argument("--rtt-ms", type=float, default=20.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.ticks, args.rate, args.rtt_ms))
@@ -0,0 +1,103 @@
+"""Per-tick cost of order decisions across many pools of a symbol.
+
+Each tick updates one pool's ladder and routes an order of a random quantity across all pools:
+    scan     parse every pool's ladder on the tick, walk the sizes for the rung, then build the
+             quoteresponse dict and `orjson.dumps` it
+    router   `OrderRouter.update` and `route` -- one price parsed per pool, sizes shared, rung found
+             by binary search once per size ladder -- and `OrderRouter.encode`
+
+    python -m examples.benchmarks.router --pools 1,10,50
+"""
+import argparse
+import random
+import time
+
+import orjson as json
+
+from examples.benchmarks.common import print_table, summarize
+from examples.fixedpoint import parse_ladder, to_fixed, to_wire
+from examples.websocket.messages import MarketData
+from examples.websocket.router import OrderRouter
+
+SYMBOL = "DCN-ALPHA"
+SIZES = ["1", "2", "3", "5", "10", "20"]
+QUANTITIES = [to_fixed(quantity) for quantity in ("0.5", "1", "2.5", "4", "8", "15", "20")]
+
+
+def ticks(pools: int, count: int, rng: random.Random) -> list[MarketData]:
+    result = []
+    for sequence in range(count):
+        mid = 1 + rng.gauss(0, 0.01)
+        result.append(MarketData(
+            time.time(), f"{SYMBOL}_{sequence % pools}", sequence, SYMBOL,
+            [f"{mid - 0.001 * (rung + 1):.4f}" for rung in range(len(SIZES))],
+            [f"{mid + 0.001 * (rung + 1):.4f}" for rung in range(len(SIZES))],
+            SIZES,
+        ))
+    return result
+
+
+def scan(ladders: dict[str, MarketData], data: MarketData, side: str, quantity: int) -> bytes:
+    ladders[data.pool_id] = data
+    best = best_pool = best_wire = None
+    for pool_id, ladder in ladders.items():
+        sizes = parse_ladder(ladder.sizes)
+        prices = parse_ladder(ladder.offers if side == "BUY" else ladder.bids)
+        for rung, size in enumerate(sizes):
+            if size >= quantity:
+                break
+        else:
+            continue
+        price = prices[rung]
+        if price > 0 and (best is None or (price < best if side == "BUY" else price > best)):
+            best, best_pool, best_wire = price, pool_id, (ladder.offers if side == "BUY" else ladder.bids)[rung]
+    return json.dumps({"type": "quoteresponse", "data": {
+        "pool_id": best_pool, "price": best_wire, "quantity": to_wire(quantity), "quote_resp_id": "id",
+        "side": side, "symbol": SYMBOL, "sending_time": time.time(), "wallet_id": "0xtaker",
+    }})
+
+
+def measure(pools: int, count: int) -> dict[str, dict[str, float]]:
+    rng = random.Random(pools)
+    updates = ticks(pools, count + pools, rng)
+    orders = [(rng.choice(["BUY", "SELL"]), rng.choice(QUANTITIES)) for _ in updates]
+    rows = {}
+
+    ladders = {}
+    for data in updates[:pools]:
+        ladders[data.pool_id] = data
+    samples = []
+    for data, (side, quantity) in zip(updates[pools:], orders):
+        begin = time.perf_counter_ns()
+        scan(ladders, data, side, quantity)
+        samples.append(time.perf_counter_ns() - begin)
+    rows[f"scan {pools} pools"] = summarize(samples)
+
+    router = OrderRouter()
+    for data in updates[:pools]:
+        router.update(data)
+    samples = []
+    for data, (side, quantity) in zip(updates[pools:], orders):
+        begin = time.perf_counter_ns()
+        router.update(data)
+        route = router.route(SYMBOL, side, quantity)
+        router.encode(route, "id", "0xtaker", time.time())
+        samples.append(time.perf_counter_ns() - begin)
+    rows[f"router {pools} pools"] = summarize(samples)
+    return rows
+
+
+def main(pools: list[int], count: int):
+    rows = {}
+    for pool_count in pools:
+        for name, stats in measure(pool_count, count).items():
+            rows[name] = {key: stats[key] for key in ("mean_us", "p50_us", "p99_us", "p99.9_us")}
+    print_table(f"Update, route and encode per tick, {count} ticks", rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pools", default="1,10,50", help="comma separated pool counts")
+    parser.add_argument("--ticks", type=int, default=20_000)
+    args = parser.parse_args()
+    main([int(count) for count in args.pools.split(",")], args.ticks)
@@ -0,0 +1,100 @@
+"""Trade response latency behind quote bursts, with and without the prioritised send queue.
+
+A maker quotes `--pools` pools every `--quote-interval` seconds each, all pools at once, and
+answers a trade REQUEST every `--response-interval` seconds, on a socket that writes one frame
+per `--frame-time` seconds. When the quote bursts outrun the socket:
+    fifo      every frame queued in order, as when all senders share one socket
+    priority  responses first and unsent quotes replaced per pool, as `MakerClient` sends them
+The latency of a response is from `send_message` to the frame being written.
+
+    python -m examples.benchmarks.send_queue --pools 20 --duration 5
+"""
+import argparse
+import asyncio
+import time
+
+from examples.benchmarks.common import print_table, summarize
+from examples.websocket.base import WebSocketClient
+from examples.websocket.metrics import Metrics
+from examples.websocket.send_queue import PRIORITY_DEFAULT, PRIORITY_QUOTE, PRIORITY_RESPONSE
+
+
+class ThrottledSocket:
+    """Writes one frame per `frame_time` seconds, and notes when each response was written."""
+
+    def __init__(self, frame_time: float):
+        self.frame_time = frame_time
+        self.written: dict[bytes, int] = {}
+        self.frames = 0
+
+    async def send(self, message):
+        await asyncio.sleep(self.frame_time)
+        self.frames += 1
+        if message.startswith(b"response"):
+            self.written[message] = time.perf_counter_ns()
+
+
+async def run(prioritised: bool, pools: int, quote_interval: float, response_interval: float,
+              frame_time: float, duration: float) -> dict[str, float]:
+    client = WebSocketClient("ws://benchmark", {"wallet": "0xbenchmark"}, metrics=Metrics())
+    socket = client.websocket = ThrottledSocket(frame_time)
+    sent_at: dict[bytes, int] = {}
+    deadline = time.perf_counter() + duration
+
+    async def quote():
+        while time.perf_counter() < deadline:
+            for pool in range(pools):
+                message = b"quote %d" % pool
+                if prioritised:
+                    await client.send_message(message, PRIORITY_QUOTE, key=pool)
+                else:
+                    await client.send_message(message, PRIORITY_DEFAULT)
+            await asyncio.sleep(quote_interval)
+
+    async def respond():
+        sequence = 0
+        while time.perf_counter() < deadline:
+            await asyncio.sleep(response_interval)
+            message = b"response %d" % sequence
+            sequence += 1
+            sent_at[message] = time.perf_counter_ns()
+            await client.send_message(message, PRIORITY_RESPONSE if prioritised else PRIORITY_DEFAULT)
+
+    await asyncio.gather(quote(), respond())
+    # Let the writer finish what is queued
+    while client.send_queue:
+        await asyncio.sleep(frame_time)
+    await asyncio.sleep(frame_time * 2)
+    client.websocket = None
+    await client.stop_writer()
+
+    stats = summarize([socket.written[message] - sent for message, sent in sent_at.items() if message in socket.written])
+    queue = client.send_queue.stats()
+    return {
+        "response_p50_us": stats["p50_us"],
+        "response_p99_us": stats["p99_us"],
+        "response_max_us": stats["max_us"],
+        "frames": socket.frames,
+        "replaced": queue["replaced"],
+        "blocked": queue["blocked"],
+        "max_depth": queue["max_depth"],
+    }
+
+
+async def main(pools: int, quote_interval: float, response_interval: float, frame_time: float, duration: float):
+    rows = {}
+    for name, prioritised in (("fifo", False), ("priority", True)):
+        rows[name] = await run(prioritised, pools, quote_interval, response_interval, frame_time, duration)
+    print_table(f"Trade responses behind {pools} pools of quotes every {quote_interval * 1000:.0f} ms, "
+                f"{frame_time * 1e6:.0f} us per frame", rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pools", type=int, default=20)
+    parser.add_argument("--quote-interval", type=float, default=0.01)
+    parser.add_argument("--response-interval", type=float, default=0.05)
+    parser.add_argument("--frame-time", type=float, default=0.001)
+    parser.add_argument("--duration", type=float, default=5.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.pools, args.quote_interval, args.response_interval, args.frame_time, args.duration))
@@ -0,0 +1,58 @@
+"""Auth headers per second: signing on every call vs the cached, pre-signed `HeaderSigner`.
+
+`sign_auth_headers` does an `encode_defunct` and a secp256k1 `sign_message` per call. A
+`HeaderSigner` signs once per account and validity window, ahead of time when `run()` is
+running, and otherwise hands out the cached headers. Calls are spread round robin over
+`--accounts` accounts; the pre-sign row is the background cost of signing every account for
+one window.
+
+    python -m examples.benchmarks.signing --calls 100000 --accounts 1,10,100
+"""
+import argparse
+import time
+
+from eth_account import Account
+
+from examples.benchmarks.common import print_table
+from examples.signing import HeaderSigner, sign_auth_headers
+
+
+def rate(calls: int, elapsed_ns: int) -> dict[str, float]:
+    return {"ns_per_call": elapsed_ns / calls, "headers_per_sec": calls / (elapsed_ns / 1e9)}
+
+
+def main(calls: int, account_counts: list[int]):
+    for count in account_counts:
+        accounts = [Account.create() for _ in range(count)]
+        rows = {}
+
+        signed_calls = max(count, calls // 1000)
+        start = time.perf_counter_ns()
+        for i in range(signed_calls):
+            sign_auth_headers(account=accounts[i % count])
+        rows["sign_auth_headers"] = rate(signed_calls, time.perf_counter_ns() - start)
+
+        signer = HeaderSigner(accounts)
+        window = signer.window()
+        start = time.perf_counter_ns()
+        signer.presign(window)
+        rows["HeaderSigner.presign"] = rate(count, time.perf_counter_ns() - start)
+
+        # A fixed clock keeps every call in the pre-signed window
+        signer.clock = lambda: window
+        start = time.perf_counter_ns()
+        for i in range(calls):
+            signer.headers(accounts[i % count])
+        rows["HeaderSigner.headers"] = rate(calls, time.perf_counter_ns() - start)
+        assert signer.misses == 0, signer.stats()
+
+        print_table(f"Auth headers, {count} accounts", rows)
+        print()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=100_000)
+    parser.add_argument("--accounts", default="1,10,100", help="comma separated account counts")
+    args = parser.parse_args()
+    main(args.calls, [int(count) for count in args.accounts.split(",")])
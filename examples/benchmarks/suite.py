@@ -0,0 +1,244 @@
+"""Throughput and latency benchmark suite for the client stack, with machine-readable results.
+
+Covers the per-message paths of the clients:
+    decode.<type>        envelope decode in `WebSocketClient.handle_message`, per message type
+    quote.build          ladder construction and encoding in `MakerClient.simulate_quotes`
+    encode.quote         `orjson` encode of a quote message dict
+    encode.quoteresponse `orjson` encode of a taker quoteresponse message dict
+    sign_auth_headers    signing the websocket and REST auth headers
+    sign_auth_headers.cached  the same headers from a pre-signed `HeaderSigner`
+    roundtrip.*          `WebSocketClient.send_message` to a local echo server and back through
+                         `handle_message`, swept over message rates and connection counts
+
+Every case reports p50/p99/p99.9 latency and msgs/sec. Results are written as JSON, so runs can be
+compared, and `--compare` prints the change of every metric between two result files.
+
+    python -m examples.benchmarks.suite --output results.json
+    python -m examples.benchmarks.suite --compare baseline.json results.json
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import time
+import uuid
+from typing import Callable
+
+from eth_account import Account
+import orjson as json
+import websockets
+
+from examples.benchmarks.common import print_table, summarize
+from examples.benchmarks.decode import SAMPLES, frame
+from examples.signing import HeaderSigner, sign_auth_headers
+from examples.websocket.base import WebSocketClient
+from examples.websocket.maker import MakerClient
+from examples.websocket.messages import decode
+
+METRICS = ("p50_us", "p99_us", "p99.9_us", "msgs_s")
+
+
+def measure(operation: Callable[[], object], count: int) -> dict[str, float]:
+    """Latency of `count` calls of `operation`, one sample per call."""
+    samples = []
+    append, clock = samples.append, time.perf_counter_ns
+    started = clock()
+    for _ in range(count):
+        begin = clock()
+        operation()
+        append(clock() - begin)
+    return result(samples, (clock() - started) / 1e9)
+
+
+def result(samples_ns: list[int], seconds: float) -> dict[str, float]:
+    stats = summarize(samples_ns)
+    return {
+        "count": stats["count"],
+        "p50_us": stats["p50_us"],
+        "p99_us": stats["p99_us"],
+        "p99.9_us": stats["p99.9_us"],
+        "msgs_s": stats["count"] / seconds if seconds else 0.0,
+    }
+
+
+def micro_benchmarks(count: int) -> dict[str, dict[str, float]]:
+    results = {}
+    for message_type in SAMPLES:
+        message = frame(message_type)
+        results[f"decode.{message_type}"] = measure(lambda: decode(message), count)
+
+    maker = MakerClient("ws://localhost/ws/maker", {"wallet": "0x1234567890abcdef1234567890abcdef12345678"})
+    results["quote.build"] = measure(lambda: maker.make_quote(time.time()), count)
+
+    quote = {
+        "type": "quote",
+        "data": {
+            "sending_time": time.time(), "quote_id": str(uuid.uuid4()), "wallet_id": maker.wallet,
+            "pool_id": "DCN-ALPHA_common", "bid_px": ["0.99", "0.98", "0.97", "0.94", "0.89", "0.79"],
+            "offer_px": ["1.01", "1.02", "1.03", "1.06", "1.11", "1.21"], "valid_until_time": 5,
+        },
+    }
+    results["encode.quote"] = measure(lambda: json.dumps(quote), count)
+    quote_response = {
+        "type": "quoteresponse",
+        "data": {
+            "pool_id": "DCN-ALPHA_common", "price": "1.01", "quantity": "1", "quote_resp_id": str(uuid.uuid4()),
+            "side": "BUY", "symbol": "DCN-ALPHA", "sending_time": time.time(), "wallet_id": maker.wallet,
+        },
+    }
+    results["encode.quoteresponse"] = measure(lambda: json.dumps(quote_response), count)
+
+    account = Account.create()
+    results["sign_auth_headers"] = measure(lambda: sign_auth_headers(account=account), max(1, count // 100))
+    signer = HeaderSigner([account])
+    results["sign_auth_headers.cached"] = measure(lambda: signer.headers(account), count)
+    return results
+
+
+def serve_echo(port: int, ready):
+    """Echo every frame back, in a separate process so it does not share the clients' event loop."""
+    async def echo(websocket, path=None):
+        async for message in websocket:
+            await websocket.send(message)
+
+    async def main():
+        async with websockets.serve(echo, "127.0.0.1", port):
+            ready.set()
+            await asyncio.Future()
+
+    asyncio.run(main())
+
+
+class EchoClient(WebSocketClient):
+    """Sends timestamped benchmark frames and records the round trip when they come back."""
+
+    def __init__(self, uri: str):
+        super().__init__(uri, {"wallet": "0xbenchmark"})
+        self.samples: list[int] = []
+        self.handlers = {"benchmark": self.handle_echo}
+
+    async def handle_echo(self, message):
+        self.samples.append(time.perf_counter_ns() - message.data["sent"])
+
+
+async def roundtrip(uri: str, connections: int, rate: float, duration: float) -> dict[str, float]:
+    """Each of `connections` clients sends `rate` frames per second for `duration` seconds."""
+    clients = [EchoClient(uri) for _ in range(connections)]
+    sockets = [await websockets.connect(uri) for _ in clients]
+    readers = []
+    for client, websocket in zip(clients, sockets):
+        client.websocket = websocket
+        readers.append(asyncio.create_task(client.handle_messages(websocket)))
+
+    async def send(client: EchoClient):
+        interval = 1 / rate
+        start = time.perf_counter()
+        for sequence in range(int(rate * duration)):
+            delay = start + sequence * interval - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            data = json.dumps({"sent": time.perf_counter_ns(), "sequence": sequence})
+            await client.send_message(b'{"type":"benchmark","data":' + data + b"}")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(send(client) for client in clients))
+    sent = int(rate * duration) * connections
+    # Wait for the last echoes, up to a second
+    deadline = time.perf_counter() + 1.0
+    while sum(len(client.samples) for client in clients) < sent and time.perf_counter() < deadline:
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - started
+
+    for websocket in sockets:
+        await websocket.close()
+    for reader in readers:
+        reader.cancel()
+    await asyncio.gather(*readers, return_exceptions=True)
+
+    samples = [sample for client in clients for sample in client.samples]
+    stats = result(samples, elapsed)
+    stats["lost"] = sent - len(samples)
+    return stats
+
+
+def roundtrip_benchmarks(rates: list[float], connections: list[int], duration: float, port: int) -> dict[str, dict[str, float]]:
+    context = multiprocessing.get_context("spawn")
+    ready = context.Event()
+    server = context.Process(target=serve_echo, args=(port, ready), daemon=True)
+    server.start()
+    ready.wait()
+    results = {}
+    try:
+        for count in connections:
+            for rate in rates:
+                results[f"roundtrip.{count}conn.{rate:g}hz"] = asyncio.run(
+                    roundtrip(f"ws://127.0.0.1:{port}", count, rate, duration)
+                )
+    finally:
+        server.terminate()
+        server.join()
+    return results
+
+
+def metadata() -> dict[str, object]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "timestamp": time.time(),
+        "commit": commit,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def compare(baseline_path: str, current_path: str):
+    """Print the relative change of every metric present in both result files."""
+    with open(baseline_path, "rb") as f:
+        baseline = json.loads(f.read())["results"]
+    with open(current_path, "rb") as f:
+        current = json.loads(f.read())["results"]
+    rows = {}
+    for name in baseline.keys() & current.keys():
+        rows[name] = {
+            f"{metric} %": (current[name][metric] / baseline[name][metric] - 1) * 100 if baseline[name][metric] else 0.0
+            for metric in METRICS
+        }
+    if rows:
+        print_table(f"Change from {baseline_path} to {current_path}", dict(sorted(rows.items())))
+
+
+def main(args: argparse.Namespace):
+    results = micro_benchmarks(args.count)
+    if args.rates and args.connections:
+        results.update(roundtrip_benchmarks(
+            [float(rate) for rate in args.rates.split(",")],
+            [int(count) for count in args.connections.split(",")],
+            args.duration, args.port,
+        ))
+    print_table("Client stack benchmarks", {name: {metric: stats[metric] for metric in METRICS} for name, stats in results.items()})
+    if args.output:
+        with open(args.output, "wb") as f:
+            f.write(json.dumps({"meta": metadata(), "results": results}, option=json.OPT_INDENT_2 | json.OPT_SORT_KEYS))
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=20_000, help="iterations of each micro benchmark")
+    parser.add_argument("--rates", default="100,1000", help="comma separated frames per second per connection")
+    parser.add_argument("--connections", default="1,4", help="comma separated connection counts")
+    parser.add_argument("--duration", type=float, default=2.0, help="seconds per round trip sweep point")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"), help="compare two result files and exit")
+    args = parser.parse_args()
+    if args.compare:
+        compare(*args.compare)
+    else:
+        main(args)
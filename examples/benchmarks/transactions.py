@@ -0,0 +1,73 @@
+"""Time to approve every token for every wallet: one transaction at a time vs `TransactionPipeline`.
+
+Runs against a local `StandInRpc` with a block every `--block-time` seconds and `--latency`
+seconds per HTTP request, standing in for a remote node.
+    sequential  what `approve.py` did per transaction: read the nonce, send, poll the receipt
+                every `--poll-interval` seconds, then the next transaction
+    pipeline    all transactions at once, local nonces, batched calls and a shared receipt poller
+
+    python -m examples.benchmarks.transactions --wallets 4 --tokens 4
+"""
+import argparse
+import asyncio
+from decimal import Decimal
+import time
+
+from eth_account import Account
+
+from examples.approve import approval_transaction
+from examples.benchmarks.common import print_table
+from examples.server import StandInRpc
+from examples.transactions import JsonRpcClient, TransactionPipeline
+
+PORT = 8547
+
+
+async def sequential(rpc: JsonRpcClient, pipeline: TransactionPipeline, jobs: list, poll_interval: float):
+    for account, fields in jobs:
+        nonce = int(await rpc.call("eth_getTransactionCount", [account.address, "pending"]), 16)
+        signed = account.sign_transaction(pipeline.transaction(fields, nonce))
+        tx_hash = await rpc.call("eth_sendRawTransaction", ["0x" + bytes(signed.raw_transaction).hex()])
+        while await rpc.call("eth_getTransactionReceipt", [tx_hash]) is None:
+            await asyncio.sleep(poll_interval)
+
+
+async def main(wallets: int, tokens: int, block_time: float, latency: float, poll_interval: float):
+    node = StandInRpc(block_time=block_time, latency=latency)
+    runner = await node.start("127.0.0.1", PORT)
+    url = f"http://127.0.0.1:{PORT}/"
+    currencies = ["DCN", "ALPHA", "WETH", "USDC"]
+    rows = {}
+    try:
+        for name in ("sequential", "pipeline"):
+            accounts = [Account.create() for _ in range(wallets)]
+            jobs = [(account, approval_transaction(Decimal("10000"), currencies[index % len(currencies)]))
+                    for account in accounts for index in range(tokens)]
+            requests = node.stats["requests"]
+            started = time.perf_counter()
+            async with TransactionPipeline(JsonRpcClient(url), poll_interval=min(poll_interval, block_time / 2)) as pipeline:
+                if name == "sequential":
+                    await sequential(pipeline.rpc, pipeline, jobs, poll_interval)
+                else:
+                    await asyncio.gather(*(pipeline.submit(account, fields) for account, fields in jobs))
+            elapsed = time.perf_counter() - started
+            rows[name] = {
+                "transactions": len(jobs),
+                "seconds": elapsed,
+                "tx_per_sec": len(jobs) / elapsed,
+                "http_requests": node.stats["requests"] - requests,
+            }
+    finally:
+        await runner.cleanup()
+    print_table(f"{wallets} wallets x {tokens} approvals, {block_time}s blocks, {latency * 1000:.0f} ms per request", rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--wallets", type=int, default=4)
+    parser.add_argument("--tokens", type=int, default=4)
+    parser.add_argument("--block-time", type=float, default=0.25)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.wallets, args.tokens, args.block_time, args.latency, args.poll_interval))
@@ -0,0 +1,78 @@
+"""Time to run a rebalancing plan: one transfer at a time vs `Treasury.execute`.
+
+Every wallet deposits two tokens and withdraws a third, against a local `StandInServer` for the
+REST endpoints and a `StandInRpc` node with a block every `--block-time` seconds and `--latency`
+seconds per request.
+    serial    what running deposit.py and withdraw.py per entry amounts to: approve and wait for
+              the receipt, then deposit, each transfer with its own REST client and signature
+    treasury  the whole plan at once, one approval per wallet and token, shared client
+
+    python -m examples.benchmarks.treasury --wallets 8
+"""
+import argparse
+import asyncio
+from decimal import Decimal
+import time
+
+from eth_account import Account
+
+from examples.approve import approval_transaction
+from examples.benchmarks.common import print_table
+from examples.rest import AsyncRestClient
+from examples.server import StandInRpc, StandInServer
+from examples.signing import HeaderSigner
+from examples.transactions import JsonRpcClient, TransactionPipeline
+from examples.treasury import DEPOSIT, WITHDRAW, Transfer, Treasury
+
+RPC_PORT = 8548
+REST_PORT = 8549
+
+
+async def serial(plan: list[Transfer], pipeline: TransactionPipeline, base_url: str):
+    for transfer in plan:
+        async with AsyncRestClient(transfer.account, base_url=base_url) as rest:
+            if transfer.direction == DEPOSIT:
+                await pipeline.submit(transfer.account, approval_transaction(transfer.amount, transfer.token))
+                await rest.deposit(transfer.amount, transfer.token)
+            else:
+                await rest.withdraw(transfer.amount, transfer.token)
+
+
+async def main(wallets: int, block_time: float, latency: float):
+    node = StandInRpc(block_time=block_time, latency=latency)
+    rpc_runner = await node.start("127.0.0.1", RPC_PORT)
+    server = StandInServer()
+    rest_runner = await server.start("127.0.0.1", REST_PORT)
+    rpc_url, base_url = f"http://127.0.0.1:{RPC_PORT}/", f"http://127.0.0.1:{REST_PORT}"
+    rows = {}
+    try:
+        for name in ("serial", "treasury"):
+            plan = []
+            for account in (Account.create() for _ in range(wallets)):
+                plan += [Transfer(account, "DCN", Decimal("100"), DEPOSIT), Transfer(account, "ALPHA", Decimal("100"), DEPOSIT),
+                         Transfer(account, "ALPHA", Decimal("50"), WITHDRAW)]
+            started = time.perf_counter()
+            pipeline = TransactionPipeline(JsonRpcClient(rpc_url), poll_interval=block_time / 2)
+            if name == "serial":
+                await serial(plan, pipeline, base_url)
+                await pipeline.close()
+                ok = len(plan)
+            else:
+                rest = AsyncRestClient(base_url=base_url, header_factory=HeaderSigner())
+                async with Treasury(rest, pipeline, deposit_rate=50, withdraw_rate=50) as treasury:
+                    ok = sum(result.ok for result in await treasury.execute(plan))
+            elapsed = time.perf_counter() - started
+            rows[name] = {"transfers": len(plan), "succeeded": ok, "seconds": elapsed, "per_sec": len(plan) / elapsed}
+    finally:
+        await rest_runner.cleanup()
+        await rpc_runner.cleanup()
+    print_table(f"{wallets} wallets x 3 transfers, {block_time}s blocks, {latency * 1000:.0f} ms per node request", rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--wallets", type=int, default=8)
+    parser.add_argument("--block-time", type=float, default=0.25)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+    asyncio.run(main(args.wallets, args.block_time, args.latency))
@@ -2,9 +2,10 @@ import os
 
 from web3 import Account
 
-from examples.signing import sign_auth_headers
+from examples.signing import HeaderSigner
 from examples.constants import URL
 from examples.websocket.base import WebSocketClientManager
+from examples.websocket.logs import LogPipeline
 from examples.websocket.maker import MakerClient
 
 
@@ -12,23 +13,32 @@ def main():
 
     account = Account.from_key(os.environ["MAKER_PRIVATE_KEY"])
 
-    # First sign the auth headers
-    headers = sign_auth_headers(account=account)
+    # First sign the auth headers, re-signed on every reconnect
+    signer = HeaderSigner([account])
+    headers = signer.headers(account)
     print(f"Headers: {headers}")
 
+    # Pools to quote in over the one connection, eg. POOLS=DCN-ALPHA_common,DCN-BETA_common
+    pools = os.environ.get("POOLS", "DCN-ALPHA_common").split(",")
+
     # Create a MakerClient that can publish Quotes
     maker_client = MakerClient(
         uri=f"ws://{URL}/ws/maker",
         headers=headers,
-        pool_id="DCN-ALPHA_common",
+        pools=pools,
+        header_factory=lambda: signer.headers(account),
     )
 
     # Add the clients to the manager
     manager = WebSocketClientManager()
     manager.add_client('maker', maker_client)
 
+    # Client logs are formatted and written on a background thread, to LOG_FILE if set
+    logs = LogPipeline(path=os.environ.get("LOG_FILE")).start()
+
     # Run the clients
     manager.run()
+    logs.stop()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,64 @@
+import asyncio
+import os
+import sys
+
+from web3 import Account
+
+from examples.signing import HeaderSigner
+from examples.constants import URL
+from examples.websocket.base import WebSocketClientManager
+from examples.websocket.logs import LogPipeline
+from examples.websocket.bus import DEFAULT_PATH, MarketDataBus
+from examples.websocket.marketdata import MarketDataClient
+
+
+async def run(manager: WebSocketClientManager, signer: HeaderSigner):
+    signing = asyncio.create_task(signer.run())
+    try:
+        await manager.start()
+    finally:
+        signing.cancel()
+        await asyncio.gather(signing, return_exceptions=True)
+        await manager.stop()
+
+
+def main():
+    # User must set
+    account = Account.from_key(os.environ["TAKER_PRIVATE_KEY"])
+    # Auth headers, re-signed for every reconnect and pre-signed in the background by `run`
+    signer = HeaderSigner([account])
+
+    # Pools to publish, all from one market data connection
+    pools = sys.argv[1:] or ["DCN-ALPHA_common"]
+    path = os.environ.get("MKTDATA_BUS_PATH", DEFAULT_PATH)
+
+    # Every update is decoded once here and written to the shared-memory bus, strategies on this
+    # machine read it with MarketDataBus.open(path).reader() instead of connecting themselves
+    bus = MarketDataBus.create(path)
+    print(f"Publishing market data for {pools} to {path}")
+
+    async def publish(data):
+        bus.publish(data)
+
+    # Updates are dispatched by their pool_id: the listed pools are published, the others dropped
+    client = MarketDataClient(
+        uri=f"ws://{URL}/ws/mktdata",
+        headers=signer.headers(account),
+        header_factory=lambda: signer.headers(account),
+    )
+    for pool_id in pools:
+        client.add_pool_handler(pool_id, publish)
+    manager = WebSocketClientManager()
+    manager.add_client("marketdata", client)
+    # Client logs are formatted and written on a background thread, to LOG_FILE if set
+    logs = LogPipeline(path=os.environ.get("LOG_FILE")).start()
+    try:
+        asyncio.run(run(manager, signer))
+    except KeyboardInterrupt:
+        print("Interrupt detected...")
+    finally:
+        logs.stop()
+
+
+if __name__ == "__main__":
+    main()
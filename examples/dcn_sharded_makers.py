@@ -0,0 +1,42 @@
+import functools
+import os
+
+from web3 import Account
+
+from examples.constants import URL
+from examples.signing import HeaderSigner
+from examples.websocket.maker import MakerClient
+from examples.websocket.sharding import ShardedClientManager
+
+
+def make_maker(private_key: str, pools: list[str]) -> MakerClient:
+    """Build a maker inside its shard process, signing its own headers there."""
+    account = Account.from_key(private_key)
+    signer = HeaderSigner([account])
+    return MakerClient(
+        uri=f"ws://{URL}/ws/maker",
+        headers=signer.headers(account),
+        pools=pools,
+        header_factory=lambda: signer.headers(account),
+    )
+
+
+def main():
+    # One maker per wallet, each quoting every pool in POOLS, spread over one shard per core
+    private_keys = os.environ["MAKER_PRIVATE_KEYS"].split(",")
+    pools = os.environ.get("POOLS", "DCN-ALPHA_common").split(",")
+
+    manager = ShardedClientManager(
+        shards=int(os.environ["SHARDS"]) if os.environ.get("SHARDS") else None,
+        use_uvloop=True,
+    )
+    for private_key in private_keys:
+        address = Account.from_key(private_key).address
+        shard = manager.add_client(f"maker-{address}", functools.partial(make_maker, private_key, pools))
+        print(f"Maker {address} on shard {shard}")
+
+    manager.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,9 +2,10 @@ import os
 
 from web3 import Account
 
-from examples.signing import sign_auth_headers
+from examples.signing import HeaderSigner
 from examples.constants import URL
 from examples.websocket.base import WebSocketClientManager
+from examples.websocket.logs import LogPipeline
 from examples.websocket.marketdata import MarketDataClient
 from examples.websocket.taker import OrderClient
 
@@ -14,16 +15,21 @@ def main():
 
     account = Account.from_key(os.environ["TAKER_PRIVATE_KEY"])
 
-    # First sign the auth headers
-    headers = sign_auth_headers(account=account)
+    # First sign the auth headers, re-signed on every reconnect
+    signer = HeaderSigner([account])
+    headers = signer.headers(account)
     print(f"Headers: {headers}")
 
     # Create an OrderClient that can act on market data and place orders and listen for trades
     print(f"setting up order client with uri: ws://{URL}/ws/taker")
+    # Pools to trade, every pool in the market data if POOLS is not set
+    pools = os.environ["POOLS"].split(",") if os.environ.get("POOLS") else None
     order_client = OrderClient(
         uri=f"ws://{URL}/ws/taker",
         account=account,
-        headers=headers
+        headers=headers,
+        pools=pools,
+        header_factory=lambda: signer.headers(account),
     )
 
     # Set the order client to handle responses from the market data client
@@ -31,7 +37,9 @@ def main():
     market_data_client = MarketDataClient(
         uri=f"ws://{URL}/ws/mktdata",
         headers=headers,
-        message_handler=order_client.handle_quote
+        message_handler=order_client.handle_quote,
+        header_factory=lambda: signer.headers(account),
+        standby=True,
     )
 
     # Add the clients to the manager
@@ -40,9 +48,13 @@ def main():
     manager.add_client('marketdata', market_data_client)
     manager.add_client('taker', order_client)
 
+    # Client logs are formatted and written on a background thread, to LOG_FILE if set
+    logs = LogPipeline(path=os.environ.get("LOG_FILE")).start()
+
     # Run the clients
     print(f"Running the client...")
     manager.run()
+    logs.stop()
 
 
 if __name__ == "__main__":
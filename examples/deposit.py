@@ -1,9 +1,8 @@
+import asyncio
 from decimal import Decimal
 import os
 
-import requests
-from examples.constants import URL
-from examples.signing import sign_auth_headers
+from examples.rest import AsyncRestClient
 from web3 import Account
 
 def deposit(deposit_amount: Decimal, currency: str):
@@ -12,6 +11,10 @@ def deposit(deposit_amount: Decimal, currency: str):
 
     Note that you must first approve the deposit amount, as described in the approve.py example.
 
+    The request is sent with the non-blocking `AsyncRestClient`; inside a running event loop
+    (eg. next to the websocket clients) await `AsyncRestClient.deposit` directly instead.
+    To move funds for many wallets or tokens at once use `examples.treasury.Treasury`.
+
     :param deposit_amount: 
         The amount to deposit. Eg. if you want to deposit 2.3 ETH, you would pass 2.3.
         Has to be a Decimal to avoid floating point issues.
@@ -22,21 +25,13 @@ def deposit(deposit_amount: Decimal, currency: str):
     # User must set private key
     account = Account.from_key(os.environ["WALLET_PRIVATE_KEY"])
 
-    # First sign the auth headers
-    headers = sign_auth_headers(account=account)
-    print(f"Headers: {headers}")
-
-    # Create deposit request payload
-    payload = {
-        "account": account.address,
-        "amount": str(deposit_amount),
-        "token": currency,
-    }
+    async def _deposit():
+        # The client signs fresh auth headers for the request
+        async with AsyncRestClient(account) as rest:
+            return await rest.deposit(deposit_amount, currency)
 
     # Send deposit request
-    response = requests.post(f"https://{URL}/deposit", json=payload, headers=headers)
-    response.raise_for_status()
-    print(response.json())
+    print(asyncio.run(_deposit()))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,171 @@
+"""Exact fixed-point representation of prices, sizes and token amounts.
+
+Wire values are decimal strings. They are converted once, at the edge, to integers scaled by
+`SCALE` (18 decimals, the precision of the DCN and ALPHA tokens), so ladder math, comparisons and
+rung lookups are plain integer operations. Values are formatted back to strings only when a
+message is serialized.
+
+Conversions are exact: a value that cannot be represented with `DECIMALS` decimals raises a
+`ValueError` instead of being silently rounded.
+"""
+from bisect import bisect_left
+from decimal import Decimal
+
+DECIMALS = 18
+SCALE = 10 ** DECIMALS
+
+_UNITS = [10 ** (DECIMALS - places) for places in range(DECIMALS + 1)]
+
+# Formatted wire strings per number of decimals, and whole formatted ladders, see `format_ladder`
+_WIRE_CACHE: dict[int, dict[int, str]] = {}
+_WIRE_CACHE_SIZE = 65_536
+_LADDER_CACHE: dict[int, dict[tuple[int, ...], tuple[str, ...]]] = {}
+_LADDER_CACHE_SIZE = 16_384
+
+
+def to_fixed(value) -> int:
+    """Convert a wire value to a scaled integer.
+
+    Args:
+        value (str | int | Decimal | float): The value to convert. Floats are converted through
+            their shortest round-trip representation, eg. 0.1 -> "0.1".
+
+    Raises:
+        ValueError: If the value has more than `DECIMALS` significant decimals or is not a number.
+    """
+    if value.__class__ is str:
+        whole, _, frac = value.partition(".")
+        if len(frac) <= DECIMALS and "e" not in value and "E" not in value:
+            if not whole or whole in "+-":
+                whole += "0"
+            try:
+                return int(whole + frac + "0" * (DECIMALS - len(frac)))
+            except ValueError:
+                pass
+    elif value.__class__ is int:
+        return value * SCALE
+    elif value.__class__ is float:
+        return to_fixed(repr(value))
+
+    # Slow path: exponents, excess trailing zeros, Decimals
+    try:
+        scaled = Decimal(value).scaleb(DECIMALS)
+    except ArithmeticError:
+        raise ValueError(f"{value!r} is not a valid number") from None
+    if not scaled.is_finite() or scaled != scaled.to_integral_value():
+        raise ValueError(f"{value!r} cannot be represented exactly with {DECIMALS} decimals")
+    return int(scaled)
+
+
+def quantize(value: int, places: int) -> int:
+    """Round a scaled integer to `places` decimals, rounding half to even like `Decimal`."""
+    unit = _UNITS[places]
+    quotient, remainder = divmod(value, unit)
+    if remainder * 2 > unit or (remainder * 2 == unit and quotient & 1):
+        quotient += 1
+    return quotient * unit
+
+
+def to_wire(value: int, places: int = None) -> str:
+    """Format a scaled integer as a wire string.
+
+    Args:
+        value (int): The scaled integer.
+        places (int, optional): Number of decimals to format with, rounding half to even. By
+            default the shortest exact representation is used, eg. "1.5" or "2.0".
+    """
+    if places is None:
+        places = DECIMALS
+        strip = True
+    else:
+        strip = False
+    unit = _UNITS[places]
+    if value % unit:
+        value = quantize(value, places)
+    digits = str(value // unit)
+    sign = ""
+    if digits[0] == "-":
+        sign, digits = "-", digits[1:]
+    if places == 0:
+        return sign + digits
+    if len(digits) <= places:
+        digits = "0" * (places + 1 - len(digits)) + digits
+    whole, frac = digits[:-places], digits[-places:]
+    if strip:
+        frac = frac.rstrip("0") or "0"
+    return f"{sign}{whole}.{frac}"
+
+
+def format_ladder(values: list[int], places: int) -> list[str]:
+    """Format a ladder of scaled integers with `places` decimals.
+
+    Quoted prices move on a small grid of ticks and ladders repeat as the mid moves back and forth,
+    so whole ladders are memoized, and on a miss formatted strings are memoized per value. Both
+    memos are bounded and simply reset when full.
+    """
+    ladders = _LADDER_CACHE.get(places)
+    if ladders is None:
+        ladders = _LADDER_CACHE[places] = {}
+    key = tuple(values)
+    wire = ladders.get(key)
+    if wire is not None:
+        return list(wire)
+
+    cache = _WIRE_CACHE.get(places)
+    if cache is None:
+        cache = _WIRE_CACHE[places] = {}
+    get = cache.get
+    wire = [get(value) for value in values]
+    if None in wire:
+        if len(cache) > _WIRE_CACHE_SIZE:
+            cache.clear()
+        wire = [get(value) or cache.setdefault(value, to_wire(value, places)) for value in values]
+    if len(ladders) > _LADDER_CACHE_SIZE:
+        ladders.clear()
+    ladders[key] = tuple(wire)
+    return wire
+
+
+def from_float(value: float, places: int) -> int:
+    """Scaled integer of `value` rounded to `places` decimals, as `Decimal(f"{value:.2f}")` would give."""
+    return int(f"{value:.{places}f}".replace(".", "")) * _UNITS[places]
+
+
+def to_decimal(value: int) -> Decimal:
+    return Decimal(value).scaleb(-DECIMALS)
+
+
+def mul(a: int, b: int, round_up: bool = False) -> int:
+    """Product of two scaled integers, eg. quantity * price.
+
+    The product is exact whenever it fits in `DECIMALS` decimals; otherwise it is rounded half to
+    even, or up with `round_up`, which is what a reservation wants.
+    """
+    quotient, remainder = divmod(a * b, SCALE)
+    if remainder:
+        if round_up or remainder * 2 > SCALE or (remainder * 2 == SCALE and quotient & 1):
+            quotient += 1
+    return quotient
+
+
+def parse_ladder(values: list[str]) -> list[int]:
+    return [to_fixed(value) for value in values]
+
+
+def rung_index(sizes: list[int], quantity: int) -> int:
+    """Index of the rung that fills `quantity`: the smallest rung size that is greater than or
+    equal to it, since a quantity in between two rungs rounds up to the next rung.
+
+    Args:
+        sizes (list[int]): Ascending scaled rung sizes.
+        quantity (int): The scaled quantity to fill.
+
+    Raises:
+        ValueError: If the quantity is not positive or larger than the largest rung.
+    """
+    if quantity <= 0:
+        raise ValueError("Quantity must be greater than 0")
+    index = bisect_left(sizes, quantity)
+    if index == len(sizes):
+        raise ValueError("Quantity exceeds the largest rung of liquidity")
+    return index
@@ -0,0 +1,206 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable
+
+from examples.fixedpoint import mul, to_fixed, to_wire
+from examples.websocket.logs import get_logger
+from examples.websocket.messages import MakerTradeMessage, TakerTradeMessage
+
+logger = get_logger(__name__)
+
+
+class TokenBalance:
+    """Balance of a single token as tracked by the local ledger.
+
+    `balance` is the settled amount held in the clearinghouse, `in_flight` the amount reserved by
+    orders that have been sent but not yet confirmed, and `available` what is left to trade with.
+    All amounts are fixed-point integers, see `examples.fixedpoint`.
+    """
+    __slots__ = ("balance", "in_flight")
+
+    def __init__(self, balance: int = 0, in_flight: int = 0):
+        self.balance = balance
+        self.in_flight = in_flight
+
+    @property
+    def available(self) -> int:
+        return self.balance - self.in_flight
+
+    def as_dict(self) -> dict[str, str]:
+        return {"balance": to_wire(self.balance), "in_flight": to_wire(self.in_flight), "available": to_wire(self.available)}
+
+    def __repr__(self):
+        return f"TokenBalance(balance={to_wire(self.balance)}, in_flight={to_wire(self.in_flight)}, available={to_wire(self.available)})"
+
+
+class BalanceLedger:
+    """Local, incrementally maintained view of a wallet's balances.
+
+    The ledger is updated in O(1) from the trade messages received on the taker and maker
+    websockets, so pre-trade checks are a dictionary lookup instead of a `/balances` round trip.
+    It can periodically be reconciled against the REST balances, recording how far the local view
+    had drifted from the server.
+
+    Symbols are of the form "CCY0-CCY1": quantities are in CCY0 terms and prices are CCY1 per CCY0,
+    so a BUY receives `quantity` CCY0 and pays `quantity * price` CCY1. Fees are charged in their
+    own fee currency. Quantities, prices and amounts are fixed-point integers (`examples.fixedpoint`),
+    trade messages are converted at the edge.
+    """
+
+    def __init__(self):
+        self.tokens: dict[str, TokenBalance] = {}
+        # order id -> (token, reserved amount)
+        self._reservations: dict[str, tuple[str, int]] = {}
+
+        # Drift metrics, local minus server, per token
+        self.drift: dict[str, int] = {}
+        self.max_abs_drift: dict[str, int] = {}
+        self.reconciliations = 0
+        self.drifted_reconciliations = 0
+        self.last_reconciled_at = None
+
+    def token(self, ccy: str) -> TokenBalance:
+        balance = self.tokens.get(ccy)
+        if balance is None:
+            balance = self.tokens[ccy] = TokenBalance()
+        return balance
+
+    def available(self, ccy: str) -> int:
+        balance = self.tokens.get(ccy)
+        return balance.available if balance is not None else 0
+
+    @staticmethod
+    def required(side: str, symbol: str, quantity: int, price: int) -> tuple[str, int]:
+        """The token and amount an order of `quantity` at `price` on `symbol` needs to be covered.
+        """
+        ccy0, ccy1 = symbol.split("-", 1)
+        if side == "BUY":
+            return ccy1, mul(quantity, price, round_up=True)
+        return ccy0, quantity
+
+    def can_afford(self, side: str, symbol: str, quantity: int, price: int) -> bool:
+        ccy, amount = self.required(side, symbol, quantity, price)
+        return self.available(ccy) >= amount
+
+    def reserve(self, order_id: str, side: str, symbol: str, quantity: int, price: int):
+        """Move the amount needed for an order into flight until the order is confirmed.
+        """
+        self.release(order_id)
+        ccy, amount = self.required(side, symbol, quantity, price)
+        self.token(ccy).in_flight += amount
+        self._reservations[order_id] = (ccy, amount)
+
+    def release(self, order_id: str):
+        reservation = self._reservations.pop(order_id, None)
+        if reservation is not None:
+            ccy, amount = reservation
+            self.token(ccy).in_flight -= amount
+
+    def apply_fill(self, side: str, symbol: str, quantity: int, price: int, fee: int = 0, fee_ccy: str = None):
+        """Apply an executed trade of `quantity` at `price`, seen from the side that traded `side`.
+        """
+        ccy0, ccy1 = symbol.split("-", 1)
+        notional = mul(quantity, price)
+        if side == "BUY":
+            self.token(ccy0).balance += quantity
+            self.token(ccy1).balance -= notional
+        else:
+            self.token(ccy0).balance -= quantity
+            self.token(ccy1).balance += notional
+        if fee and fee_ccy:
+            self.token(fee_ccy).balance -= fee
+
+    def apply_taker_trade(self, data: TakerTradeMessage):
+        """Update the ledger from a TakerTradeMessage, releasing the order's reservation.
+        """
+        self.release(data.quote_id)
+        if data.status == "ACCEPT":
+            quantity = to_fixed(data.executed_quantity)
+            if quantity:
+                self.apply_fill(
+                    data.side, data.symbol, quantity, to_fixed(data.executed_price),
+                    to_fixed(data.taker_fee), data.taker_fee_ccy,
+                )
+
+    def apply_maker_trade(self, data: MakerTradeMessage):
+        """Update the ledger from a MakerTradeMessage.
+
+        The `side` on the message is the taker's side, so the maker trades the opposite way. An
+        ACCEPT reserves the amount until the final DONE/NOT_DONE confirmation, and only DONE
+        changes the balances.
+        """
+        trade_id = f"trade:{data.trade_id}"
+        side = "SELL" if data.side == "BUY" else "BUY"
+        status = data.status
+        if status == "ACCEPT":
+            self.reserve(trade_id, side, data.symbol, to_fixed(data.executed_quantity), to_fixed(data.executed_price))
+        elif status in ("DONE", "NOT_DONE", "ERROR"):
+            self.release(trade_id)
+            if status == "DONE":
+                self.apply_fill(
+                    side, data.symbol, to_fixed(data.executed_quantity), to_fixed(data.executed_price),
+                    to_fixed(data.maker_fee), data.maker_fee_ccy,
+                )
+
+    def load(self, balances: dict[str, dict[str, Any]]):
+        """Seed the settled balances from a `/balances` response without recording drift.
+        """
+        for ccy, server in balances.items():
+            self.token(ccy).balance = to_fixed(server["balance"])
+
+    def reconcile(self, balances: dict[str, dict[str, Any]], adopt: bool = True) -> dict[str, int]:
+        """Compare the ledger with the `balances` returned by the `/balances` endpoint.
+
+        Args:
+            balances (dict): The "balances" field of the `/balances` response, keyed by token.
+            adopt (bool): Replace the local settled balances with the server's after measuring drift.
+
+        Returns:
+            dict: The drift of the settled balance per token, local minus server.
+        """
+        drift = {}
+        for ccy, server in balances.items():
+            server_balance = to_fixed(server["balance"])
+            token = self.token(ccy)
+            drift[ccy] = token.balance - server_balance
+            if adopt:
+                token.balance = server_balance
+
+        self.drift = drift
+        for ccy, value in drift.items():
+            self.max_abs_drift[ccy] = max(self.max_abs_drift.get(ccy, 0), abs(value))
+        self.reconciliations += 1
+        if any(drift.values()):
+            self.drifted_reconciliations += 1
+        self.last_reconciled_at = time.time()
+        return drift
+
+    async def run_reconciliation(self, fetch: Callable[[], Awaitable[dict[str, Any]]], interval: float = 60.0):
+        """Periodically reconcile against the balances returned by `fetch`.
+
+        Args:
+            fetch (Callable): Coroutine function returning the `/balances` response.
+            interval (float): Seconds between reconciliations.
+        """
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                response = await fetch()
+            except Exception as e:
+                logger.warning("Balance reconciliation failed: %r", e)
+                continue
+            drift = self.reconcile(response["balances"])
+            if any(drift.values()):
+                logger.warning("Balance ledger drift detected: %s", {ccy: to_wire(value) for ccy, value in drift.items()})
+
+    def drift_metrics(self) -> dict[str, Any]:
+        return {
+            "reconciliations": self.reconciliations,
+            "drifted_reconciliations": self.drifted_reconciliations,
+            "last_reconciled_at": self.last_reconciled_at,
+            "drift": {ccy: to_wire(value) for ccy, value in self.drift.items()},
+            "max_abs_drift": {ccy: to_wire(value) for ccy, value in self.max_abs_drift.items()},
+        }
+
+    def snapshot(self) -> dict[str, dict[str, str]]:
+        return {ccy: balance.as_dict() for ccy, balance in self.tokens.items()}
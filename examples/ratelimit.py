@@ -0,0 +1,65 @@
+import asyncio
+import time
+from typing import Callable
+
+
+class RateLimiter:
+    """Token bucket allowing `rate` operations per second with bursts of up to `burst`.
+
+    `acquire` reserves its tokens straight away and sleeps until they are due, so waiting callers
+    are served in the order they called, without polling.
+
+    Usage:
+        deposits = RateLimiter(rate=5, burst=5)
+        await deposits.acquire()
+    """
+
+    def __init__(self, rate: float, burst: float = None, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            rate (float): Tokens added per second.
+            burst (float, optional): Capacity of the bucket, `rate` by default (at least 1).
+            clock (Callable): Monotonic time in seconds.
+        """
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate}")
+        self.rate = rate
+        self.burst = max(1.0, rate if burst is None else burst)
+        self.clock = clock
+        self.tokens = self.burst
+        self.updated = clock()
+        self.waited = 0.0
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self, tokens: float = 1) -> bool:
+        """Take `tokens` if they are available now, without waiting."""
+        self._refill(self.clock())
+        if self.tokens < tokens:
+            return False
+        self.tokens -= tokens
+        return True
+
+    def reserve(self, tokens: float = 1) -> float:
+        """Take `tokens`, borrowing from the future if needed.
+
+        Returns:
+            float: Seconds until the reservation is due, 0 if the tokens were available.
+        """
+        self._refill(self.clock())
+        self.tokens -= tokens
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    async def acquire(self, tokens: float = 1) -> float:
+        """Wait until `tokens` are available and take them.
+
+        Returns:
+            float: Seconds waited.
+        """
+        delay = self.reserve(tokens)
+        if delay:
+            self.waited += delay
+            await asyncio.sleep(delay)
+        return delay
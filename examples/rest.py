@@ -0,0 +1,120 @@
+import asyncio
+from decimal import Decimal
+from typing import Any, Callable
+
+import aiohttp
+import orjson as json
+
+from examples.constants import URL
+from examples.signing import sign_auth_headers
+
+
+class AsyncRestClient:
+    """Non-blocking client for the AlphaStar REST endpoints (balances, deposit and withdraw).
+
+    A single `aiohttp.ClientSession` is shared by every call, so TCP/TLS connections are kept
+    alive and reused instead of being re-established per request. A semaphore caps the number
+    of requests in flight, and every request is bounded by a total timeout, so a slow REST
+    endpoint can never stall the websocket event loop.
+
+    Usage:
+        async with AsyncRestClient(account) as rest:
+            balances = await rest.get_balances()
+    """
+
+    def __init__(
+        self,
+        account=None,
+        base_url: str = f"https://{URL}",
+        timeout: float = 5.0,
+        max_connections: int = 8,
+        max_concurrency: int = 4,
+        keepalive_timeout: float = 30.0,
+        header_factory: Callable[..., dict[str, str]] = sign_auth_headers,
+    ):
+        """
+        Args:
+            account: The web3 `Account` used to sign the auth headers of every request.
+            base_url (str): Scheme and host of the REST API, eg. "https://dcn.alpha.deepqdigital.net".
+            timeout (float): Total timeout in seconds for a single request, including connecting.
+            max_connections (int): Size of the keep-alive connection pool.
+            max_concurrency (int): Maximum number of requests in flight at once. Further calls wait.
+            keepalive_timeout (float): Seconds an idle pooled connection is kept open.
+            header_factory (Callable): Builds the auth headers for `account`, called once per request.
+        """
+        self.account = account
+        self.base_url = base_url.rstrip("/")
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.max_connections = max_connections
+        self.keepalive_timeout = keepalive_timeout
+        self.header_factory = header_factory
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """The shared session, created lazily so the client can be built outside a running loop."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=self.timeout,
+                json_serialize=lambda obj: json.dumps(obj).decode(),
+            )
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def post(self, path: str, payload: dict[str, Any], account=None) -> Any:
+        """POST `payload` to `path` with freshly signed auth headers and return the decoded JSON body.
+
+        Raises:
+            aiohttp.ClientResponseError: If the server answers with an error status.
+            asyncio.TimeoutError: If the request does not complete within the configured timeout.
+        """
+        async with self._semaphore:
+            # Signed once a slot is free, so the signed timestamp is not stale by the time it is sent
+            headers = self.header_factory(account=account or self.account)
+            async with self.session.post(f"{self.base_url}{path}", json=payload, headers=headers) as response:
+                response.raise_for_status()
+                return json.loads(await response.read())
+
+    async def get_balances(self, wallet_id: str = None, account=None) -> dict[str, Any]:
+        """Fetch the contract, available and in-flight balances for `wallet_id`."""
+        account = account or self.account
+        return await self.post("/balances", {"account": wallet_id or account.address}, account=account)
+
+    async def deposit(self, deposit_amount: Decimal, currency: str, account=None) -> dict[str, Any]:
+        """Request a deposit of `deposit_amount` `currency` into the clearinghouse contract.
+
+        Note that the deposit amount must have been approved first, see `examples/approve.py`.
+        """
+        account = account or self.account
+        payload = {
+            "account": account.address,
+            "amount": str(deposit_amount),
+            "token": currency,
+        }
+        return await self.post("/deposit", payload, account=account)
+
+    async def withdraw(self, withdrawal_amount: Decimal, currency: str, account=None) -> dict[str, Any]:
+        """Request a withdrawal of `withdrawal_amount` `currency` from the clearinghouse contract."""
+        account = account or self.account
+        payload = {
+            "account": account.address,
+            "amount": str(withdrawal_amount),
+            "currency": currency,
+        }
+        return await self.post("/withdraw", payload, account=account)
@@ -0,0 +1,3 @@
+from .app import StandInServer
+from .pool import Match, Pool, PoolQuote
+from .rpc import StandInRpc
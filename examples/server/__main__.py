@@ -0,0 +1,56 @@
+"""Run the local stand-in server.
+
+    python -m examples.server --port 8000
+
+Point the clients at it by setting `URL = "localhost:8000"` in `examples/constants.py`. With
+`--rpc-port` a JSON-RPC stand-in for the chain is served as well, for `examples.transactions`.
+"""
+import argparse
+import asyncio
+
+from .app import StandInServer
+from .pool import Pool
+from .rpc import StandInRpc
+
+
+async def main(host: str, port: int, pool_ids: list[str], response_window: float, heartbeat_interval: float,
+               rpc_port: int = None, block_time: float = 1.0):
+    server = StandInServer(
+        [Pool(pool_id, pool_id.rsplit("_", 1)[0], ["1", "2", "3", "5", "10", "20"]) for pool_id in pool_ids],
+        response_window=response_window,
+        heartbeat_interval=heartbeat_interval,
+    )
+    runner = await server.start(host, port)
+    print(f"Stand-in server listening on ws://{host}:{port}")
+    rpc = rpc_runner = None
+    if rpc_port is not None:
+        rpc = StandInRpc(block_time=block_time)
+        rpc_runner = await rpc.start(host, rpc_port)
+        print(f"Stand-in JSON-RPC node listening on http://{host}:{rpc_port}/")
+    try:
+        while True:
+            await asyncio.sleep(10)
+            print(f"Stats: {server.stats}")
+            if rpc is not None:
+                print(f"JSON-RPC stats: {rpc.stats}")
+    finally:
+        if rpc_runner is not None:
+            await rpc_runner.cleanup()
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--pools", default="DCN-ALPHA_common", help="comma separated pool ids to serve")
+    parser.add_argument("--response-window", type=float, default=0.1)
+    parser.add_argument("--heartbeat-interval", type=float, default=5.0)
+    parser.add_argument("--rpc-port", type=int, default=None, help="also serve a JSON-RPC stand-in on this port")
+    parser.add_argument("--block-time", type=float, default=1.0, help="seconds between blocks of the JSON-RPC stand-in")
+    args = parser.parse_args()
+    try:
+        asyncio.run(main(args.host, args.port, args.pools.split(","), args.response_window, args.heartbeat_interval,
+                         args.rpc_port, args.block_time))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,337 @@
+import asyncio
+import itertools
+import time
+from typing import Any
+
+from aiohttp import WSMsgType, web
+import orjson as json
+
+from examples.fixedpoint import to_fixed
+from examples.ledger import BalanceLedger
+
+from .pool import Match, Pool
+
+
+def envelope(message_type: str, data: dict[str, Any]) -> str:
+    """A server frame; like the Alphastar servers, the data is sent as a JSON encoded string."""
+    return json.dumps({"type": message_type, "data": json.dumps(data).decode()}).decode()
+
+
+class StandInServer:
+    """Local stand-in for the Alphastar websocket and REST endpoints, for load testing the clients.
+
+    Serves /ws/maker, /ws/taker and /ws/mktdata with the message schemas of the README, and
+    POST /balances, /deposit and /withdraw stubs. Quotes go into a price/time-priority `Pool`; each change is published to
+    the market data subscribers. A matched taker order is sent to the maker as a REQUEST, the maker
+    has `response_window` seconds to ACCEPT or REJECT, and both sides get the outcome: DONE or
+    NOT_DONE to the maker, ACCEPT or REJECT to the taker. Balances of each wallet are tracked from
+    the DONE trades, starting from `initial_balances`. Authentication headers are not verified,
+    only the wallet header is required.
+
+    Usage:
+        server = StandInServer()
+        runner = await server.start("127.0.0.1", 8000)
+        ...
+        await runner.cleanup()
+    """
+
+    def __init__(self, pools: list[Pool] = None, response_window: float = 0.1, heartbeat_interval: float = 5.0,
+                 initial_balances: dict[str, str] = None):
+        """
+        Args:
+            pools (list[Pool], optional): The pools served, the testnet DCN-ALPHA pool by default.
+            response_window (float): Seconds a maker has to answer a trade REQUEST.
+            heartbeat_interval (float): Seconds between heartbeats on the taker and market data connections.
+            initial_balances (dict, optional): Token -> balance every new wallet starts with.
+        """
+        pools = pools or [Pool("DCN-ALPHA_common", "DCN-ALPHA", ["1", "2", "3", "5", "10", "20"])]
+        self.pools = {pool.pool_id: pool for pool in pools}
+        self.response_window = response_window
+        self.heartbeat_interval = heartbeat_interval
+        self.initial_balances = initial_balances or {"DCN": "1000000", "ALPHA": "1000000"}
+
+        self.makers: dict[str, web.WebSocketResponse] = {}
+        self.takers: dict[str, web.WebSocketResponse] = {}
+        # pool id -> market data subscribers
+        self.subscribers: dict[str, set[web.WebSocketResponse]] = {pool_id: set() for pool_id in self.pools}
+        self.ledgers: dict[str, BalanceLedger] = {}
+        # trade id -> future resolved with the maker's response
+        self.pending: dict[int, asyncio.Future] = {}
+        self._trade_ids = itertools.count(1)
+        self._tasks: set[asyncio.Task] = set()
+
+        self.stats = {"quotes": 0, "quote_rejects": 0, "orders": 0, "misses": 0, "done": 0, "not_done": 0, "timeouts": 0,
+                      "deposits": 0, "withdrawals": 0}
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.add_routes([
+            web.get("/ws/maker", self.maker_socket),
+            web.get("/ws/taker", self.taker_socket),
+            web.get("/ws/mktdata", self.mktdata_socket),
+            web.get("/ws/marketdata", self.mktdata_socket),
+            web.post("/balances", self.balances),
+            web.post("/deposit", self.deposit),
+            web.post("/withdraw", self.withdraw),
+        ])
+        app.on_startup.append(self._start_heartbeats)
+        app.on_cleanup.append(self._stop_tasks)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8000) -> web.AppRunner:
+        runner = web.AppRunner(self.app())
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        return runner
+
+    def ledger(self, wallet: str) -> BalanceLedger:
+        ledger = self.ledgers.get(wallet)
+        if ledger is None:
+            ledger = self.ledgers[wallet] = BalanceLedger()
+            ledger.load({ccy: {"balance": balance} for ccy, balance in self.initial_balances.items()})
+        return ledger
+
+    def spawn(self, coro) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _start_heartbeats(self, app: web.Application):
+        self.spawn(self.heartbeats())
+
+    async def _stop_tasks(self, app: web.Application):
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _accept(self, request: web.Request) -> tuple[web.WebSocketResponse, str]:
+        wallet = request.headers.get("wallet")
+        if not wallet:
+            raise web.HTTPUnauthorized(text="wallet header is required")
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        return ws, wallet
+
+    @staticmethod
+    async def send(ws: web.WebSocketResponse, frame: str):
+        if not ws.closed:
+            try:
+                await ws.send_str(frame)
+            except ConnectionError:
+                pass
+
+    async def heartbeats(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            frame = envelope("alphastarheartbeat", {"timestamp": time.time()})
+            # Like the Alphastar servers, heartbeats go to the taker and market data connections only
+            connections = [*self.takers.values(), *set().union(*self.subscribers.values())]
+            await asyncio.gather(*(self.send(ws, frame) for ws in connections))
+
+    async def publish(self, pool: Pool):
+        subscribers = self.subscribers[pool.pool_id]
+        if subscribers:
+            frame = envelope("marketdata", pool.market_data())
+            await asyncio.gather(*(self.send(ws, frame) for ws in subscribers))
+
+    async def maker_socket(self, request: web.Request) -> web.WebSocketResponse:
+        ws, wallet = await self._accept(request)
+        self.makers[wallet] = ws
+        try:
+            async for message in ws:
+                if message.type not in (WSMsgType.TEXT, WSMsgType.BINARY):
+                    continue
+                envelope_ = json.loads(message.data)
+                data = envelope_.get("data")
+                if isinstance(data, str):
+                    data = json.loads(data)
+                if envelope_.get("type") == "quote":
+                    await self.handle_quote(ws, wallet, data)
+                elif envelope_.get("type") == "makertrademessage":
+                    future = self.pending.get(data.get("trade_id"))
+                    if future is not None and not future.done():
+                        future.set_result(data)
+        finally:
+            if self.makers.get(wallet) is ws:
+                del self.makers[wallet]
+        return ws
+
+    async def handle_quote(self, ws: web.WebSocketResponse, wallet: str, data: dict[str, Any]):
+        pool = self.pools.get(data.get("pool_id"))
+        data["wallet_id"] = wallet
+        reason = pool.add_quote(data) if pool is not None else f"pool_id {data.get('pool_id')} does not match {', '.join(self.pools)}"
+        if reason is None:
+            self.stats["quotes"] += 1
+            await self.publish(pool)
+        else:
+            self.stats["quote_rejects"] += 1
+            await self.send(ws, envelope("quotereject", {
+                "sending_time": time.time(), "quote_id": data.get("quote_id"), "wallet_id": wallet,
+                "pool_id": data.get("pool_id"), "reason": reason,
+            }))
+
+    async def taker_socket(self, request: web.Request) -> web.WebSocketResponse:
+        ws, wallet = await self._accept(request)
+        self.takers[wallet] = ws
+        try:
+            async for message in ws:
+                if message.type not in (WSMsgType.TEXT, WSMsgType.BINARY):
+                    continue
+                envelope_ = json.loads(message.data)
+                if envelope_.get("type") == "quoteresponse":
+                    data = envelope_.get("data")
+                    if isinstance(data, str):
+                        data = json.loads(data)
+                    # Orders wait for the maker concurrently, the socket keeps reading
+                    self.spawn(self.handle_order(ws, wallet, data))
+        finally:
+            if self.takers.get(wallet) is ws:
+                del self.takers[wallet]
+        return ws
+
+    async def mktdata_socket(self, request: web.Request) -> web.WebSocketResponse:
+        ws, _ = await self._accept(request)
+        pool_id = request.query.get("pool_id")
+        pools = [self.pools[pool_id]] if pool_id in self.pools else list(self.pools.values())
+        for pool in pools:
+            self.subscribers[pool.pool_id].add(ws)
+            await self.send(ws, envelope("marketdata", pool.market_data()))
+        try:
+            async for _ in ws:
+                pass
+        finally:
+            for pool in pools:
+                self.subscribers[pool.pool_id].discard(ws)
+        return ws
+
+    async def handle_order(self, ws: web.WebSocketResponse, wallet: str, data: dict[str, Any]):
+        """Match a taker order, ask the maker and report the outcome to both sides."""
+        self.stats["orders"] += 1
+        taker_timestamp = data.get("sending_time", time.time())
+        response = {
+            "executed_price": "0.0", "executed_quantity": "0.0", "maker_wallet_id": "",
+            "match_timestamp": time.time(), "msg": "", "pool_id": data.get("pool_id"),
+            "price": data.get("price"), "quantity": data.get("quantity"), "quote_id": data.get("quote_resp_id"),
+            "side": data.get("side"), "status": "REJECT", "symbol": data.get("symbol"), "taker_fee": "0.0",
+            "taker_fee_ccy": "ALPHA", "taker_timestamp": taker_timestamp, "timestamp": 0.0,
+            "type": "TRADE_RESPONSE", "wallet_id": wallet,
+        }
+
+        pool = self.pools.get(data.get("pool_id"))
+        match, reason = None, f"Trade Miss: unknown pool_id {data.get('pool_id')}"
+        if pool is not None:
+            try:
+                quantity, price = to_fixed(str(data.get("quantity"))), to_fixed(str(data.get("price")))
+                match, reason = pool.match(data.get("side"), quantity, price)
+            except ValueError as e:
+                reason = f"Trade Miss: {e}"
+        maker = self.makers.get(match.quote.wallet_id) if match is not None else None
+        if match is not None and maker is None:
+            match, reason = None, "Trade Miss: maker is not connected"
+        if match is None:
+            self.stats["misses"] += 1
+            response.update(msg=reason, timestamp=time.time())
+            await self.send(ws, envelope("takertrademessage", response))
+            return
+
+        response["maker_wallet_id"] = match.quote.wallet_id
+        status, msg, executed_quantity, executed_price = await self.request_maker(maker, wallet, data, match, pool, price)
+        if status == "DONE":
+            self.ledger(wallet).apply_fill(data["side"], pool.symbol, quantity, to_fixed(executed_price))
+            self.ledger(match.quote.wallet_id).apply_fill(
+                "SELL" if data["side"] == "BUY" else "BUY", pool.symbol, quantity, to_fixed(executed_price)
+            )
+            response.update(status="ACCEPT", executed_quantity=executed_quantity, executed_price=executed_price)
+        response.update(msg=msg, timestamp=time.time())
+        await self.send(ws, envelope("takertrademessage", response))
+
+    async def request_maker(self, maker: web.WebSocketResponse, taker_wallet: str, data: dict[str, Any], match: Match,
+                            pool: Pool, price: int) -> tuple[str, str, str, str]:
+        """Send a trade REQUEST to the matched maker and confirm the outcome to it.
+
+        Returns:
+            tuple: DONE or NOT_DONE, the message, and the executed quantity and price.
+        """
+        trade_id = next(self._trade_ids)
+        quote = match.quote
+        now = time.time()
+        request = {
+            "timestamp": now, "match_timestamp": now, "wallet_id": quote.wallet_id, "pool_id": pool.pool_id,
+            "symbol": pool.symbol, "trade_id": trade_id, "taker_wallet_id": taker_wallet, "side": data["side"],
+            "requested_quantity": str(data["quantity"]), "requested_price": str(data["price"]),
+            "quote_price": match.price, "quote_quantity": pool.sizes[match.rung], "quote_id": quote.quote_id,
+            "quote_created_at": quote.created_at, "valid_until_time": quote.valid_until_time, "maker_fee": "0.0",
+            "maker_fee_ccy": "ALPHA", "executed_quantity": "0.0", "executed_price": "0.0", "status": "REQUEST",
+            "msg": "",
+        }
+        future = self.pending[trade_id] = asyncio.get_running_loop().create_future()
+        try:
+            await self.send(maker, envelope("makertrademessage", request))
+            # The window runs from the REQUEST timestamp
+            answer = await asyncio.wait_for(future, self.response_window - (time.time() - now))
+        except asyncio.TimeoutError:
+            answer = None
+        finally:
+            del self.pending[trade_id]
+
+        status, msg = "NOT_DONE", ""
+        executed_quantity = executed_price = "0.0"
+        answered_quantity = answered_price = None
+        if answer is not None and answer.get("status") == "ACCEPT":
+            try:
+                answered_quantity = to_fixed(str(answer.get("executed_quantity")))
+                answered_price = to_fixed(str(answer.get("executed_price")))
+            except ValueError:
+                # A missing or malformed number; the trade is not done and the taker still gets a reject
+                pass
+        if answer is None:
+            self.stats["timeouts"] += 1
+            msg = "Maker did not respond within the acceptance window"
+        elif answer.get("status") != "ACCEPT":
+            msg = "Maker rejected the trade"
+        elif answered_price is None:
+            msg = "Maker accepted with a missing or malformed executed quantity or price"
+        elif answered_quantity != to_fixed(request["requested_quantity"]):
+            msg = "Executed quantity does not match the requested quantity"
+        elif not Pool.improves(data["side"], answered_price, price):
+            msg = "Executed price is worse than the requested price"
+        else:
+            status, msg = "DONE", "Trade Done"
+            executed_quantity, executed_price = request["requested_quantity"], str(answer["executed_price"])
+        self.stats["done" if status == "DONE" else "not_done"] += 1
+
+        request.update(
+            timestamp=time.time(), status=status, msg=msg,
+            executed_quantity=executed_quantity, executed_price=executed_price,
+        )
+        await self.send(maker, envelope("makertrademessage", request))
+        return status, msg, executed_quantity, executed_price
+
+    async def balances(self, request: web.Request) -> web.Response:
+        """POST /balances stub, {"account": wallet} -> {"balances": {token: {balance, in_flight, available}}}."""
+        body = await request.json(loads=json.loads)
+        ledger = self.ledger(body.get("account", ""))
+        return web.json_response(
+            {"balances": {ccy: balance.as_dict() for ccy, balance in ledger.tokens.items()}},
+            dumps=lambda value: json.dumps(value).decode(),
+        )
+
+    async def deposit(self, request: web.Request) -> web.Response:
+        """POST /deposit stub, {"account", "amount", "token"}: credits the wallet's balance at once."""
+        body = await request.json(loads=json.loads)
+        ledger = self.ledger(body.get("account", ""))
+        ledger.token(body["token"]).balance += to_fixed(body["amount"])
+        self.stats["deposits"] += 1
+        return web.json_response({"status": "ok", **body}, dumps=lambda value: json.dumps(value).decode())
+
+    async def withdraw(self, request: web.Request) -> web.Response:
+        """POST /withdraw stub, {"account", "amount", "currency"}: debits the wallet's available balance."""
+        body = await request.json(loads=json.loads)
+        token = self.ledger(body.get("account", "")).token(body["currency"])
+        amount = to_fixed(body["amount"])
+        if amount > token.available:
+            raise web.HTTPBadRequest(text=f"insufficient available {body['currency']} balance")
+        token.balance -= amount
+        self.stats["withdrawals"] += 1
+        return web.json_response({"status": "ok", **body}, dumps=lambda value: json.dumps(value).decode())
@@ -0,0 +1,163 @@
+import itertools
+import time
+from typing import Any, Callable, NamedTuple
+
+from examples.fixedpoint import rung_index, to_fixed
+
+
+class PoolQuote(NamedTuple):
+    """A maker's live quote in a pool, prices per rung as fixed-point integers (0 for no liquidity).
+    """
+    quote_id: str
+    wallet_id: str
+    bids: list[int]
+    offers: list[int]
+    bid_px: list[str]
+    offer_px: list[str]
+    created_at: float
+    expires_at: float
+    valid_until_time: float
+    # Arrival order, breaks ties between quotes created in the same clock tick
+    priority: int
+
+
+class Match(NamedTuple):
+    """The quote a taker order was matched with.
+    """
+    quote: PoolQuote
+    rung: int
+    price: str
+
+
+class Pool:
+    """Price/time-priority matching for a single pool.
+
+    Makers stream full ladders of indicative prices, one per rung of liquidity; each new quote of a
+    maker replaces the previous one. A taker order is fill-or-kill: its quantity is rounded up to a
+    rung, and it matches the best price for that rung across all live quotes -- the earliest quote
+    on a tie -- if that price is at or better than the order's price. There is no sweeping of
+    liquidity; the whole order goes to one maker.
+
+    Usage:
+        pool = Pool("DCN-ALPHA_common", "DCN-ALPHA", ["1", "2", "3", "5", "10", "20"])
+        reason = pool.add_quote(quote_data)
+        match, reason = pool.match("BUY", to_fixed("0.75"), to_fixed("1.02"))
+    """
+
+    def __init__(self, pool_id: str, symbol: str, sizes: list[str], max_valid_until_time: float = 5.0,
+                 clock: Callable[[], float] = time.time):
+        """
+        Args:
+            pool_id (str): The pool id, eg. "DCN-ALPHA_common".
+            symbol (str): The traded pair, eg. "DCN-ALPHA".
+            sizes (list[str]): Ascending rung sizes in CCY0 terms.
+            max_valid_until_time (float): Longest quote validity the pool accepts, in seconds.
+            clock (Callable): Current unix time in seconds.
+        """
+        self.pool_id = pool_id
+        self.symbol = symbol
+        self.sizes = sizes
+        self.fixed_sizes = [to_fixed(size) for size in sizes]
+        self.max_valid_until_time = max_valid_until_time
+        self.clock = clock
+        self.quotes: dict[str, PoolQuote] = {}
+        self.sequence_number = 0
+        self._priority = itertools.count()
+
+    def add_quote(self, data: dict[str, Any]) -> str | None:
+        """Validate a maker quote and make it the maker's live quote.
+
+        Returns:
+            str: The reject reason, or None if the quote was accepted.
+        """
+        rungs = len(self.sizes)
+        if data.get("pool_id") != self.pool_id:
+            return f"pool_id {data.get('pool_id')} does not match {self.pool_id}"
+        bid_px, offer_px = data.get("bid_px") or [], data.get("offer_px") or []
+        if len(bid_px) != rungs:
+            return f"length of bid_px {len(bid_px)} does not match {rungs}"
+        if len(offer_px) != rungs:
+            return f"length of offer_px {len(offer_px)} does not match {rungs}"
+        valid_until_time = data.get("valid_until_time", 0)
+        if valid_until_time > self.max_valid_until_time:
+            return f"valid_until_time {valid_until_time} is greater than {self.max_valid_until_time}"
+        try:
+            bids, offers = [to_fixed(price) for price in bid_px], [to_fixed(price) for price in offer_px]
+        except ValueError as e:
+            return str(e)
+
+        now = self.clock()
+        self.quotes[data["wallet_id"]] = PoolQuote(
+            data.get("quote_id"), data["wallet_id"], bids, offers, bid_px, offer_px,
+            now, data.get("sending_time", now) + valid_until_time, valid_until_time, next(self._priority),
+        )
+        return None
+
+    def live_quotes(self) -> list[PoolQuote]:
+        """Quotes that have not expired, dropping the expired ones."""
+        now = self.clock()
+        expired = [wallet for wallet, quote in self.quotes.items() if quote.expires_at < now]
+        for wallet in expired:
+            del self.quotes[wallet]
+        return list(self.quotes.values())
+
+    def best(self, side: str, rung: int, quotes: list[PoolQuote] = None) -> Match | None:
+        """Best quote a taker on `side` can trade with at `rung`, by price then time."""
+        best = None
+        for quote in quotes if quotes is not None else self.live_quotes():
+            if side == "BUY":
+                price = quote.offers[rung]
+                if price and (best is None or (price, quote.priority) < (best[0], best[1].priority)):
+                    best = (price, quote)
+            else:
+                price = quote.bids[rung]
+                if price and (best is None or (-price, quote.priority) < (-best[0], best[1].priority)):
+                    best = (price, quote)
+        if best is None:
+            return None
+        quote = best[1]
+        return Match(quote, rung, (quote.offer_px if side == "BUY" else quote.bid_px)[rung])
+
+    def match(self, side: str, quantity: int, price: int) -> tuple[Match | None, str]:
+        """Match a fill-or-kill taker order of `quantity` at `price` or better.
+
+        Returns:
+            tuple: The match, or None and the reason the order missed.
+        """
+        try:
+            rung = rung_index(self.fixed_sizes, quantity)
+        except ValueError as e:
+            return None, f"Trade Miss: {e}"
+        best = self.best(side, rung)
+        if best is None:
+            return None, "Trade Miss: No liquidity in the pool"
+        best_price = to_fixed(best.price)
+        if side == "BUY" and price < best_price:
+            return None, f"Trade Miss: Price BUY is less than the best offer price {best.price}"
+        if side == "SELL" and price > best_price:
+            return None, f"Trade Miss: Price SELL is greater than the best bid price {best.price}"
+        return best, ""
+
+    def market_data(self) -> dict[str, Any]:
+        """The best bid and offer per rung across live quotes, as the payload of the next marketdata message."""
+        quotes = self.live_quotes()
+        self.sequence_number += 1
+        bids, offers = [], []
+        for rung in range(len(self.sizes)):
+            bid, offer = self.best("SELL", rung, quotes), self.best("BUY", rung, quotes)
+            bids.append(bid.price if bid else "0.0")
+            offers.append(offer.price if offer else "0.0")
+        return {
+            "timestamp": self.clock(),
+            "pool_id": self.pool_id,
+            "sequence_number": self.sequence_number,
+            "symbol": self.symbol,
+            "bids": bids,
+            "offers": offers,
+            "sizes": [size if bid != "0.0" or offer != "0.0" else "0.0" for size, bid, offer in zip(self.sizes, bids, offers)],
+        }
+
+    @staticmethod
+    def improves(side: str, executed_price: int, requested_price: int) -> bool:
+        """Whether an executed price is at or better than the taker's requested price."""
+        return executed_price <= requested_price if side == "BUY" else executed_price >= requested_price
@@ -0,0 +1,150 @@
+import asyncio
+from typing import Any
+
+from aiohttp import web
+from eth_abi import abi
+from eth_account import Account
+from eth_utils import keccak
+import orjson as json
+import rlp
+
+# ERC20 approve(spender, amount) and allowance(owner, spender)
+_APPROVE = "0x095ea7b3"
+_ALLOWANCE = "0xdd62ed3e"
+
+
+class StandInRpc:
+    """Local stand-in for the chain's JSON-RPC endpoint, for testing `examples.transactions`.
+
+    Answers single and batch requests for eth_getTransactionCount, eth_sendRawTransaction,
+    eth_getTransactionReceipt and eth_call. Sent transactions are checked for their sender's next
+    nonce and "mined" into a block every `block_time` seconds, after which their receipts are
+    available. Every transaction succeeds; the only calls executed are ERC20 `approve`, whose
+    allowance `eth_call` of `allowance` returns once mined.
+
+    Usage:
+        rpc = StandInRpc(block_time=0.25)
+        runner = await rpc.start("127.0.0.1", 8545)
+        ...
+        await runner.cleanup()
+    """
+
+    def __init__(self, block_time: float = 1.0, latency: float = 0.0):
+        """
+        Args:
+            block_time (float): Seconds between blocks.
+            latency (float): Seconds added to every HTTP request, to stand in for a remote node.
+        """
+        self.block_time = block_time
+        self.latency = latency
+        self.block_number = 0
+        # address -> mined and pending transaction counts
+        self.mined: dict[str, int] = {}
+        self.pending: dict[str, int] = {}
+        self.mempool: list[tuple[str, str, dict[str, Any]]] = []
+        # (owner, token, spender) -> allowance in wei, from mined approve calls
+        self.allowances: dict[tuple[str, str, str], int] = {}
+        self.receipts: dict[str, dict[str, Any]] = {}
+        self._miner: asyncio.Task = None
+        self.stats = {"requests": 0, "calls": 0, "transactions": 0, "nonce_errors": 0}
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.add_routes([web.post("/", self.handle)])
+        app.on_startup.append(self._start_miner)
+        app.on_cleanup.append(self._stop_miner)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8545) -> web.AppRunner:
+        runner = web.AppRunner(self.app())
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        return runner
+
+    async def _start_miner(self, app: web.Application):
+        self._miner = asyncio.create_task(self.mine())
+
+    async def _stop_miner(self, app: web.Application):
+        self._miner.cancel()
+        await asyncio.gather(self._miner, return_exceptions=True)
+
+    async def mine(self):
+        while True:
+            await asyncio.sleep(self.block_time)
+            self.block_number += 1
+            mempool, self.mempool = self.mempool, []
+            for index, (tx_hash, sender, call) in enumerate(mempool):
+                self.mined[sender] = self.mined.get(sender, 0) + 1
+                if call["data"].startswith(_APPROVE):
+                    spender, amount = abi.decode(["address", "uint256"], bytes.fromhex(call["data"][len(_APPROVE):]))
+                    self.allowances[(sender.lower(), call["to"].lower(), spender.lower())] = amount
+                self.receipts[tx_hash] = {
+                    "transactionHash": tx_hash,
+                    "transactionIndex": hex(index),
+                    "blockNumber": hex(self.block_number),
+                    "from": sender,
+                    "status": "0x1",
+                }
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.stats["requests"] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        body = json.loads(await request.read())
+        if isinstance(body, list):
+            replies = [self.reply(call) for call in body]
+        else:
+            replies = self.reply(body)
+        return web.Response(body=json.dumps(replies), content_type="application/json")
+
+    def reply(self, call: dict[str, Any]) -> dict[str, Any]:
+        self.stats["calls"] += 1
+        method = getattr(self, call.get("method", ""), None)
+        try:
+            if method is None or not call["method"].startswith("eth_"):
+                raise RpcError(-32601, "method not found")
+            return {"jsonrpc": "2.0", "id": call.get("id"), "result": method(*call.get("params", []))}
+        except RpcError as e:
+            return {"jsonrpc": "2.0", "id": call.get("id"), "error": {"code": e.code, "message": e.message}}
+
+    def eth_getTransactionCount(self, address: str, block: str = "latest") -> str:
+        counts = self.pending if block == "pending" else self.mined
+        return hex(counts.get(address, self.mined.get(address, 0)))
+
+    def eth_sendRawTransaction(self, raw: str) -> str:
+        data = bytes.fromhex(raw.removeprefix("0x"))
+        try:
+            sender = Account.recover_transaction(data)
+            # Legacy transactions: [nonce, gas price, gas, to, value, data, v, r, s]
+            fields = rlp.decode(data)
+            nonce = int.from_bytes(fields[0], "big")
+            call = {"to": "0x" + bytes(fields[3]).hex(), "data": "0x" + bytes(fields[5]).hex()}
+        except Exception as e:
+            raise RpcError(-32602, f"invalid transaction: {e}")
+        expected = self.pending.get(sender, self.mined.get(sender, 0))
+        if nonce != expected:
+            self.stats["nonce_errors"] += 1
+            raise RpcError(-32000, f"nonce too {'low' if nonce < expected else 'high'}: expected {expected}, got {nonce}")
+        tx_hash = "0x" + keccak(data).hex()
+        self.pending[sender] = nonce + 1
+        self.mempool.append((tx_hash, sender, call))
+        self.stats["transactions"] += 1
+        return tx_hash
+
+    def eth_getTransactionReceipt(self, tx_hash: str) -> dict[str, Any] | None:
+        return self.receipts.get(tx_hash)
+
+    def eth_call(self, call: dict[str, Any], block: str = "latest") -> str:
+        data = call.get("data", "0x")
+        if not data.startswith(_ALLOWANCE):
+            raise RpcError(-32000, "execution reverted: only allowance() is supported")
+        owner, spender = abi.decode(["address", "address"], bytes.fromhex(data[len(_ALLOWANCE):]))
+        allowance = self.allowances.get((owner.lower(), call["to"].lower(), spender.lower()), 0)
+        return "0x" + abi.encode(["uint256"], [allowance]).hex()
+
+
+class RpcError(Exception):
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+        self.message = message
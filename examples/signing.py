@@ -1,5 +1,8 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 import os
 from time import time
+from typing import Callable
 
 from dotenv import load_dotenv
 from eth_account.messages import encode_defunct
@@ -24,19 +27,134 @@ def get_account() -> Account:
     return account
 
 
-def sign_auth_headers(account=None):
+def sign_auth_headers(account=None, timestamp: int = None):
     """
     Generates the signed auth headers required to authenticate with the
     AlphaStar API. The headers include the wallet address, the current
     timestamp (Unix time, in seconds, as an int) and a signature of the timestamp.
+    Pass `timestamp` to sign another second than the current one.
     """
     if account is None:
         account = get_account()
     
     # Sign current timestamp in seconds
-    timestamp = int(time())
+    if timestamp is None:
+        timestamp = int(time())
     data_encoded = encode_defunct(text=str(timestamp))
     signed_message = account.sign_message(data_encoded)
 
     # Return headers in correct format
     return {"wallet": account.address, "timestamp": str(timestamp), "signature": signed_message.signature.hex()}
+
+
+class HeaderSigner:
+    """Hands out signed auth headers from a cache instead of signing on every call.
+
+    The headers of an account are signed once per validity window -- by default once per timestamp
+    second, exactly what `sign_auth_headers` would produce during that second -- and reused until
+    the window ends. While `run()` is running, the headers of the next window are signed in a
+    background thread `lead` seconds before it starts, so callers get ready-made headers without
+    any ECDSA signing on their path. Without `run()` the headers are still signed at most once per
+    window, on the first call in it.
+
+    A signer is a drop-in `header_factory` for `AsyncRestClient`.
+
+    Usage:
+        signer = HeaderSigner([maker_account, taker_account])
+        asyncio.create_task(signer.run())
+        headers = signer.headers(taker_account)
+        rest = AsyncRestClient(taker_account, header_factory=signer)
+    """
+
+    def __init__(self, accounts: list = None, validity: int = 1, lead: float = 0.25,
+                 clock: Callable[[], float] = time):
+        """
+        Args:
+            accounts (list, optional): Accounts to sign for; others are added on their first call.
+            validity (int): Seconds one signed timestamp is used for. Only raise it as far as the
+                server accepts timestamps in the past.
+            lead (float): Seconds before a window starts that its headers are signed.
+            clock (Callable): Current unix time in seconds.
+        """
+        if validity < 1:
+            raise ValueError(f"validity must be at least one second, got {validity}")
+        self.validity = int(validity)
+        self.lead = lead
+        self.clock = clock
+        self.accounts = {}
+        # (address, window start) -> headers, for the current and the pre-signed windows
+        self._signed: dict[tuple[str, int], dict[str, str]] = {}
+        self._executor = None
+        self.signed = 0
+        self.hits = 0
+        self.misses = 0
+        for account in accounts or []:
+            self.add_account(account)
+
+    def add_account(self, account):
+        self.accounts[account.address] = account
+
+    def window(self, now: float = None) -> int:
+        """Start of the validity window containing `now`, the timestamp signed for it."""
+        now = self.clock() if now is None else now
+        return int(now) // self.validity * self.validity
+
+    def headers(self, account=None) -> dict[str, str]:
+        """Signed auth headers of `account` for the current window.
+
+        The returned dict is shared between callers and must not be modified.
+        """
+        if account is None:
+            account = get_account()
+        window = self.window()
+        key = (account.address, window)
+        headers = self._signed.get(key)
+        if headers is not None:
+            self.hits += 1
+            return headers
+        # Not pre-signed: a new account, the first window, or `run()` is not running
+        self.misses += 1
+        if account.address not in self.accounts:
+            self.add_account(account)
+        self.prune(window)
+        headers = self._signed[key] = self.sign(account, window)
+        return headers
+
+    def __call__(self, account=None) -> dict[str, str]:
+        return self.headers(account)
+
+    def sign(self, account, timestamp: int) -> dict[str, str]:
+        self.signed += 1
+        return sign_auth_headers(account=account, timestamp=timestamp)
+
+    def presign(self, window: int):
+        """Sign the headers of every account for `window`."""
+        for address, account in list(self.accounts.items()):
+            self._signed[address, window] = self.sign(account, window)
+
+    def prune(self, window: int):
+        """Drop the headers of the windows before `window`."""
+        for key in [key for key in self._signed if key[1] < window]:
+            del self._signed[key]
+
+    async def run(self):
+        """Pre-sign the headers of every account ahead of each window, until cancelled."""
+        loop = asyncio.get_running_loop()
+        self._executor = self._executor or ThreadPoolExecutor(1, thread_name_prefix="header-signer")
+        try:
+            # The current window first, so no caller has to sign after startup
+            await loop.run_in_executor(self._executor, self.presign, self.window())
+            while True:
+                window = self.window() + self.validity
+                await loop.run_in_executor(self._executor, self.presign, window)
+                # Windows are kept until they have passed, whether or not anyone asked for them
+                self.prune(self.window())
+                # Sleep until `lead` before the window after the one just signed
+                await asyncio.sleep(max(0.0, window + self.validity - self.lead - self.clock()))
+        finally:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def stats(self) -> dict[str, int]:
+        """Headers handed out from the cache, signed on the caller's path, and signatures in total."""
+        return {"hits": self.hits, "misses": self.misses, "signed": self.signed}
@@ -0,0 +1,506 @@
+"""Concurrent on-chain transactions: local nonces, batched JSON-RPC and a shared receipt poller.
+
+`examples/approve.py` sends one transaction at a time: it asks the node for the nonce, sends the
+raw transaction, then polls for its receipt once a second. `TransactionPipeline` instead
+    - allocates nonces locally per account, after reading the pending count from the node once,
+    - signs transactions on a thread pool, submitting each account's in nonce order and the
+      accounts concurrently,
+    - sends the JSON-RPC calls made within a few milliseconds of each other as one batch request
+      over a pooled keep-alive connection (`JsonRpcClient`),
+    - checks the receipts of every pending transaction with a single batch call per poll
+      interval (`ReceiptPoller`), giving up after a deadline.
+
+Usage:
+    async with TransactionPipeline() as pipeline:
+        results = await asyncio.gather(*(
+            pipeline.submit(account, {"to": token, "data": data}) for account in accounts
+        ))
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import heapq
+import itertools
+import time
+from typing import Any, NamedTuple
+
+import aiohttp
+import orjson as json
+
+from examples.constants import ARBITRUM_SEPOLIA_CHAIN_ID, RPC_URL
+
+
+class JsonRpcError(Exception):
+    """An error object returned by the node for a single call."""
+
+    def __init__(self, error: dict[str, Any]):
+        super().__init__(error.get("message", error))
+        self.code = error.get("code")
+        self.error = error
+
+
+class JsonRpcClient:
+    """Non-blocking JSON-RPC client that batches the calls made close together into one request.
+
+    Every `call` is queued; the calls queued within `batch_window` seconds of the first, up to
+    `max_batch`, go to the node as a single JSON-RPC batch and each caller gets its own result.
+    Requests share one keep-alive `aiohttp.ClientSession`.
+
+    Usage:
+        async with JsonRpcClient(RPC_URL) as rpc:
+            count = await rpc.call("eth_getTransactionCount", [address, "pending"])
+    """
+
+    def __init__(self, url: str = RPC_URL, timeout: float = 10.0, max_connections: int = 4,
+                 max_batch: int = 100, batch_window: float = 0.002):
+        """
+        Args:
+            url (str): The node's JSON-RPC endpoint.
+            timeout (float): Total timeout of one batch request in seconds.
+            max_connections (int): Size of the keep-alive connection pool.
+            max_batch (int): Most calls per batch request.
+            batch_window (float): Seconds a batch waits for more calls after its first one.
+        """
+        self.url = url
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.max_connections = max_connections
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self._ids = itertools.count(1)
+        self._pending: list[tuple[dict[str, Any], asyncio.Future]] = []
+        self._flush_handle = None
+        self._tasks: set[asyncio.Task] = set()
+        self._session = None
+        self.requests = 0
+        self.calls = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections),
+                timeout=self.timeout,
+            )
+        return self._session
+
+    async def close(self):
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def call(self, method: str, params: list = None) -> Any:
+        """Queue a call for the next batch and return its result.
+
+        Raises:
+            JsonRpcError: If the node returns an error for this call.
+            aiohttp.ClientError: If the batch request fails.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append(({"jsonrpc": "2.0", "id": next(self._ids), "method": method, "params": params or []}, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(self.batch_window, self._flush)
+        return await future
+
+    async def batch(self, calls: list[tuple[str, list]]) -> list[Any]:
+        """Results of several calls, sent together; a failed call's entry is its `JsonRpcError`."""
+        return await asyncio.gather(*(self.call(method, params) for method, params in calls), return_exceptions=True)
+
+    async def ordered_batch(self, calls: list[tuple[str, list]]) -> list[Any]:
+        """Like `batch`, but the calls go straight out as one request, in order.
+
+        Calls queued by `call` may be split over concurrent requests; these are not, so the node
+        sees them in the order given, eg. transactions of one account by nonce.
+        """
+        loop = asyncio.get_running_loop()
+        chunk = [
+            ({"jsonrpc": "2.0", "id": next(self._ids), "method": method, "params": params}, loop.create_future())
+            for method, params in calls
+        ]
+        await self._send(chunk)
+        return await asyncio.gather(*(future for _, future in chunk), return_exceptions=True)
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        pending, self._pending = self._pending, []
+        while pending:
+            chunk, pending = pending[:self.max_batch], pending[self.max_batch:]
+            task = asyncio.create_task(self._send(chunk))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, chunk: list[tuple[dict[str, Any], asyncio.Future]]):
+        futures = {request["id"]: future for request, future in chunk}
+        try:
+            self.requests += 1
+            self.calls += len(chunk)
+            body = json.dumps([request for request, _ in chunk])
+            async with self.session.post(self.url, data=body, headers={"Content-Type": "application/json"}) as response:
+                response.raise_for_status()
+                replies = json.loads(await response.read())
+            # A node may answer a batch with a single error object
+            if isinstance(replies, dict):
+                replies = [dict(replies, id=request_id) for request_id in futures]
+            for reply in replies:
+                future = futures.pop(reply.get("id"), None)
+                if future is None or future.done():
+                    continue
+                if "error" in reply:
+                    future.set_exception(JsonRpcError(reply["error"]))
+                else:
+                    future.set_result(reply.get("result"))
+            for future in futures.values():
+                if not future.done():
+                    future.set_exception(JsonRpcError({"message": "no reply in batch response"}))
+        except Exception as e:
+            for future in futures.values():
+                if not future.done():
+                    future.set_exception(e)
+
+
+class ReceiptTimeout(TimeoutError):
+    """No receipt for a transaction within the deadline: it may have been dropped, or be stuck
+    behind a lower nonce that never made it to the node."""
+
+    def __init__(self, tx_hash: str, timeout: float):
+        super().__init__(f"no receipt for {tx_hash} within {timeout}s")
+        self.tx_hash = tx_hash
+
+
+class AccountNonces:
+    """Nonce state of one account, see `NonceManager`.
+    """
+    __slots__ = ("next", "submit_next", "ready", "skipped", "free", "unsubmitted", "stale", "submitting", "lock")
+
+    def __init__(self):
+        # Next new nonce, None until read from the node
+        self.next: int = None
+        # Lowest nonce not yet submitted, in order
+        self.submit_next: int = None
+        # nonce -> signed raw transaction and the future of its hash, waiting for its turn
+        self.ready: dict[int, tuple[str, asyncio.Future]] = {}
+        # Nonces given up on before submission, which the submit order steps over
+        self.skipped: set[int] = set()
+        # Nonces that left a gap, handed out again before new ones
+        self.free: list[int] = []
+        self.unsubmitted = 0
+        # The local count may be off, read it again once nothing is left unsubmitted
+        self.stale = False
+        self.submitting = False
+        self.lock = asyncio.Lock()
+
+
+class NonceManager:
+    """Hands out consecutive nonces per account and submits each account's transactions in nonce order.
+
+    The first allocation for an account reads its pending transaction count; later allocations
+    count up locally. Transactions may be signed in any order, but `submit` holds each one back
+    until every lower nonce of the account has gone to the node, and sends the consecutive ones
+    that are ready as one ordered batch request. A nonce that was given up on or rejected is handed
+    out again before new ones. After a nonce error or a missing receipt, the count is read again
+    from the node once none of the account's nonces are waiting to be submitted.
+    """
+
+    def __init__(self, rpc: JsonRpcClient):
+        self.rpc = rpc
+        self.accounts: dict[str, AccountNonces] = {}
+
+    def account(self, address: str) -> AccountNonces:
+        state = self.accounts.get(address)
+        if state is None:
+            state = self.accounts[address] = AccountNonces()
+        return state
+
+    async def allocate(self, address: str) -> int:
+        state = self.account(address)
+        if state.next is None or (state.stale and not state.unsubmitted):
+            async with state.lock:
+                # Allocations that waited for the read count on from its result
+                if state.next is None or (state.stale and not state.unsubmitted):
+                    count = int(await self.rpc.call("eth_getTransactionCount", [address, "pending"]), 16)
+                    state.next = state.submit_next = count
+                    state.free.clear()
+                    state.skipped.clear()
+                    state.stale = False
+        state.unsubmitted += 1
+        if state.free:
+            nonce = heapq.heappop(state.free)
+            state.skipped.discard(nonce)
+            return nonce
+        nonce = state.next
+        state.next += 1
+        return nonce
+
+    async def submit(self, address: str, nonce: int, raw: str) -> str:
+        """Send a signed transaction once every lower nonce of the account has been sent.
+
+        Returns:
+            str: The transaction hash returned by the node.
+
+        Raises:
+            JsonRpcError: If the node rejects the transaction.
+        """
+        state = self.account(address)
+        future = asyncio.get_running_loop().create_future()
+        state.ready[nonce] = (raw, future)
+        if not state.submitting:
+            state.submitting = True
+            asyncio.create_task(self._submit_ready(address, state))
+        return await future
+
+    async def _submit_ready(self, address: str, state: AccountNonces):
+        try:
+            while True:
+                # Nonces handed out again go first, then the consecutive run from the submit point
+                batch = sorted(nonce for nonce in state.ready if nonce < state.submit_next)
+                nonce = state.submit_next
+                while len(batch) < self.rpc.max_batch:
+                    if nonce in state.ready:
+                        batch.append(nonce)
+                    elif nonce not in state.skipped:
+                        break
+                    nonce += 1
+                state.submit_next = nonce
+                if not batch:
+                    return
+                entries = [state.ready.pop(nonce) for nonce in batch]
+                state.unsubmitted -= len(entries)
+                results = await self.rpc.ordered_batch([("eth_sendRawTransaction", [raw]) for raw, _ in entries])
+                for (_, future), result in zip(entries, results):
+                    if future.done():
+                        continue
+                    if isinstance(result, BaseException):
+                        future.set_exception(result)
+                    else:
+                        future.set_result(result)
+        finally:
+            state.submitting = False
+
+    def abandon(self, address: str, nonce: int):
+        """Give up on an allocated nonce before submitting it, eg. when signing failed."""
+        state = self.account(address)
+        state.unsubmitted -= 1
+        self._release(state, nonce)
+        if nonce >= state.submit_next:
+            # Later nonces must not wait for it
+            state.skipped.add(nonce)
+            if state.ready and not state.submitting:
+                state.submitting = True
+                asyncio.create_task(self._submit_ready(address, state))
+
+    def reject(self, address: str, nonce: int, stale: bool = False):
+        """A submitted transaction was rejected: its nonce is free again.
+
+        Args:
+            stale (bool): The rejection was a nonce error, so the local count is off.
+        """
+        state = self.account(address)
+        self._release(state, nonce)
+        if stale:
+            state.stale = True
+
+    def resync(self, address: str):
+        """Read the count of `address` from the node again, once none of its nonces await submission."""
+        self.account(address).stale = True
+
+    @staticmethod
+    def _release(state: AccountNonces, nonce: int):
+        if nonce not in state.free:
+            heapq.heappush(state.free, nonce)
+
+
+class ReceiptPoller:
+    """Waits for the receipts of any number of transactions with one batch call per interval.
+
+    Usage:
+        receipt = await poller.wait(tx_hash, timeout=120)
+    """
+
+    def __init__(self, rpc: JsonRpcClient, interval: float = 0.5):
+        """
+        Args:
+            rpc (JsonRpcClient): Client the receipt calls are batched on.
+            interval (float): Seconds between polls of the pending transactions.
+        """
+        self.rpc = rpc
+        self.interval = interval
+        self._waiting: dict[str, asyncio.Future] = {}
+        self._task: asyncio.Task = None
+        self.polls = 0
+        self.timeouts = 0
+
+    async def wait(self, tx_hash: str, timeout: float = None) -> dict[str, Any]:
+        """The receipt of `tx_hash`.
+
+        Raises:
+            ReceiptTimeout: If there is no receipt after `timeout` seconds.
+        """
+        future = self._waiting.get(tx_hash)
+        if future is None:
+            future = self._waiting[tx_hash] = asyncio.get_running_loop().create_future()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            if self._waiting.get(tx_hash) is future:
+                del self._waiting[tx_hash]
+            future.cancel()
+            raise ReceiptTimeout(tx_hash, timeout) from None
+
+    async def run(self):
+        """Poll until no transaction is waiting."""
+        while self._waiting:
+            await asyncio.sleep(self.interval)
+            hashes = list(self._waiting)
+            self.polls += 1
+            try:
+                receipts = await self.rpc.batch([("eth_getTransactionReceipt", [tx_hash]) for tx_hash in hashes])
+            except Exception:
+                continue
+            for tx_hash, receipt in zip(hashes, receipts):
+                # Errors are retried on the next poll, like a receipt that is not there yet
+                if receipt is None or isinstance(receipt, Exception):
+                    continue
+                future = self._waiting.pop(tx_hash)
+                if not future.done():
+                    future.set_result(receipt)
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        for future in self._waiting.values():
+            future.cancel()
+        self._waiting.clear()
+
+
+class TransactionResult(NamedTuple):
+    """Outcome of a transaction sent through a `TransactionPipeline`.
+    """
+    address: str
+    nonce: int
+    tx_hash: str
+    success: bool
+    receipt: dict[str, Any]
+    # Seconds from `submit` to the node accepting the transaction, and to its receipt
+    submit_latency: float
+    confirm_latency: float
+
+
+class TransactionPipeline:
+    """Signs, submits and confirms transactions of many accounts concurrently.
+
+    Usage:
+        async with TransactionPipeline() as pipeline:
+            result = await pipeline.submit(account, {"to": token_address, "data": data})
+    """
+
+    def __init__(self, rpc: JsonRpcClient = None, chain_id: int = ARBITRUM_SEPOLIA_CHAIN_ID, gas: int = 2_000_000,
+                 gas_price: int = 3_000_000_000, poll_interval: float = 0.5, signing_workers: int = 4,
+                 max_in_flight: int = 256, nonce_retries: int = 2, receipt_timeout: float = 120.0):
+        """
+        Args:
+            rpc (JsonRpcClient, optional): The node client, for `RPC_URL` by default.
+            chain_id (int): Chain the transactions are signed for.
+            gas (int): Gas limit of transactions that do not set one.
+            gas_price (int): Gas price in wei of transactions that do not set one.
+            poll_interval (float): Seconds between receipt polls.
+            signing_workers (int): Threads signing transactions.
+            max_in_flight (int): Most transactions between signing and receipt at once.
+            nonce_retries (int): Resubmissions with a fresh nonce after the node rejects one.
+            receipt_timeout (float): Seconds to wait for a receipt before giving up on a transaction.
+        """
+        self.rpc = rpc or JsonRpcClient()
+        self.chain_id = chain_id
+        self.gas = gas
+        self.gas_price = gas_price
+        self.nonces = NonceManager(self.rpc)
+        self.receipts = ReceiptPoller(self.rpc, poll_interval)
+        self.nonce_retries = nonce_retries
+        self.receipt_timeout = receipt_timeout
+        self._executor = ThreadPoolExecutor(max_workers=signing_workers, thread_name_prefix="tx-signer")
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        await self.receipts.close()
+        await self.rpc.close()
+        self._executor.shutdown(wait=False)
+
+    def transaction(self, fields: dict[str, Any], nonce: int) -> dict[str, Any]:
+        """The full transaction of `fields`, with the defaults of the pipeline filled in."""
+        transaction = {"gas": self.gas, "gasPrice": self.gas_price, "value": 0, "chainId": self.chain_id, "data": "0x"}
+        transaction.update(fields)
+        transaction["nonce"] = nonce
+        return transaction
+
+    async def send(self, account, fields: dict[str, Any]) -> tuple[int, str]:
+        """Sign and submit a transaction with the next nonce of `account`.
+
+        Returns:
+            tuple: The nonce and the transaction hash.
+        """
+        loop = asyncio.get_running_loop()
+        address = account.address
+        for attempt in range(self.nonce_retries + 1):
+            nonce = await self.nonces.allocate(address)
+            try:
+                signed = await loop.run_in_executor(self._executor, account.sign_transaction, self.transaction(fields, nonce))
+            except BaseException:
+                self.nonces.abandon(address, nonce)
+                raise
+            try:
+                # Signed concurrently, submitted in nonce order
+                await self.nonces.submit(address, nonce, "0x" + bytes(signed.raw_transaction).hex())
+            except JsonRpcError as e:
+                nonce_error = "nonce" in str(e).lower()
+                # The nonce is free again; after a nonce error the local count is read again too
+                self.nonces.reject(address, nonce, stale=nonce_error)
+                if not nonce_error or attempt == self.nonce_retries:
+                    raise
+                continue
+            return nonce, "0x" + bytes(signed.hash).hex()
+
+    async def submit(self, account, fields: dict[str, Any]) -> TransactionResult:
+        """Send a transaction and wait for its receipt.
+
+        Args:
+            account: The web3 `Account` signing the transaction.
+            fields (dict): Transaction fields, at least "to"; gas, gas price, value and chain id
+                default to the pipeline's, the nonce is allocated.
+
+        Raises:
+            JsonRpcError: If the node rejects the transaction.
+            ReceiptTimeout: If there is no receipt within `receipt_timeout`; the account's nonce
+                count is then read from the node again, so a dropped transaction's nonce is reused.
+        """
+        async with self._in_flight:
+            started = time.perf_counter()
+            nonce, tx_hash = await self.send(account, fields)
+            submitted = time.perf_counter()
+            try:
+                receipt = await self.receipts.wait(tx_hash, self.receipt_timeout)
+            except ReceiptTimeout:
+                self.nonces.resync(account.address)
+                raise
+        return TransactionResult(
+            account.address, nonce, tx_hash, bool(int(receipt.get("status", "0x0"), 16)), receipt,
+            submitted - started, time.perf_counter() - started,
+        )
@@ -0,0 +1,196 @@
+"""Bulk deposits and withdrawals across wallets and tokens.
+
+`examples/deposit.py` and `examples/withdraw.py` move one amount of one token for one wallet.
+`Treasury.execute` takes a whole plan of `Transfer`s and runs them concurrently:
+    - deposits of a wallet and token are preceded by one approval covering all of them, sent
+      through a `TransactionPipeline` only where the on-chain allowance is short,
+    - the /deposit and /withdraw calls share one keep-alive `AsyncRestClient`, with cached auth
+      headers per wallet and a rate limit per endpoint,
+    - every transfer gets a `TransferResult`, in plan order; one failure does not stop the others.
+
+Usage:
+    plan = [Transfer(maker, "DCN", Decimal("5000"), WITHDRAW), Transfer(taker, "DCN", Decimal("5000"), DEPOSIT)]
+    async with Treasury() as treasury:
+        results = await treasury.execute(plan)
+
+    python -m examples.treasury plan.json
+"""
+import asyncio
+from decimal import Decimal
+import os
+import sys
+import time
+from typing import Any, NamedTuple
+
+from eth_abi import abi
+import orjson as json
+from web3 import Account
+
+from examples.approve import approval_transaction
+from examples.constants import CLEARINGHOUSE, TOKENS
+from examples.ratelimit import RateLimiter
+from examples.rest import AsyncRestClient
+from examples.signing import HeaderSigner
+from examples.transactions import TransactionPipeline, TransactionResult
+
+DEPOSIT = "deposit"
+WITHDRAW = "withdraw"
+
+# ERC20 allowance(owner, spender)
+_ALLOWANCE_SELECTOR = "0xdd62ed3e"
+
+
+class Transfer(NamedTuple):
+    """One entry of a treasury plan.
+    """
+    # The web3 `Account` of the wallet
+    account: Any
+    token: str
+    amount: Decimal
+    # DEPOSIT or WITHDRAW
+    direction: str
+
+
+class TransferResult(NamedTuple):
+    """Outcome of a `Transfer`.
+    """
+    transfer: Transfer
+    ok: bool
+    # Body of the /deposit or /withdraw response
+    response: Any
+    # The approval the deposit waited for, None if the allowance sufficed or for withdrawals
+    approval: TransactionResult
+    error: str
+    # Seconds from the start of the plan to the transfer completing
+    latency: float
+
+
+class Treasury:
+    """Runs plans of deposits and withdrawals concurrently, approving deposits as needed.
+    """
+
+    def __init__(self, rest: AsyncRestClient = None, pipeline: TransactionPipeline = None,
+                 deposit_rate: float = 5.0, withdraw_rate: float = 5.0, max_concurrency: int = 8, approve: bool = True):
+        """
+        Args:
+            rest (AsyncRestClient, optional): Client for the REST endpoints; by default one client
+                for all wallets, signing each wallet's headers once per second.
+            pipeline (TransactionPipeline, optional): Sends the approvals, for `RPC_URL` by default.
+            deposit_rate (float): Most /deposit calls per second.
+            withdraw_rate (float): Most /withdraw calls per second.
+            max_concurrency (int): Most REST calls in flight, when creating the client.
+            approve (bool): Approve deposits whose allowance is short; off if the plan's amounts
+                are already approved.
+        """
+        self.rest = rest or AsyncRestClient(max_concurrency=max_concurrency, header_factory=HeaderSigner())
+        self.pipeline = pipeline or TransactionPipeline()
+        self.limits = {DEPOSIT: RateLimiter(deposit_rate), WITHDRAW: RateLimiter(withdraw_rate)}
+        self.approve = approve
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        await self.rest.close()
+        await self.pipeline.close()
+
+    async def allowance(self, account, token: str) -> int:
+        """The clearinghouse's current allowance over `account`'s `token`, in wei."""
+        data = _ALLOWANCE_SELECTOR + abi.encode(["address", "address"], [account.address, CLEARINGHOUSE]).hex()
+        result = await self.pipeline.rpc.call("eth_call", [{"to": TOKENS[token]["address"], "data": data}, "latest"])
+        return int(result, 16) if result not in (None, "0x") else 0
+
+    async def ensure_approval(self, account, token: str, amount: Decimal) -> TransactionResult | None:
+        """Approve `amount` of `token` for `account`, unless the allowance already covers it.
+
+        Raises:
+            RuntimeError: If the approval transaction failed on-chain.
+        """
+        fields = approval_transaction(amount, token)
+        # The amount in wei is the last word of the approve call
+        needed = int(fields["data"][-64:], 16)
+        if await self.allowance(account, token) >= needed:
+            return None
+        result = await self.pipeline.submit(account, fields)
+        if not result.success:
+            raise RuntimeError(f"approval {result.tx_hash} of {token} for {account.address} failed")
+        return result
+
+    async def execute(self, plan: list[Transfer]) -> list[TransferResult]:
+        """Run every transfer of `plan` concurrently.
+
+        Returns:
+            list[TransferResult]: One result per transfer, in plan order.
+        """
+        started = time.perf_counter()
+        approvals: dict[tuple[str, str], asyncio.Task] = {}
+        if self.approve:
+            # One approval per wallet and token, covering all of its deposits in the plan
+            totals: dict[tuple[str, str], tuple[Any, Decimal]] = {}
+            for transfer in plan:
+                if transfer.direction == DEPOSIT:
+                    key = (transfer.account.address, transfer.token)
+                    account, total = totals.get(key, (transfer.account, Decimal(0)))
+                    totals[key] = (account, total + transfer.amount)
+            approvals = {
+                key: asyncio.create_task(self.ensure_approval(account, key[1], total))
+                for key, (account, total) in totals.items()
+            }
+        try:
+            return await asyncio.gather(*(self.run(transfer, approvals, started) for transfer in plan))
+        finally:
+            await asyncio.gather(*approvals.values(), return_exceptions=True)
+
+    async def run(self, transfer: Transfer, approvals: dict[tuple[str, str], asyncio.Task], started: float) -> TransferResult:
+        approval = response = error = None
+        try:
+            if transfer.direction not in self.limits:
+                raise ValueError(f"unknown direction {transfer.direction!r}")
+            if transfer.direction == DEPOSIT:
+                task = approvals.get((transfer.account.address, transfer.token))
+                if task is not None:
+                    approval = await task
+            await self.limits[transfer.direction].acquire()
+            if transfer.direction == DEPOSIT:
+                response = await self.rest.deposit(transfer.amount, transfer.token, account=transfer.account)
+            else:
+                response = await self.rest.withdraw(transfer.amount, transfer.token, account=transfer.account)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        return TransferResult(transfer, error is None, response, approval, error, time.perf_counter() - started)
+
+
+def load_plan(path: str, accounts: list) -> list[Transfer]:
+    """Read a plan from a JSON file of {"wallet", "token", "amount", "direction"} entries.
+
+    Wallets are matched by address against `accounts`.
+    """
+    by_address = {account.address.lower(): account for account in accounts}
+    with open(path, "rb") as f:
+        entries = json.loads(f.read())
+    plan = []
+    for entry in entries:
+        account = by_address.get(entry["wallet"].lower())
+        if account is None:
+            raise ValueError(f"no private key for wallet {entry['wallet']}")
+        plan.append(Transfer(account, entry["token"], Decimal(entry["amount"]), entry["direction"]))
+    return plan
+
+
+if __name__ == "__main__":
+    # User must set the private keys of every wallet in the plan, eg. WALLET_PRIVATE_KEYS=key1,key2
+    accounts = [Account.from_key(key) for key in os.environ["WALLET_PRIVATE_KEYS"].split(",")]
+    plan = load_plan(sys.argv[1], accounts)
+
+    async def _execute():
+        async with Treasury() as treasury:
+            return await treasury.execute(plan)
+
+    for result in asyncio.run(_execute()):
+        transfer = result.transfer
+        status = "ok" if result.ok else f"failed -- {result.error}"
+        approved = f" | approved in {result.approval.tx_hash}" if result.approval else ""
+        print(f"{transfer.direction} {transfer.amount} {transfer.token} {transfer.account.address}: {status}{approved} | {result.latency:.2f}s")
@@ -1,70 +1,367 @@
 import asyncio
 import websockets
 import time
-from typing import Any
+from typing import Any, Awaitable, Callable
 import logging
 
+from .messages import Heartbeat, decode
+from .capture import CaptureRecorder
+from .clock import WALL_CLOCK, Clock
+from .metrics import Metrics, log_snapshots, serve_prometheus
+from .reconnect import Backoff, Outage
+from .send_queue import PRIORITY_DEFAULT, PRIORITY_RESPONSE, Cork, SendQueue
+
 logger = logging.getLogger(__name__)    
 
+# With metrics enabled, one message in this many records the server timestamp to receive time
+SERVER_TIME_SAMPLE_EVERY = 16
+
 
 
 
 class WebSocketClient:
     """Base class for WebSocket clients that connect to a server and handle messages.
     """ 
-    def __init__(self, uri, headers, max_retries=5, retry_delay=5):
+    def __init__(self, uri, headers, max_retries=None, retry_delay=5, metrics: Metrics = None,
+                 header_factory: Callable[[], dict[str, str]] = None, standby: bool = False,
+                 send_high_water: int = 256, send_batch: int = 16, min_uptime: float = 1.0):
+        """
+        Args:
+            uri (str): WebSocket server URI.
+            headers (dict): Headers for WebSocket connection.
+            max_retries (int, optional): Consecutive failed connection attempts before giving up,
+                None to keep trying.
+            retry_delay (float): Longest backoff between connection attempts, in seconds.
+            metrics (Metrics, optional): Latency instrumentation.
+            header_factory (Callable, optional): Returns freshly signed headers, called before every
+                connection attempt, eg. `lambda: signer.headers(account)`. `headers` are reused by default.
+            standby (bool): Keep a second authenticated connection open to fail over to when the
+                active one drops. Frames arriving on the standby while it is idle are discarded, so
+                only use it on endpoints that send the same frames to every connection of a wallet.
+            send_high_water (int): Queued outbound frames at which `send_message` callers other than
+                trade responses wait for the socket to catch up.
+            send_batch (int): Most frames the writer sends back to back, in one TCP cork on Linux.
+            min_uptime (float): Seconds a connection has to stay up before the backoff is reset; one
+                closed sooner counts as a failed attempt, so a server that accepts and then drops
+                every connection is not retried in a tight loop.
+        """
         self.uri = uri
         self.headers = headers
         self.wallet = headers.get("wallet")
         if not self.wallet:
             raise ValueError("Wallet address is required as part of Header for authentication")
         self.websocket = None
+        # Source of `now` and of strategy sleeps, replaced by a `VirtualClock` for replays
+        self.clock: Clock = WALL_CLOCK
         self.last_heartbeat = time.time()
         self.max_retries = max_retries
         self.retry_delay = retry_delay
+        self.header_factory = header_factory
+        self.backoff = Backoff(maximum=retry_delay)
+        self.min_uptime = min_uptime
+
+        # Warm standby connection, see `keep_standby`
+        self.standby = standby
+        self._standby_socket = None
+        self._standby_task = None
+        self.standby_discarded = 0
+
+        # Periods without a connection, most recent last
+        self.outages: list[Outage] = []
+
+        # Outbound frames, written to the socket by a single writer in priority order, see `send_message`
+        self.send_queue = SendQueue(send_high_water)
+        self.send_batch = send_batch
+        self._send_lock = asyncio.Lock()
+        self._writer: asyncio.Task = None
+
+        # Dispatch table: message type -> handler, populated by subclasses
+        self.handlers: dict[str, Callable[[Any], Awaitable[None]]] = {}
+
+        # Optional latency instrumentation, no cost beyond a None check when disabled
+        self.metrics = metrics
+        self._received_ns = 0
+        # Message type -> histograms recorded per message in `_histogram_metrics`, see `_histograms`
+        self._histogram_cache = {}
+        self._histogram_metrics: Metrics = None
+        # Messages until the next server time sample
+        self._server_time_countdown = 1
+
+        # Optional capture of every inbound and outbound frame
+        self.recorder: CaptureRecorder = None
+
+    @property
+    def connected(self) -> bool:
+        """Whether the client has an open connection to hand frames to."""
+        return self.websocket is not None
 
     async def connect(self):
-        retry_count = 0
-        while retry_count < self.max_retries:
-            try:
-                print(f"Attempting to connect to {self.uri} -- attempt number {retry_count}")
-                async with websockets.connect(self.uri, extra_headers=self.headers) as websocket:
-                    print(f"Connected to {self.uri} with headers: {self.headers}")
-                    self.websocket = websocket
-                    retry_count = 0  # Reset the retry count on successful connection
+        """Connect and handle messages until cancelled, reconnecting as soon as the connection drops.
+
+        Each attempt signs fresh headers through `header_factory`, failed attempts and connections
+        closed within `min_uptime` back off exponentially from a few milliseconds up to
+        `retry_delay`, and with `standby` a dropped connection is replaced by the already open
+        standby. Every outage is reported and kept in `outages`.
+        """
+        attempts = 0
+        down_since = reason = None
+        try:
+            while True:
+                websocket = await self.take_standby()
+                failover = websocket is not None
+                if websocket is None:
+                    try:
+                        logger.info("Attempting to connect to %s -- attempt number %d", self.uri, attempts)
+                        websocket = await self.open_connection()
+                    except websockets.exceptions.InvalidURI as e:
+                        logger.error("Invalid websocket URI: %s", e)
+                        break
+                    except (OSError, asyncio.TimeoutError, websockets.exceptions.WebSocketException) as e:
+                        attempts += 1
+                        reason = reason or repr(e)
+                        if not await self.retry(attempts, e):
+                            break
+                        continue
+
+                if down_since is not None:
+                    self.record_outage(Outage(self.uri, down_since, time.time(), attempts, failover, reason))
+                logger.info("Connected to %s as %s%s", self.uri, self.wallet, " (standby)" if failover else "")
+                self.websocket = websocket
+                if self.standby and (self._standby_task is None or self._standby_task.done()):
+                    self._standby_task = asyncio.create_task(self.keep_standby())
+                connected_at = time.monotonic()
+                try:
                     await self.handle_messages(websocket)
-            except (websockets.exceptions.ConnectionClosedError, websockets.exceptions.InvalidURI) as e:
-                logging.error(f"Connection closed with error: {e}. Retrying in {self.retry_delay} seconds...")
-                retry_count += 1
-                await asyncio.sleep(self.retry_delay)
-            except Exception as e:
-                logging.error(f"Exception during client execution: {e}")
-                break  # Break the loop on other exceptions
+                finally:
+                    self.websocket = None
+                    await self.stop_writer()
+                    await websocket.close()
+                down_since = time.time()
+                reason = f"closed with code {websocket.close_code}"
+                uptime = time.monotonic() - connected_at
+                if uptime >= self.min_uptime:
+                    attempts = 0
+                    self.backoff.reset()
+                    continue
+                # Accepted and dropped at once: back off as after a failed attempt
+                attempts += 1
+                if not await self.retry(attempts, f"closed after {uptime * 1000:.0f} ms"):
+                    break
+        finally:
+            await self.close_standby()
+
+    async def retry(self, attempts: int, cause) -> bool:
+        """Back off after the `attempts`th consecutive failed attempt, False once `max_retries` is reached."""
+        if self.max_retries is not None and attempts >= self.max_retries:
+            logger.error("Giving up on %s after %d attempts: %s", self.uri, attempts, cause)
+            return False
+        delay = self.backoff.next()
+        logger.error("Connection failed: %s. Retrying in %.0f ms...", cause, delay * 1000)
+        await asyncio.sleep(delay)
+        return True
+
+    async def open_connection(self):
+        """Open an authenticated connection, signing fresh headers if there is a `header_factory`."""
+        if self.header_factory is not None:
+            self.headers = self.header_factory()
+        return await websockets.connect(self.uri, extra_headers=self.headers)
+
+    async def keep_standby(self):
+        """Keep a standby connection open, draining it until it is taken over by `take_standby`.
+        """
+        backoff = Backoff(maximum=self.retry_delay)
+        while True:
+            try:
+                websocket = await self.open_connection()
+            except (OSError, asyncio.TimeoutError, websockets.exceptions.WebSocketException) as e:
+                logger.error("Standby connection failed: %s", e)
+                await asyncio.sleep(backoff.next())
+                continue
+            self._standby_socket = websocket
+            connected_at = time.monotonic()
+            try:
+                # Read what the server sends while idle, so the standby never applies back pressure
+                async for _ in websocket:
+                    self.standby_discarded += 1
+            except websockets.exceptions.ConnectionClosed:
+                pass
+            self._standby_socket = None
+            if time.monotonic() - connected_at >= self.min_uptime:
+                backoff.reset()
+            else:
+                await asyncio.sleep(backoff.next())
+
+    async def take_standby(self):
+        """The open standby connection, detached from its drain task, or None."""
+        websocket = self._standby_socket
+        if websocket is None or not websocket.open:
+            return None
+        self._standby_task.cancel()
+        await asyncio.gather(self._standby_task, return_exceptions=True)
+        self._standby_task = self._standby_socket = None
+        return websocket
+
+    async def close_standby(self):
+        if self._standby_task is not None:
+            self._standby_task.cancel()
+            await asyncio.gather(self._standby_task, return_exceptions=True)
+        if self._standby_socket is not None:
+            await self._standby_socket.close()
+        self._standby_task = self._standby_socket = None
+
+    def record_outage(self, outage: Outage):
+        self.outages.append(outage)
+        if self.metrics is not None:
+            self.metrics.histogram("reconnect_downtime").record(int(outage.downtime * 1e9))
+        logger.warning("Reconnected to %s after %.1f ms down, %d failed attempts, standby: %s, cause: %s",
+                       outage.uri, outage.downtime * 1000, outage.attempts, outage.standby, outage.reason)
 
     async def handle_messages(self, websocket):
         try:
             async for message in websocket:
+                if self.metrics is not None:
+                    self._received_ns = time.perf_counter_ns()
+                if self.recorder is not None:
+                    self.recorder.inbound(message)
                 await self.handle_message(message)
         except websockets.exceptions.ConnectionClosedError as e:
-            logger.error(f"Connection closed with error. Reconnecting...", exc_info=True)
+            logger.error("Connection closed with error. Reconnecting...", exc_info=True)
         except Exception as e:
-            logger.error(f"Exception during message handling", exc_info=True)
+            logger.error("Exception during message handling", exc_info=True)
 
     async def handle_message(self, message: Any):
-        raise NotImplementedError("This method should be overridden by subclasses")
+        """Decode an incoming frame once and dispatch it to the handler registered for its type.
 
-    async def send_message(self, message: str):
-        if self.websocket:
-            try:
-                await self.websocket.send(message)
-            except websockets.exceptions.ConnectionClosedError as e:
-                print(f"WebSocket connection closed while sending message: {e}")
+        Args:
+            message (str): The incoming WebSocket message.
+        """
+        decoded = decode(message)
+        handler = self.handlers.get(decoded.message_type)
+        if handler is None:
+            await self.handle_unknown(decoded)
+        elif self.metrics is None:
+            await handler(decoded)
+        else:
+            # Receive to handler start and handler duration per type, and a sample of the server
+            # timestamp to local receive times
+            start = time.perf_counter_ns()
+            recv_to_handler, server_to_recv, handler_duration = self._histograms(decoded.message_type)
+            if self._received_ns:
+                recv_to_handler.record(start - self._received_ns)
+                self._received_ns = 0
+            self._server_time_countdown -= 1
+            if not self._server_time_countdown:
+                self._server_time_countdown = SERVER_TIME_SAMPLE_EVERY
+                timestamp = getattr(decoded, "timestamp", None)
+                if timestamp is not None:
+                    # Negative values from clock skew are counted as zero
+                    server_to_recv.record(int((time.time() - timestamp) * 1e9))
+            await handler(decoded)
+            handler_duration.record(time.perf_counter_ns() - start)
+
+    def _histograms(self, message_type: str):
+        """The histograms recorded for each message of `message_type`, cached per client.
+        """
+        if self._histogram_metrics is not self.metrics:
+            # A new registry, eg. from `enable_metrics`
+            self._histogram_cache = {}
+            self._histogram_metrics = self.metrics
+        histograms = self._histogram_cache.get(message_type)
+        if histograms is None:
+            histograms = self._histogram_cache[message_type] = (
+                self.metrics.histogram("recv_to_handler"),
+                self.metrics.histogram("server_to_recv"),
+                self.metrics.histogram("handler." + message_type),
+            )
+        return histograms
+
+    async def send_message(self, message: str, priority: int = PRIORITY_DEFAULT, key=None) -> bool:
+        """Send a frame on the current connection, in priority order with the other frames.
+
+        The frame is written straight away when nothing else is queued or being written, and is
+        otherwise queued for the connection's writer task. Frames are dropped while disconnected.
+
+        Args:
+            message (str | bytes): The frame.
+            priority (int): A `PRIORITY_*` constant of `examples.websocket.send_queue`; trade
+                responses go before quotes, quotes before everything else.
+            key (Hashable, optional): Replace an unsent frame queued with the same key, eg. the
+                previous quote of a pool.
+
+        Returns:
+            bool: Whether the frame was written or queued, False if it was dropped.
+        """
+        websocket = self.websocket
+        if not websocket:
+            return False
+        queue = self.send_queue
+        if not queue and not self._send_lock.locked():
+            async with self._send_lock:
+                await self.write_frame(websocket, message, time.perf_counter_ns())
+            return True
+        if priority != PRIORITY_RESPONSE and not queue.writable.is_set():
+            # Back-pressure: the socket is not keeping up, wait for the writer to catch up
+            blocked_ns = await queue.wait_writable()
+            if self.metrics is not None:
+                self.metrics.histogram("send_blocked").record(blocked_ns)
+            if self.websocket is not websocket:
+                return False
+        if not queue.put(message, priority, key) and self.metrics is not None:
+            self.metrics.count("send_replaced")
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.create_task(self.write_frames(websocket))
+        return True
+
+    async def write_frames(self, websocket):
+        """The connection's writer: sends queued frames, highest priority first, until cancelled."""
+        queue = self.send_queue
+        while True:
+            await queue.ready.wait()
+            async with self._send_lock:
+                # Frames ready together leave in as few TCP segments as possible. They are taken
+                # one at a time, so a trade response queued meanwhile still goes out next.
+                written = 0
+                with Cork(websocket if len(queue) > 1 else None):
+                    while queue and written < self.send_batch:
+                        (message, enqueued_ns), = queue.take(1)
+                        await self.write_frame(websocket, message, enqueued_ns)
+                        written += 1
+                # Nothing was left to send if another wakeup already drained the queue
+                if written and self.metrics is not None:
+                    self.metrics.histogram("send_batch").record(written)
+
+    async def write_frame(self, websocket, message, enqueued_ns: int):
+        if self.recorder is not None:
+            self.recorder.outbound(message)
+        try:
+            if self.metrics is None:
+                await websocket.send(message)
+            else:
+                start = time.perf_counter_ns()
+                await websocket.send(message)
+                end = time.perf_counter_ns()
+                self.metrics.histogram("send_wait").record(end - start)
+                self.metrics.histogram("send_queue_delay").record(start - enqueued_ns)
+        except websockets.exceptions.ConnectionClosed as e:
+            logger.warning("WebSocket connection closed while sending message: %s", e)
 
-    async def handle_heartbeat(self, data: dict[str,Any]):
+    async def stop_writer(self):
+        """Stop the writer of a closed connection and drop its unsent frames, which are stale by reconnect."""
+        if self._writer is not None:
+            self._writer.cancel()
+            await asyncio.gather(self._writer, return_exceptions=True)
+            self._writer = None
+        dropped = self.send_queue.clear()
+        if dropped:
+            logger.warning("Dropped %d unsent frames of the closed connection to %s", dropped, self.uri)
+            if self.metrics is not None:
+                self.metrics.count("send_dropped", dropped)
+
+    async def handle_heartbeat(self, data: Heartbeat):
         # Handle heartbeat messages
-        timediff = data['timestamp'] - self.last_heartbeat
-        self.last_heartbeat = time.time()
-        print(f"Heartbeat received: {self.last_heartbeat}, timediff: {timediff}")
+        timediff = data.timestamp - self.last_heartbeat
+        self.last_heartbeat = self.now
+        logger.info("Heartbeat received: %s, timediff: %s", self.last_heartbeat, timediff)
 
     async def handle_unknown(self, data):
         # Handle unknown messages
@@ -72,7 +369,7 @@ class WebSocketClient:
     
     @property
     def now(self):
-        return time.time()
+        return self.clock.time()
 
 
 class WebSocketClientManager:
@@ -82,11 +379,63 @@ class WebSocketClientManager:
         self.clients = {}
         self._client_tasks = []
 
+        # Metrics exporters, see `enable_metrics`
+        self.metrics = None
+        self._snapshot_path = None
+        self._snapshot_interval = 10.0
+        self._prometheus_address = None
+        self._exporter_tasks = []
+        self._prometheus_server = None
+
+        # Frame capture, see `enable_capture`
+        self.recorders: dict[str, CaptureRecorder] = {}
+
     def add_client(self, name, client):
         self.clients[name] = client
+        if self.metrics is not None:
+            client.metrics = self.metrics
+
+    def enable_metrics(self, metrics: Metrics = None, snapshot_path: str = None, snapshot_interval: float = 10.0,
+                       prometheus_host: str = "127.0.0.1", prometheus_port: int = None) -> Metrics:
+        """Instrument all clients with a shared `Metrics` registry and optionally export it.
+
+        Args:
+            metrics (Metrics, optional): The registry to use, a new one by default.
+            snapshot_path (str, optional): File to append a JSON snapshot to every `snapshot_interval` seconds.
+            snapshot_interval (float): Seconds between snapshots.
+            prometheus_host (str): Interface to serve Prometheus text on.
+            prometheus_port (int, optional): Port to serve Prometheus text on, at /metrics.
+        """
+        self.metrics = metrics or Metrics()
+        for client in self.clients.values():
+            client.metrics = self.metrics
+        self._snapshot_path = snapshot_path
+        self._snapshot_interval = snapshot_interval
+        if prometheus_port is not None:
+            self._prometheus_address = (prometheus_host, prometheus_port)
+        return self.metrics
+
+    def enable_capture(self, directory: str, **options) -> dict[str, CaptureRecorder]:
+        """Record every frame of every client to segment files in `directory`, named after the client.
+
+        Args:
+            directory (str): Directory for the capture files.
+            **options: Passed on to `CaptureRecorder`, eg. `segment_bytes` or `flush_interval`.
+        """
+        for name, client in self.clients.items():
+            client.recorder = self.recorders[name] = CaptureRecorder(directory, name=name, **options)
+        return self.recorders
 
     async def start(self):
-        
+        if self._snapshot_path:
+            self._exporter_tasks.append(asyncio.create_task(
+                log_snapshots(self.metrics, self._snapshot_path, self._snapshot_interval)
+            ))
+        if self._prometheus_address:
+            self._prometheus_server = await serve_prometheus(self.metrics, *self._prometheus_address)
+        for recorder in self.recorders.values():
+            self._exporter_tasks.append(asyncio.create_task(recorder.run()))
+
         self._client_tasks = [asyncio.create_task(client.connect()) for client in self.clients.values()]
         results = await asyncio.gather(*self._client_tasks, return_exceptions=True)
         for result in results:
@@ -94,6 +443,7 @@ class WebSocketClientManager:
                 print(f"Exception during client execution: {result}")
     
     async def stop(self):
+        # Clients first, so no frame is recorded after its recorder is closed
         for task in self._client_tasks:
             task.cancel()
         results = await asyncio.gather(*self._client_tasks, return_exceptions=True)
@@ -102,6 +452,13 @@ class WebSocketClientManager:
                 print(f"Task was cancelled: {result}")
             elif isinstance(result, Exception):
                 print(f"Exception during task cancellation: {result}")
+        for task in self._exporter_tasks:
+            task.cancel()
+        await asyncio.gather(*self._exporter_tasks, return_exceptions=True)
+        if self._prometheus_server is not None:
+            self._prometheus_server.close()
+        for recorder in self.recorders.values():
+            await recorder.close()
 
     def run(self, loop: asyncio.AbstractEventLoop = None):
         if not loop:
@@ -0,0 +1,241 @@
+"""Shared-memory market data bus: one publisher, any number of local subscriber processes.
+
+The publisher decodes the market data feed once and writes every update as a fixed-layout book
+snapshot into a ring of slots in a memory-mapped file, by default under /dev/shm. Subscribers map
+the same file read-only and unpack snapshots straight out of the mapping, without a socket, a
+copy of the frame or a JSON decode.
+
+Layout, all little-endian:
+
+    header   magic (8s) | slots (u32) | max_rungs (u32) | slot_size (u32) | pad | write_sequence (u64)
+    slot     begin (u64) | timestamp (f64) | sequence_number (i64) | pool_id (32s) | symbol (16s)
+             | bid, offer and size rungs (3 * u16) | pad | bids, offers, sizes (3 * max_rungs * i128)
+             | end (u64)
+
+Prices and sizes are stored as the fixed-point integers of `examples.fixedpoint`, which need more
+than 64 bits, as 16 byte signed integers.
+
+Each slot is guarded like a seqlock: the writer stores the bus sequence in `begin`, writes the
+payload, then stores it in `end` and finally in the header's `write_sequence`. A reader accepts a
+slot only if both markers equal the sequence it expects; a marker ahead of it means the writer
+lapped the reader, which is counted as an overrun and skipped.
+"""
+import asyncio
+import mmap
+import os
+import struct
+import tempfile
+from typing import AsyncIterator, Iterator, NamedTuple
+
+from examples.fixedpoint import parse_ladder
+
+from .messages import MarketData
+
+MAGIC = b"ASMDBUS1"
+DEFAULT_PATH = os.path.join("/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(), "alphastar-mktdata")
+
+_HEADER = struct.Struct("<8sIII4xQ")
+_WRITE_SEQUENCE = struct.Struct("<Q")
+_WRITE_SEQUENCE_OFFSET = _HEADER.size - _WRITE_SEQUENCE.size
+_SLOT = struct.Struct("<Qdq32s16sHHH2x")
+# Widths of the pool id and symbol fields, in bytes of UTF-8
+_POOL_ID_SIZE = 32
+_SYMBOL_SIZE = 16
+_MARKER = struct.Struct("<Q")
+_VALUE_SIZE = 16
+
+
+class BookSnapshot(NamedTuple):
+    """A market data update as read from the bus, with fixed-point integer ladders.
+    """
+    bus_sequence: int
+    timestamp: float
+    pool_id: str
+    sequence_number: int
+    symbol: str
+    bids: list[int]
+    offers: list[int]
+    sizes: list[int]
+
+
+class MarketDataBus:
+    """The memory-mapped ring buffer, opened for writing by the publisher or for reading by subscribers.
+
+    Usage:
+        bus = MarketDataBus.create(slots=4096, max_rungs=8)       # publisher
+        bus.publish(data)
+
+        reader = MarketDataBus.open().reader()                    # subscriber
+        for snapshot in reader.poll():
+            ...
+    """
+
+    def __init__(self, path: str, buffer: mmap.mmap, slots: int, max_rungs: int, writable: bool = False):
+        self.path = path
+        self.buffer = buffer
+        self.slots = slots
+        self.max_rungs = max_rungs
+        self.slot_size = _SLOT.size + 3 * max_rungs * _VALUE_SIZE + _MARKER.size
+        self.writable = writable
+        self.write_sequence = self.read_write_sequence()
+
+    @classmethod
+    def create(cls, path: str = DEFAULT_PATH, slots: int = 4096, max_rungs: int = 8) -> "MarketDataBus":
+        """Create (or truncate) the bus file and map it for writing.
+
+        Args:
+            path (str): File backing the bus, on a tmpfs such as /dev/shm to stay in memory.
+            slots (int): Number of snapshots kept; a subscriber more than this far behind overruns.
+            max_rungs (int): Maximum number of ladder rungs per snapshot.
+        """
+        slot_size = _SLOT.size + 3 * max_rungs * _VALUE_SIZE + _MARKER.size
+        size = _HEADER.size + slots * slot_size
+        with open(path, "w+b") as f:
+            f.truncate(size)
+            buffer = mmap.mmap(f.fileno(), size)
+        _HEADER.pack_into(buffer, 0, MAGIC, slots, max_rungs, slot_size, 0)
+        return cls(path, buffer, slots, max_rungs, writable=True)
+
+    @classmethod
+    def open(cls, path: str = DEFAULT_PATH) -> "MarketDataBus":
+        """Map an existing bus file read-only.
+
+        Raises:
+            ValueError: If the file is not a market data bus.
+        """
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, slots, max_rungs, slot_size, _ = _HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a market data bus")
+        bus = cls(path, buffer, slots, max_rungs)
+        if bus.slot_size != slot_size:
+            raise ValueError(f"{path} has an incompatible slot layout")
+        return bus
+
+    def read_write_sequence(self) -> int:
+        """Sequence of the last snapshot published, 0 if none."""
+        return _WRITE_SEQUENCE.unpack_from(self.buffer, _WRITE_SEQUENCE_OFFSET)[0]
+
+    def _offset(self, sequence: int) -> int:
+        return _HEADER.size + (sequence % self.slots) * self.slot_size
+
+    def publish(self, data: MarketData) -> int:
+        """Write a market data update to the next slot and return its bus sequence.
+
+        Args:
+            data (MarketData): The decoded update; its ladders are converted to fixed-point once here.
+
+        Raises:
+            ValueError: If the ladder has more than `max_rungs` rungs, or the pool id or symbol is
+                longer than its field (32 and 16 bytes), which would truncate it.
+        """
+        ladders = (data.bids, data.offers, data.sizes)
+        if max(map(len, ladders)) > self.max_rungs:
+            raise ValueError(f"Ladder exceeds {self.max_rungs} rungs")
+        pool_id, symbol = data.pool_id.encode(), data.symbol.encode()
+        if len(pool_id) > _POOL_ID_SIZE:
+            raise ValueError(f"pool_id {data.pool_id!r} is longer than {_POOL_ID_SIZE} bytes")
+        if len(symbol) > _SYMBOL_SIZE:
+            raise ValueError(f"symbol {data.symbol!r} is longer than {_SYMBOL_SIZE} bytes")
+        values = bytearray(3 * self.max_rungs * _VALUE_SIZE)
+        for ladder_index, ladder in enumerate(ladders):
+            offset = ladder_index * self.max_rungs * _VALUE_SIZE
+            for value in parse_ladder(ladder):
+                values[offset:offset + _VALUE_SIZE] = value.to_bytes(_VALUE_SIZE, "little", signed=True)
+                offset += _VALUE_SIZE
+
+        sequence = self.write_sequence + 1
+        offset = self._offset(sequence)
+        buffer = self.buffer
+        _SLOT.pack_into(
+            buffer, offset, sequence, data.timestamp, data.sequence_number,
+            pool_id, symbol, *map(len, ladders),
+        )
+        payload = offset + _SLOT.size
+        buffer[payload:payload + len(values)] = values
+        _MARKER.pack_into(buffer, payload + len(values), sequence)
+        _WRITE_SEQUENCE.pack_into(buffer, _WRITE_SEQUENCE_OFFSET, sequence)
+        self.write_sequence = sequence
+        return sequence
+
+    def read(self, sequence: int) -> BookSnapshot | None:
+        """Read the snapshot with bus sequence `sequence`.
+
+        Returns:
+            BookSnapshot: The snapshot, or None if it has been overwritten or is being written.
+        """
+        buffer = self.buffer
+        offset = self._offset(sequence)
+        begin, timestamp, pool_sequence, pool_id, symbol, *rungs = _SLOT.unpack_from(buffer, offset)
+        if begin != sequence:
+            return None
+        payload = offset + _SLOT.size
+        stride = self.max_rungs * _VALUE_SIZE
+        view = memoryview(buffer)
+        try:
+            bids, offers, sizes = (
+                [
+                    int.from_bytes(view[start:start + _VALUE_SIZE], "little", signed=True)
+                    for start in range(payload + ladder * stride, payload + ladder * stride + count * _VALUE_SIZE, _VALUE_SIZE)
+                ]
+                for ladder, count in enumerate(rungs)
+            )
+        finally:
+            view.release()
+        if _MARKER.unpack_from(buffer, payload + 3 * stride)[0] != sequence or \
+                _MARKER.unpack_from(buffer, offset)[0] != sequence:
+            return None
+        return BookSnapshot(
+            sequence, timestamp, pool_id.rstrip(b"\0").decode(), pool_sequence,
+            symbol.rstrip(b"\0").decode(), bids, offers, sizes,
+        )
+
+    def reader(self, from_start: bool = False) -> "BusReader":
+        """A reader starting after the latest snapshot, or at the oldest one still in the ring."""
+        return BusReader(self, from_start)
+
+    def close(self):
+        self.buffer.close()
+
+
+class BusReader:
+    """Reads the snapshots published since its last poll, in order, counting overruns.
+    """
+
+    def __init__(self, bus: MarketDataBus, from_start: bool = False):
+        self.bus = bus
+        latest = bus.read_write_sequence()
+        self.next_sequence = max(1, latest - bus.slots + 1) if from_start else latest + 1
+        # Snapshots the writer overwrote before this reader got to them
+        self.overruns = 0
+
+    def poll(self) -> Iterator[BookSnapshot]:
+        """Yield every snapshot published since the last poll.
+        """
+        bus = self.bus
+        latest = bus.read_write_sequence()
+        if latest - self.next_sequence >= bus.slots:
+            # Lapped by the writer: skip to the oldest snapshot that is still intact
+            oldest = latest - bus.slots + 1
+            self.overruns += oldest - self.next_sequence
+            self.next_sequence = oldest
+        while self.next_sequence <= latest:
+            snapshot = bus.read(self.next_sequence)
+            if snapshot is None:
+                # Overwritten while reading, resynchronize on the next poll
+                self.overruns += 1
+            else:
+                yield snapshot
+            self.next_sequence += 1
+
+    async def stream(self, interval: float = 0.0005) -> AsyncIterator[BookSnapshot]:
+        """Yield snapshots as they are published, polling every `interval` seconds when idle.
+        """
+        while True:
+            idle = True
+            for snapshot in self.poll():
+                idle = False
+                yield snapshot
+            if idle:
+                await asyncio.sleep(interval)
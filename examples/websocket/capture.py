@@ -0,0 +1,253 @@
+"""Append-only binary capture of websocket frames, and a memory-mapped reader to replay them.
+
+A `CaptureRecorder` stores every inbound and outbound frame of a client with its local receive
+(or send) time. Frames are appended to an in-memory buffer on the hot path and written out in
+batches by a single background thread, so recording never waits on the disk. If the disk falls so
+far behind that the buffer reaches its limit, further frames are dropped and counted rather than
+held in memory. Captures are split
+into segment files of bounded size, named after the time of their first record, each with a small
+time index of (time, offset) entries, one per written batch.
+
+Segment layout, all little-endian:
+
+    header   magic (8s) | first record time (i64, ns)
+    record   time (i64, ns) | length (u32) | flags (u8) | pad (3x) | frame (length bytes)
+
+The flags mark the direction and whether the frame was text. The index file next to a segment
+is a sequence of (time (i64, ns), offset (u64)) entries. A record cut short by a crash ends the
+segment when read.
+"""
+import asyncio
+import mmap
+import os
+import re
+import time
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+import struct
+from typing import Iterator, NamedTuple
+
+MAGIC = b"ASCAP001"
+INBOUND = 0
+OUTBOUND = 1
+TEXT = 2
+
+_SEGMENT_HEADER = struct.Struct("<8sq")
+_RECORD = struct.Struct("<qIB3x")
+_INDEX_ENTRY = struct.Struct("<qQ")
+
+
+class CaptureRecord(NamedTuple):
+    """A captured frame. `frame` is a view into the mapped segment, valid while the reader is open.
+    """
+    time_ns: int
+    flags: int
+    frame: memoryview
+
+    @property
+    def outbound(self) -> bool:
+        return bool(self.flags & OUTBOUND)
+
+    def message(self) -> str | bytes:
+        """The frame as the websocket delivered it, a str for text frames."""
+        return str(self.frame, "utf-8") if self.flags & TEXT else bytes(self.frame)
+
+
+class CaptureRecorder:
+    """Records the frames of a client to segment files in `directory`.
+
+    Usage:
+        recorder = CaptureRecorder("captures", name="marketdata")
+        client.recorder = recorder
+        task = asyncio.create_task(recorder.run())
+        ...
+        await recorder.close()
+    """
+
+    def __init__(self, directory: str, name: str = "capture", segment_bytes: int = 256 << 20,
+                 flush_interval: float = 0.1, max_buffer: int = 4 << 20, buffer_limit: int = 64 << 20):
+        """
+        Args:
+            directory (str): Directory for the segment and index files, created if needed.
+            name (str): Prefix of the segment file names, eg. the client name.
+            segment_bytes (int): Size after which a new segment is started.
+            flush_interval (float): Seconds between batched writes.
+            max_buffer (int): Buffered bytes that trigger a write before the interval is up.
+            buffer_limit (int): Most bytes buffered while the previous batch is still being
+                written; frames that do not fit are dropped and counted in `dropped`.
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.name = name
+        self.segment_bytes = segment_bytes
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.buffer_limit = buffer_limit
+
+        self.records = 0
+        self.dropped = 0
+        self.bytes_written = 0
+        self._buffer = bytearray()
+        self._first_ns = 0
+        self._full = asyncio.Event()
+        # A single thread keeps batches in order and owns the open segment
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"capture-{name}")
+        self._segment = None
+        self._index = None
+
+    def record(self, frame: str | bytes, flags: int = INBOUND):
+        """Append a frame to the write buffer, or drop it if the buffer is full. Never blocks.
+
+        Args:
+            frame (str | bytes): The frame as sent or received.
+            flags (int): `INBOUND` or `OUTBOUND`; `TEXT` is added for str frames.
+        """
+        if frame.__class__ is str:
+            frame = frame.encode()
+            flags |= TEXT
+        buffer = self._buffer
+        if len(buffer) + _RECORD.size + len(frame) > self.buffer_limit:
+            self.dropped += 1
+            return
+        now = time.time_ns()
+        if not buffer:
+            self._first_ns = now
+        buffer += _RECORD.pack(now, len(frame), flags)
+        buffer += frame
+        self.records += 1
+        if len(buffer) >= self.max_buffer:
+            self._full.set()
+
+    def inbound(self, frame: str | bytes):
+        self.record(frame, INBOUND)
+
+    def outbound(self, frame: str | bytes):
+        self.record(frame, OUTBOUND)
+
+    async def run(self):
+        """Write the buffered frames every `flush_interval` seconds, or sooner when the buffer fills.
+        """
+        while True:
+            try:
+                await asyncio.wait_for(self._full.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            await self.flush()
+
+    async def flush(self):
+        """Hand the buffered frames to the writer thread and wait until they are written."""
+        self._full.clear()
+        if not self._buffer:
+            return
+        batch, first_ns = self._buffer, self._first_ns
+        self._buffer = bytearray()
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._write, batch, first_ns)
+
+    async def close(self):
+        await self.flush()
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._close_segment)
+        self._executor.shutdown()
+
+    def _write(self, batch: bytearray, first_ns: int):
+        if self._segment is None or self._segment.tell() >= self.segment_bytes:
+            self._close_segment()
+            stem = os.path.join(self.directory, f"{self.name}-{first_ns:020d}")
+            self._segment = open(stem + ".cap", "ab")
+            self._index = open(stem + ".idx", "ab")
+            self._segment.write(_SEGMENT_HEADER.pack(MAGIC, first_ns))
+        self._index.write(_INDEX_ENTRY.pack(first_ns, self._segment.tell()))
+        self._segment.write(batch)
+        self._segment.flush()
+        self._index.flush()
+        self.bytes_written += len(batch)
+
+    def _close_segment(self):
+        if self._segment is not None:
+            self._segment.close()
+            self._index.close()
+            self._segment = self._index = None
+
+
+class CaptureReader:
+    """Iterates the records of a capture in time order, straight out of memory-mapped segments.
+
+    Usage:
+        with CaptureReader("captures", name="marketdata") as reader:
+            for record in reader.records(start_ns=incident_ns - 5_000_000_000):
+                message = record.message()
+    """
+
+    def __init__(self, directory: str, name: str = "capture"):
+        # Exactly `name-<first ns>.cap`, so the capture "maker" does not pick up the segments of "maker-2"
+        pattern = re.compile(re.escape(name) + r"-(\d+)\.cap")
+        segments = sorted(
+            (int(match[1]), os.path.join(directory, match[0]))
+            for match in map(pattern.fullmatch, os.listdir(directory) if os.path.isdir(directory) else ())
+            if match
+        )
+        self.paths = [path for _, path in segments]
+        self.starts = [start for start, _ in segments]
+        self._maps: list[mmap.mmap] = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __iter__(self) -> Iterator[CaptureRecord]:
+        return self.records()
+
+    def records(self, start_ns: int = None, end_ns: int = None) -> Iterator[CaptureRecord]:
+        """Records with `start_ns` <= time < `end_ns`, using the time index to skip to the start.
+        """
+        first = max(0, bisect_right(self.starts, start_ns) - 1) if start_ns is not None else 0
+        for path in self.paths[first:]:
+            for record in self._segment_records(path, start_ns):
+                if end_ns is not None and record.time_ns >= end_ns:
+                    return
+                yield record
+
+    def _segment_records(self, path: str, start_ns: int = None) -> Iterator[CaptureRecord]:
+        if os.path.getsize(path) <= _SEGMENT_HEADER.size:
+            return
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(buffer)
+        if buffer[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a capture segment")
+
+        offset = _SEGMENT_HEADER.size
+        if start_ns is not None:
+            offset = self._seek(path[:-len(".cap")] + ".idx", start_ns) or offset
+        view = memoryview(buffer)
+        size = len(buffer)
+        while offset + _RECORD.size <= size:
+            time_ns, length, flags = _RECORD.unpack_from(buffer, offset)
+            offset += _RECORD.size
+            if offset + length > size:
+                break
+            if start_ns is None or time_ns >= start_ns:
+                yield CaptureRecord(time_ns, flags, view[offset:offset + length])
+            offset += length
+
+    @staticmethod
+    def _seek(index_path: str, start_ns: int) -> int | None:
+        """Offset of the last indexed batch starting at or before `start_ns`, if any."""
+        try:
+            with open(index_path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        entries = [entry for entry in _INDEX_ENTRY.iter_unpack(data[:len(data) - len(data) % _INDEX_ENTRY.size])]
+        position = bisect_right(entries, (start_ns, float("inf"))) - 1
+        return entries[position][1] if position >= 0 else None
+
+    def close(self):
+        for buffer in self._maps:
+            try:
+                buffer.close()
+            except BufferError:
+                # Records handed out still reference the mapping, it is released with them
+                pass
+        self._maps.clear()
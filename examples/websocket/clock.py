@@ -0,0 +1,85 @@
+import asyncio
+import heapq
+import itertools
+import time
+
+
+class Clock:
+    """Wall clock time and sleeps, the default for live clients.
+    """
+
+    def time(self) -> float:
+        """Current unix time in seconds."""
+        return time.time()
+
+    async def sleep(self, delay: float):
+        await asyncio.sleep(delay)
+
+
+WALL_CLOCK = Clock()
+
+
+class VirtualClock(Clock):
+    """A clock that only moves when told to, for replaying recorded streams faster than real time.
+
+    Sleepers are parked on futures in a heap of deadlines. `advance` moves the time forward one
+    deadline at a time, waking each sleeper with the time set to its deadline, so timers fire in
+    the same order and at the same virtual times as they would live.
+
+    Usage:
+        clock = VirtualClock(start=first_event_time)
+        client.clock = clock
+        await clock.advance(next_event_time)
+    """
+
+    def __init__(self, start: float = None, settle_steps: int = 2):
+        """
+        Args:
+            start (float, optional): The initial unix time in seconds, by default the time of the
+                first `advance`.
+            settle_steps (int): Event loop iterations given to a woken sleeper to run up to its next
+                suspension point before the clock moves on.
+        """
+        self.now = start
+        self.settle_steps = settle_steps
+        self._timers: list[tuple[float, int, asyncio.Future]] = []
+        self._order = itertools.count()
+
+    def time(self) -> float:
+        return self.now
+
+    async def sleep(self, delay: float):
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._timers, (self.now + max(0.0, delay), next(self._order), future))
+        await future
+
+    @property
+    def next_deadline(self) -> float | None:
+        return self._timers[0][0] if self._timers else None
+
+    async def advance(self, until: float) -> int:
+        """Move the time forward to `until`, firing every timer due on the way in deadline order.
+
+        Returns:
+            int: The number of timers fired.
+        """
+        if self.now is None:
+            self.now = until
+        fired = 0
+        timers = self._timers
+        while timers and timers[0][0] <= until:
+            deadline, _, future = heapq.heappop(timers)
+            if future.done():
+                # The sleeper was cancelled
+                continue
+            self.now = max(self.now, deadline)
+            future.set_result(None)
+            fired += 1
+            await self.settle()
+        self.now = max(self.now, until)
+        return fired
+
+    async def settle(self):
+        """Let woken tasks run until they suspend again."""
+        for _ in range(self.settle_steps):
+            await asyncio.sleep(0)
@@ -0,0 +1,150 @@
+import asyncio
+from collections import OrderedDict
+
+from .messages import MarketData
+from .metrics import Histogram
+
+
+class SequenceTracker:
+    """Checks the `sequence_number` of each pool's market data for gaps and out-of-order updates.
+
+    Usage:
+        tracker = SequenceTracker()
+        if tracker.observe(data):
+            ...  # in order, possibly after a gap
+    """
+
+    def __init__(self):
+        self.last: dict[str, int] = {}
+        # Updates discarded because they were older than or equal to the last one seen
+        self.out_of_order = 0
+        # Number of times the sequence skipped ahead, and the number of updates missed in total
+        self.gaps = 0
+        self.missed = 0
+
+    def observe(self, data: MarketData) -> bool:
+        """Record an update and return whether it is newer than the last update of its pool.
+
+        Args:
+            data (MarketData): The decoded market data message.
+        """
+        last = self.last.get(data.pool_id)
+        sequence = data.sequence_number
+        if last is not None:
+            if sequence <= last:
+                self.out_of_order += 1
+                return False
+            if sequence != last + 1:
+                self.gaps += 1
+                self.missed += sequence - last - 1
+        self.last[data.pool_id] = sequence
+        return True
+
+    def reset(self):
+        """Forget the last sequence numbers, eg. after a reconnect where the server may restart them."""
+        self.last.clear()
+
+
+class FeedArbiter:
+    """First-arrival arbitration between redundant connections to the same market data feed.
+
+    Every `(pool_id, sequence_number)` is passed on once, from the connection that delivered it
+    first; later copies from the other connections are duplicates. Sequence numbers at or below the
+    last one passed on for the pool are never passed on, however late they arrive, as the book is
+    already newer; the window of recent updates only times how late their copies were. Per
+    connection it counts the updates it won and its duplicates, and records how far behind the
+    winner its duplicates still in the window arrived.
+
+    Usage:
+        arbiter = FeedArbiter(2)
+        if arbiter.arrived(feed, data, time.perf_counter_ns()):
+            ...  # first copy of this update
+    """
+
+    def __init__(self, feeds: int, window: int = 4096):
+        """
+        Args:
+            feeds (int): Number of connections.
+            window (int): Number of recent updates remembered to time their duplicates.
+        """
+        self.window = window
+        self.wins = [0] * feeds
+        self.duplicates = [0] * feeds
+        # Nanoseconds a connection's copy arrived after the first copy
+        self.lag = [Histogram() for _ in range(feeds)]
+        # (pool id, sequence number) -> arrival time of the first copy, oldest first
+        self._first: OrderedDict[tuple[str, int], int] = OrderedDict()
+        # Pool id -> last sequence number passed on
+        self._last: dict[str, int] = {}
+
+    def arrived(self, feed: int, data: MarketData, received_ns: int) -> bool:
+        """Record the arrival of an update on connection `feed` and return whether it is the first copy."""
+        pool_id, sequence_number = data.pool_id, data.sequence_number
+        last = self._last.get(pool_id)
+        if last is not None and sequence_number <= last:
+            self.duplicates[feed] += 1
+            first_ns = self._first.get((pool_id, sequence_number))
+            if first_ns is not None:
+                self.lag[feed].record(max(0, received_ns - first_ns))
+            return False
+        self._last[pool_id] = sequence_number
+        self._first[pool_id, sequence_number] = received_ns
+        if len(self._first) > self.window:
+            self._first.popitem(last=False)
+        self.wins[feed] += 1
+        return True
+
+    def reset(self):
+        """Forget the recent updates, eg. when every connection was down and sequence numbers may restart."""
+        self._first.clear()
+        self._last.clear()
+
+    def stats(self) -> list[dict[str, float]]:
+        """Per connection: updates won, share of all updates won, duplicates and lag behind the winner."""
+        total = sum(self.wins)
+        return [
+            {
+                "wins": wins,
+                "win_rate": wins / total if total else 0.0,
+                "duplicates": duplicates,
+                "lag_p50_us": lag.percentile(50) / 1e3,
+                "lag_p99_us": lag.percentile(99) / 1e3,
+            }
+            for wins, duplicates, lag in zip(self.wins, self.duplicates, self.lag)
+        ]
+
+
+class LatestValueQueue:
+    """Holds only the newest pending market data snapshot per pool.
+
+    Putting a snapshot for a pool that still has one pending replaces it in place, so a consumer
+    that falls behind skips straight to the latest book instead of working through a backlog.
+    Pools are handed out in the order they first became pending.
+
+    Usage:
+        queue = LatestValueQueue()
+        queue.put(data)             # producer, never blocks
+        data = await queue.get()    # consumer
+    """
+
+    def __init__(self):
+        self.pending: dict[str, MarketData] = {}
+        self._ready = asyncio.Event()
+        # Snapshots that were replaced before the consumer saw them
+        self.conflated = 0
+
+    def put(self, data: MarketData):
+        if data.pool_id in self.pending:
+            self.conflated += 1
+        self.pending[data.pool_id] = data
+        self._ready.set()
+
+    async def get(self) -> MarketData:
+        while not self.pending:
+            self._ready.clear()
+            await self._ready.wait()
+        pool_id = next(iter(self.pending))
+        return self.pending.pop(pool_id)
+
+    def __len__(self):
+        return len(self.pending)
@@ -0,0 +1,265 @@
+"""Non-blocking logging for the websocket clients.
+
+The clients log through an `EventLog` per module, named like a standard logger under
+`examples`. Without a pipeline it forwards to the `logging` logger of the same name. With a
+`LogPipeline` started, debug and info events skip `logging` altogether -- creating a `LogRecord`
+alone costs microseconds -- and are put on a queue as a plain tuple of the time, level, message
+and unformatted %-style arguments. Building the records, formatting them and writing them happen
+on a background thread, in batches, to stdout and/or a size-rotated log file. Warnings and
+errors, and records of other loggers under `examples`, take the regular `logging` path into the
+same queue, still without being formatted on the caller's thread.
+
+High-rate events, eg. every market data tick, are thinned out with a `Sampler` before anything
+is created.
+
+Usage:
+    logger = get_logger(__name__)
+    logger.info("market update received -- %s", data.pool_id)
+
+    pipeline = LogPipeline(path="logs/taker.log").start()
+    ...
+    pipeline.stop()
+"""
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+# Records the writer formats before yielding the GIL: one, so a trade waits for at most one record
+CHUNK = 1
+# Process-wide `logging` switches `lean_records` turns off while a pipeline runs
+_RECORD_FLAGS = ("logThreads", "logProcesses", "logMultiprocessing")
+
+
+class Sampler:
+    """Passes one in `every` calls, to log a high-rate event without paying for every occurrence.
+
+    Usage:
+        ticks = Sampler(100)
+        if ticks():
+            logger.debug("market update %s", data.sequence_number)
+    """
+    __slots__ = ("every", "count")
+
+    def __init__(self, every: int = 1):
+        self.every = max(1, every)
+        self.count = 0
+
+    def __call__(self) -> bool:
+        self.count += 1
+        return self.count % self.every == 0
+
+
+class EventLog:
+    """Logger for the hot path: queues debug and info events to a running `LogPipeline` as tuples.
+
+    Use `get_logger` rather than creating instances, so a pipeline started later is attached.
+    """
+    __slots__ = ("name", "logger", "queue", "level")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.logger = logging.getLogger(name)
+        # Set while a pipeline covering this logger runs
+        self.queue = None
+        self.level = logging.NOTSET
+
+    def debug(self, msg: str, *args):
+        if self.queue is None:
+            self.logger.debug(msg, *args)
+        elif self.level <= logging.DEBUG:
+            self.queue.put((time.time(), logging.DEBUG, self.name, msg, args))
+
+    def info(self, msg: str, *args):
+        if self.queue is None:
+            self.logger.info(msg, *args)
+        elif self.level <= logging.INFO:
+            self.queue.put((time.time(), logging.INFO, self.name, msg, args))
+
+    def warning(self, msg: str, *args, **kwargs):
+        self.logger.warning(msg, *args, **kwargs)
+
+    def error(self, msg: str, *args, **kwargs):
+        self.logger.error(msg, *args, **kwargs)
+
+
+_event_logs: dict[str, EventLog] = {}
+_pipelines: list["LogPipeline"] = []
+
+
+def get_logger(name: str) -> EventLog:
+    """The `EventLog` called `name`, attached to a running pipeline that covers it."""
+    event_log = _event_logs.get(name)
+    if event_log is None:
+        event_log = _event_logs[name] = EventLog(name)
+        for pipeline in _pipelines:
+            pipeline.attach(event_log)
+    return event_log
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Puts records on the queue as they are, leaving all formatting to the writer thread.
+
+    `QueueHandler` formats the message before queueing it so the record can be pickled. The
+    writer here is a thread of the same process, so that work -- and formatting the arguments --
+    can move off the event loop. Arguments must not be modified after they are logged.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class LogPipeline:
+    """Formats and writes log records on a background thread, in batches, with file rotation.
+    """
+    _STOP = object()
+
+    def __init__(self, path: str = None, stream=sys.stdout, level: int = logging.INFO, logger: str = "examples",
+                 max_bytes: int = 64 * 1024 * 1024, backup_count: int = 5, flush_interval: float = 0.05,
+                 chunk: int = CHUNK, fmt: str = LOG_FORMAT, lean_records: bool = True):
+        """
+        Args:
+            path (str, optional): Log file, rotated at `max_bytes` keeping `backup_count` old files.
+            stream (optional): Stream to also write to, eg. `sys.stdout`; None for the file only.
+            level (int): Lowest level passed on; records below it are not even created.
+            logger (str): The logger to attach to, `examples` covers the clients.
+            max_bytes (int): Size at which the log file is rotated.
+            backup_count (int): Number of rotated log files kept.
+            flush_interval (float): Seconds the writer collects events before writing them as one
+                batch, so it wakes up once per batch rather than once per event.
+            chunk (int): Events written at a time before the writer lets the event loop's thread
+                run again, bounding how long it holds the GIL.
+            fmt (str): `logging.Formatter` format of each line.
+            lean_records (bool): Skip the thread and process details when `logging` creates
+                records while the pipeline runs; they are not in the default format. The previous
+                settings are restored by `stop`.
+        """
+        self.logger = logging.getLogger(logger)
+        self.level = level
+        self.flush_interval = flush_interval
+        self.chunk = chunk
+        self.lean_records = lean_records
+        self.queue = queue.SimpleQueue()
+        self.handler = DeferredQueueHandler(self.queue)
+        formatter = logging.Formatter(fmt)
+        self.targets: list[logging.Handler] = []
+        if path:
+            self.targets.append(logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count))
+        if stream is not None:
+            self.targets.append(logging.StreamHandler(stream))
+        for target in self.targets:
+            target.setFormatter(formatter)
+        self._thread = None
+        # Process and logger settings changed by `start`, restored by `stop`
+        self._saved: dict[str, object] = None
+        self.written = 0
+        self.batches = 0
+
+    def start(self) -> "LogPipeline":
+        self._saved = {"level": self.logger.level, "propagate": self.logger.propagate}
+        if self.lean_records:
+            self._saved.update({flag: getattr(logging, flag) for flag in _RECORD_FLAGS})
+            for flag in _RECORD_FLAGS:
+                setattr(logging, flag, False)
+        self.logger.addHandler(self.handler)
+        self.logger.setLevel(self.level)
+        # The pipeline writes the records; the root logger's handlers would write them again
+        self.logger.propagate = False
+        _pipelines.append(self)
+        for event_log in _event_logs.values():
+            self.attach(event_log)
+        self._thread = threading.Thread(target=self._run, name="log-pipeline", daemon=True)
+        self._thread.start()
+        return self
+
+    def attach(self, event_log: EventLog):
+        name = self.logger.name
+        if event_log.name == name or event_log.name.startswith(name + "."):
+            event_log.queue, event_log.level = self.queue, self.level
+
+    def detach(self, event_log: EventLog):
+        if event_log.queue is self.queue:
+            event_log.queue, event_log.level = None, logging.NOTSET
+
+    def stop(self):
+        """Write the records still queued, then detach from the logger and close the targets."""
+        if self._thread is None:
+            return
+        _pipelines.remove(self)
+        for event_log in _event_logs.values():
+            self.detach(event_log)
+        self.logger.removeHandler(self.handler)
+        saved, self._saved = self._saved, None
+        self.logger.setLevel(saved.pop("level"))
+        self.logger.propagate = saved.pop("propagate")
+        for flag, value in saved.items():
+            setattr(logging, flag, value)
+        self.queue.put(self._STOP)
+        self._thread.join()
+        self._thread = None
+        for target in self.targets:
+            target.close()
+
+    def _run(self):
+        get, get_nowait = self.queue.get, self.queue.get_nowait
+        while True:
+            # Block for the first event, give the others time to arrive, then take them all
+            batch = [get()]
+            if batch[0] is not self._STOP:
+                time.sleep(self.flush_interval)
+            try:
+                while True:
+                    batch.append(get_nowait())
+            except queue.Empty:
+                pass
+            stop = batch[-1] is self._STOP
+            if stop:
+                batch.pop()
+            self.write(batch)
+            if stop:
+                return
+
+    @staticmethod
+    def record(event) -> logging.LogRecord:
+        """The `LogRecord` of a queued event, built from the tuple of an `EventLog`."""
+        if isinstance(event, logging.LogRecord):
+            return event
+        created, level, name, msg, args = event
+        record = logging.LogRecord(name, level, "", 0, msg, args, None)
+        record.created, record.msecs = created, int(created * 1000) % 1000
+        return record
+
+    def write(self, batch: list):
+        """Format and write a batch to every target, flushing each target once."""
+        records = [self.record(event) for event in batch]
+        for target in self.targets:
+            target.acquire()
+            try:
+                rotating = isinstance(target, logging.handlers.RotatingFileHandler)
+                for index, record in enumerate(records, 1):
+                    if record.levelno >= target.level:
+                        try:
+                            line = target.format(record) + target.terminator
+                            # Same check as `shouldRollover`, without formatting the record twice
+                            if rotating and target.maxBytes > 0 and target.stream.tell() + len(line) >= target.maxBytes:
+                                target.doRollover()
+                            target.stream.write(line)
+                        except Exception:
+                            target.handleError(record)
+                    if index % self.chunk == 0:
+                        # Let the event loop's thread take the GIL between chunks
+                        time.sleep(0)
+                target.flush()
+            finally:
+                target.release()
+        self.written += len(batch)
+        self.batches += 1
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
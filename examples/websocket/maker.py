@@ -1,109 +1,181 @@
 import asyncio
-import websockets
 import random
-import uuid
-from decimal import Decimal
 
-import orjson as json
 from .base import WebSocketClient
+from .logs import get_logger
+from .messages import MakerTradeMessage, QuoteReject
+from .pools import DEFAULT_POOL_ID, MakerPool
+from .quote_encoder import QuoteIdGenerator
+from .send_queue import PRIORITY_QUOTE, PRIORITY_RESPONSE
+from .trade_response import DecisionCallback, TradeDecision, TradeResponder
+from examples.ledger import BalanceLedger
+
+logger = get_logger(__name__)
+
+# Shortest wait between two refresh checks of a pool, see `MakerClient.refresh_pool_quotes`
+_REFRESH_MIN_WAIT = 0.01
 
 
 class MakerClient(WebSocketClient):
     """A WebSocket client for simulating a market maker.
     """
 
-    def __init__(self, uri, headers, pool_id: str = "DCN-ALPHA_common", valid_until_time: int = 5) :
+    def __init__(self, uri, headers, pool_id: str = DEFAULT_POOL_ID, valid_until_time: int = 5,
+                 decide: DecisionCallback = None, response_window: float = 0.1, response_budget: float = 0.5,
+                 pools: list = None, quote_threshold_ticks: int = 0, max_quote_rate: float = None,
+                 quote_refresh_before: float = 0.5, **options) :
         """
         Initialize the MakerClient with given parameters.
 
         Args:
             uri (str): WebSocket server URI.
             headers (dict): Headers for WebSocket connection.
-            pool_id (str): Identifier for the trading pool.
+            pool_id (str): Identifier for the trading pool, when quoting a single pool.
             valid_until_time (int): Validity duration for quotes.
+            decide (Callable, optional): Decides on trade REQUESTs, returning a `TradeDecision` directly
+                or as an awaitable. Defaults to `decide_trade`, which accepts or rejects at random.
+            response_window (float): Seconds from a REQUEST's timestamp the maker has to respond.
+            response_budget (float): Share of the window `decide` may take before the trade is safely rejected.
+            pools (list, optional): Pool ids or `MakerPool`s to quote on this one connection, instead of `pool_id`.
+            quote_threshold_ticks (int): Price ticks some rung must move before a pool is re-quoted;
+                0 sends every quote. Applies to pools given by id.
+            max_quote_rate (float, optional): Most quotes per second per pool given by id; quotes
+                made faster are merged into the newest.
+            quote_refresh_before (float): Seconds before a quote expires from which an unchanged
+                ladder is quoted again.
+            **options: Passed on to `WebSocketClient`, eg. `header_factory` or `standby`.
         """
-        super().__init__(uri, headers)
-        self.pool_id = pool_id
+        super().__init__(uri, headers, **options)
         self.valid_until_time = valid_until_time
+        self.quote_throttle = {
+            "threshold_ticks": quote_threshold_ticks, "max_quote_rate": max_quote_rate, "refresh_before": quote_refresh_before,
+        }
+        # Quotes waiting for their pool's rate limit
+        self._flushes: set[asyncio.Task] = set()
+        # Quote ids are unique across all pools of the connection
+        self.quote_ids = QuoteIdGenerator()
+        # pool id -> per-pool quoting state, the routing table for inbound messages
+        self.pools: dict[str, MakerPool] = {}
+        for pool in pools or [pool_id]:
+            self.add_pool(pool)
+        self.pool_id = next(iter(self.pools))
 
-        # Market making parameters
-        self.true_mid = Decimal('1.0')
-        self.true_mu = 0
-        self.true_sigma = 0.01
-        
-        # Quote time generation
-        self.quote_every_sec = 5
-        self.quote_every_mu = 10
-        self.quote_every_sigma = 2
-
-        # Quote randomised bid/ask spread generation
-        self.spread_mu = 0.001
-        self.spread_sigma = 0.0001
-
-        # NOTE: Sizes are fixed per stream see liquidity_levels REST endpoint
-        self.size_premium = {
-            "1": Decimal("0.0"), 
-            "2": Decimal("0.01"), 
-            "3": Decimal("0.02"), 
-            "5": Decimal("0.05"), 
-            "10": Decimal("0.10"), 
-            "20": Decimal("0.20")
+        # Deadline-bounded accept/reject path for trade REQUESTs
+        self.trade_responder = TradeResponder(
+            decide or self.decide_trade, window=response_window, budget_share=response_budget, clock=lambda: self.now
+        )
+
+        # Position changes from accepted and confirmed trades, updated in O(1) per message
+        self.ledger = BalanceLedger()
+
+        self.handlers = {
+            MakerTradeMessage.message_type: self.handle_maker_trade,
+            QuoteReject.message_type: self.handle_quote_reject,
         }
 
-    async def simulate_true_mid(self):       
-        """Periodically update the true mid price based on a normal distribution.
+    def add_pool(self, pool) -> MakerPool:
+        """Quote another pool on this connection.
+
+        Args:
+            pool (str | MakerPool): A pool id, quoted with the default parameters, or a configured `MakerPool`.
+        """
+        if isinstance(pool, str):
+            pool = MakerPool(self.wallet, pool, valid_until_time=self.valid_until_time, quote_ids=self.quote_ids,
+                             **self.quote_throttle)
+        self.pools[pool.pool_id] = pool
+        return pool
+
+    async def simulate_true_mid(self):
+        """Periodically update the true mid price of every pool.
+        """
+        await asyncio.gather(*(self.simulate_pool_true_mid(pool) for pool in self.pools.values()))
+
+    async def simulate_pool_true_mid(self, pool: MakerPool):
+        """Periodically update the true mid price of a pool based on a normal distribution.
         """
         while True:
-            await asyncio.sleep(self.quote_every_sec)
-            self.true_mid += Decimal(f"{random.gauss(self.true_mu, self.true_sigma):.2f}")
+            await self.clock.sleep(pool.quote_every_sec)
+            pool.update_true_mid()
 
     async def simulate_quotes(self):
-        """Periodically generate and send quotes to the WebSocket server.
+        """Generate and send quotes for every pool, each pool on its own schedule, and refresh
+        quotes about to expire.
+        """
+        await asyncio.gather(
+            *(self.simulate_pool_quotes(pool) for pool in self.pools.values()),
+            *(self.refresh_pool_quotes(pool) for pool in self.pools.values()),
+        )
+
+    async def simulate_pool_quotes(self, pool: MakerPool):
+        """Periodically generate and send quotes for a pool to the WebSocket server.
         """
         while True:
-            await asyncio.sleep(random.gauss(self.quote_every_mu, self.quote_every_sigma))
+            await self.clock.sleep(pool.next_quote_delay())
+            await self.publish_quote(pool, *pool.make_ladder())
 
-            bid = self.true_mid - Decimal(f"{max(0, random.gauss(self.spread_mu, self.spread_sigma)):.2f}")
-            bids = [f"{bid - size_premium:.2f}" for size_premium in self.size_premium.values()]
-            ask = self.true_mid + Decimal(f"{max(0, random.gauss(self.spread_mu, self.spread_sigma)):.2f}")
-            asks = [f"{ask + size_premium:.2f}" for size_premium in self.size_premium.values()]
-            
-            quote = {
-                "type": "quote",
-                "data": {
-                    "sending_time": self.now,
-                    "quote_id": f"{uuid.uuid4()}",
-                    "wallet_id": self.wallet,
-                    "pool_id": self.pool_id,
-                    "bid_px": bids,
-                    "offer_px": asks,
-                    "valid_until_time": self.valid_until_time
-                }
-            }
-            print(f"Sending quote -- sending time: {self.now} | bid: {bids[0]} | ask: {asks[0]}")
-            await self.send_message(json.dumps(quote))
+    async def refresh_pool_quotes(self, pool: MakerPool):
+        """Re-send the last ladder quoted for `pool` once it is due for a refresh, keeping the quote
+        alive when the throttle suppressed every ladder made since.
 
-    async def handle_message(self, message):
-        """Handle incoming WebSocket messages.
+        Only runs with a threshold: without one every ladder is sent, and nothing needs refreshing.
+        """
+        throttle = pool.throttle
+        if not throttle.threshold:
+            return
+        while True:
+            refresh_at = throttle.refresh_at()
+            if refresh_at is not None and refresh_at <= self.now:
+                await self.publish_quote(pool, *throttle.last)
+                refresh_at = throttle.refresh_at()
+            # Before the first quote check back after a refresh period; a refresh still due is
+            # waiting for the rate limit, and its flush sends it
+            wait = throttle.refresh_before if refresh_at is None else refresh_at - self.now
+            await self.clock.sleep(max(wait, throttle.min_interval, _REFRESH_MIN_WAIT))
 
-        Args:
-            message (str): The incoming WebSocket message.
+    async def publish_quote(self, pool: MakerPool, bids: list[int], asks: list[int]):
+        """Quote a new ladder for `pool`, subject to the pool's `QuoteThrottle`.
+
+        Ladders within the threshold of the last quote are dropped until it is about to expire, and
+        a ladder due before the rate limit allows waits in the background, merged with any newer one.
         """
-        data = json.loads(message)
-        message_type = data.get('type')
-        message = json.loads(data["data"])
-
-        if message_type == 'makertrademessage':
-            await self.handle_maker_trade(message)
-        elif message_type == 'quotereject':
-            await self.handle_quote_reject(message)
-        else:
-            await self.handle_unknown(data)
-
-    async def handle_quote_reject(self, data: dict):
+        delay = pool.throttle.offer(bids, asks, self.now)
+        if delay is None:
+            return
+        if delay:
+            task = asyncio.create_task(self.flush_quote(pool, delay))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+            return
+        await self.send_quote(pool, bids, asks)
+
+    async def flush_quote(self, pool: MakerPool, delay: float):
+        await self.clock.sleep(delay)
+        ladder = pool.throttle.flush(self.now)
+        if ladder is not None:
+            await self.send_quote(pool, *ladder)
+
+    async def send_quote(self, pool: MakerPool, bids: list[int], asks: list[int]):
+        sending_time = self.now
+        quote, bid_px, offer_px = pool.encode_quote(sending_time, bids, asks)
+        # An older quote of the pool that is still unsent is replaced rather than sent as well
+        if not await self.send_message(quote, PRIORITY_QUOTE, key=pool.pool_id):
+            # Dropped while disconnected: the throttle must not suppress the next ladder against it
+            return
+        pool.throttle.sent_quote(bids, asks, sending_time, pool.valid_until_time)
+        logger.info("Sending quote -- %s | sending time: %s | bid: %s | ask: %s", pool.pool_id, sending_time, bid_px[0], offer_px[0])
+
+    def quote_stats(self) -> dict[str, dict[str, int]]:
+        """Quotes sent, suppressed and coalesced per pool."""
+        return {pool_id: pool.throttle.stats() for pool_id, pool in self.pools.items()}
+
+    def make_quote(self, sending_time: float, pool_id: str = None) -> tuple[bytes, list[str], list[str]]:
+        """Build a quote for `pool_id`, by default the first pool, see `MakerPool.make_quote`."""
+        return self.pools[pool_id or self.pool_id].make_quote(sending_time)
+
+    async def handle_quote_reject(self, data: QuoteReject):
         """Handle a quote reject due to bad parameters.
         
-        Args (dict): the quote reject message data.
+        Args (QuoteReject): the quote reject message data.
 
 
         QuoteReject message:
@@ -113,17 +185,20 @@ class MakerClient(WebSocketClient):
                 "quote_id": "str",
                 "wallet_id": "str",
                 "pool_id": "str",
-                "msg": "str"
+                "reason": "str"
             }
         }
         """
-        print(f"Quote rejected: {data}")
+        pool = self.pools.get(data.pool_id)
+        if pool is not None:
+            pool.quote_rejects += 1
+        logger.warning("Quote rejected: %s", data)
 
-    async def handle_maker_trade(self, data: dict):
+    async def handle_maker_trade(self, data: MakerTradeMessage):
         """Handle trade messages from takers.
 
         Args:
-            data (dict): The trade message data.
+            data (MakerTradeMessage): The trade message data.
             
         For this we simulate the decision-making process to accept or reject the offer. 
         We get several acks on this stream type. 
@@ -160,33 +235,48 @@ class MakerClient(WebSocketClient):
         }
         """
         # Handle taker trade messages (filled or rejected)
-        print(f"Maker trade message received: {data}")
-
-        if data['status'] == 'REQUEST':    
-            # Randomly accept or reject the response
-            decision = random.choice([
-                dict(status='ACCEPT', msg='Trade Accepted', executed_quantity=data['requested_quantity'], executed_price=data['requested_price']), 
-                dict(status='REJECT', msg='Trade Rejected', executed_quantity="0", executed_price="0")
-            ])
-            data["timestamp"] = self.now
-            data.update(decision)
-            message = {
-                "type": "makertrademessage",
-                "data": data
-            } 
-            await self.send_message(json.dumps(message))
-            print(f"Maker trade response sent: {message}")
-
-        elif data["status"] in ["DONE", "NOT_DONE"]:
-            pass # Process fills or ignore rejects
+        pool = self.pools.get(data.pool_id)
+        if data.status == 'REQUEST':    
+            # Answer first, everything else happens after the response is on its way
+            received_at = self.now
+            response, decision = await self.trade_responder.respond(data, received_at)
+            # Goes out ahead of any queued quotes
+            await self.send_message(response, PRIORITY_RESPONSE)
+            if pool is not None:
+                pool.trade_requests += 1
+            record = self.trade_responder.records[-1]
+            logger.info("Maker trade response sent: trade %s %s %s @ %s | receive to send: %.3f ms | margin: %.3f ms",
+                        data.trade_id, decision.status, decision.executed_quantity, decision.executed_price,
+                        record.receive_to_send * 1e3, record.margin * 1e3)
+            self.ledger.apply_maker_trade(data._replace(
+                status=decision.status, executed_quantity=decision.executed_quantity, executed_price=decision.executed_price
+            ))
+
+        elif data.status in ["DONE", "NOT_DONE"]:
+            logger.info("Maker trade message received: %s", data)
+            if pool is not None and data.status == "DONE":
+                pool.trades_done += 1
+            # Process fills or release the reservation of trades that did not complete
+            self.ledger.apply_maker_trade(data)
+
+    def decide_trade(self, data: MakerTradeMessage) -> TradeDecision:
+        """Decide on a trade REQUEST. This example randomly accepts or rejects it.
+
+        Override, or pass `decide` to the constructor, to plug in a strategy. Decisions that take
+        longer than the response budget are replaced by a safe reject.
+        """
+        return random.choice([TradeDecision.accept(data), TradeDecision.reject()])
         
     async def connect(self):
         """Connect to the WebSocket server and run the market making simulations.
+
+        The simulations keep running across reconnects; quotes due while disconnected are not sent.
         """
-        async with websockets.connect(self.uri, extra_headers=self.headers) as websocket:
-            self.websocket = websocket
-            await asyncio.gather(
-                self.simulate_true_mid(),
-                self.simulate_quotes(),
-                self.handle_messages(websocket)  # Add this to listen to incoming messages
-            )
+        simulations = [asyncio.create_task(self.simulate_true_mid()), asyncio.create_task(self.simulate_quotes())]
+        try:
+            await super().connect()
+        finally:
+            simulations += self._flushes
+            for task in simulations:
+                task.cancel()
+            await asyncio.gather(*simulations, return_exceptions=True)
@@ -1,37 +1,162 @@
-import orjson as json
+import asyncio
+import functools
+import time
+from typing import Any
 
 from .base import WebSocketClient
+from .conflation import FeedArbiter, LatestValueQueue, SequenceTracker
+from .logs import get_logger
+from .messages import Heartbeat, MarketData
+
+logger = get_logger(__name__)
 
 
 class MarketDataClient(WebSocketClient):
     """A WebSocket client for handling market data messages.
     """
 
-    def __init__(self, uri: str, headers: dict[str, str], message_handler: callable = None):
+    def __init__(self, uri: str, headers: dict[str, str], message_handler: callable = None, conflate: bool = False,
+                 feeds: int | list[str] = 1, **options):
         """Initialize the MarketDataClient with given parameters.
 
         Args:
             uri (str): WebSocket server URI.
             headers (dict): Headers for WebSocket connection.
             message_handler (Callable, optional): Function to handle incoming market data messages.
+            conflate (bool): Deliver only the newest snapshot per pool to `message_handler`, from a
+                separate task, instead of awaiting it inline for every tick. A slow handler then
+                always sees the latest book and never delays reading the socket.
+            feeds (int | list[str]): Redundant connections to the feed: a number of connections to
+                `uri`, or one connection per URI given. Each update is delivered once, from the
+                connection that received it first, see `stats()["feeds"]`.
+            **options: Passed on to `WebSocketClient`, eg. `header_factory` or `standby`.
+
+        Handlers for single pools are added with `add_pool_handler`; `message_handler` then only
+        receives the pools without one of their own.
         """
-        super().__init__(uri, headers)
+        super().__init__(uri, headers, **options)
         self.message_handler = message_handler
+        # pool id -> handler, looked up once per update
+        self.pool_handlers: dict[str, callable] = {}
+        self.handlers = {
+            MarketData.message_type: self.handle_market_data,
+            Heartbeat.message_type: self.handle_heartbeat,
+        }
+        self.sequences = SequenceTracker()
+        self.conflate = conflate
+        self.latest = LatestValueQueue() if conflate else None
+
+        # Redundant connections, each a `MarketDataFeed` arbitrated by the first arrival
+        uris = [uri] * feeds if isinstance(feeds, int) else list(feeds)
+        self.feeds = [MarketDataFeed(self, index, feed_uri, **options) for index, feed_uri in enumerate(uris)] if len(uris) > 1 else []
+        self.arbiter = FeedArbiter(len(self.feeds)) if self.feeds else None
+
+    @property
+    def connected(self) -> bool:
+        """Whether any feed connection is up; with redundant feeds `websocket` itself stays None."""
+        if self.feeds:
+            return any(feed.websocket is not None for feed in self.feeds)
+        return self.websocket is not None
+
+    def add_pool_handler(self, pool_id: str, handler: callable):
+        """Route the market data of `pool_id` to `handler` instead of the default message handler.
+        """
+        self.pool_handlers[pool_id] = handler
 
-    async def handle_message(self, message):
-        """Handle incoming WebSocket messages.
+    async def connect(self):
+        consumer = asyncio.create_task(self.consume_latest()) if self.conflate else None
+        try:
+            if self.feeds:
+                for feed in self.feeds:
+                    feed.metrics, feed.recorder = self.metrics, self.recorder
+                await asyncio.gather(*(feed.connect() for feed in self.feeds))
+            else:
+                await super().connect()
+        finally:
+            if consumer is not None:
+                consumer.cancel()
+                await asyncio.gather(consumer, return_exceptions=True)
+
+    async def handle_messages(self, websocket):
+        # Sequence numbers are only compared within a connection
+        self.sequences.reset()
+        await super().handle_messages(websocket)
+
+    async def handle_feed_data(self, feed: int, data: MarketData):
+        """Pass on the first copy of an update received on any of the redundant connections.
+        """
+        if self.arbiter.arrived(feed, data, time.perf_counter_ns()):
+            await self.handle_market_data(data)
+
+    async def handle_market_data(self, data: MarketData):
+        """Pass a decoded market data message on to the message handler, or to the latest value
+        queue in conflation mode. Updates older than the last one seen for the pool are dropped.
 
         Args:
-            message (str): The incoming WebSocket message.
-        """
-        data = json.loads(message)
-        message_type = data.get('type')
-        message = json.loads(data["data"])
-
-        if message_type == 'marketdata':
-            if self.message_handler:
-                await self.message_handler(message)
-        elif message_type == 'alphastarheartbeat':
-            await self.handle_heartbeat(message)
-        else:
-            await self.handle_unknown(data)
+            data (MarketData): The decoded market data message.
+        """
+        if not self.sequences.observe(data):
+            return
+        if self.latest is not None:
+            self.latest.put(data)
+            return
+        handler = self.pool_handlers.get(data.pool_id, self.message_handler)
+        if handler:
+            await handler(data)
+
+    async def consume_latest(self):
+        """Feed the newest snapshot of each pool to the message handler as fast as it can take them.
+        """
+        while True:
+            data = await self.latest.get()
+            handler = self.pool_handlers.get(data.pool_id, self.message_handler)
+            if handler:
+                try:
+                    await handler(data)
+                except Exception as e:
+                    logger.error("Market data handler failed: %r", e)
+
+    def stats(self) -> dict[str, int | list[dict[str, Any]]]:
+        """Counts of updates dropped as out of order, conflated before delivery, and sequence gaps,
+        and with redundant feeds the per-connection counts under "feeds".
+        """
+        stats = {
+            "dropped": self.sequences.out_of_order,
+            "conflated": self.latest.conflated if self.latest is not None else 0,
+            "gaps": self.sequences.gaps,
+            "missed": self.sequences.missed,
+        }
+        if self.arbiter is not None:
+            stats["feeds"] = [
+                {"uri": feed.uri, "outages": len(feed.outages), **feed_stats}
+                for feed, feed_stats in zip(self.feeds, self.arbiter.stats())
+            ]
+        return stats
+
+
+class MarketDataFeed(WebSocketClient):
+    """One of the redundant connections of a `MarketDataClient`, passing its updates on for arbitration.
+    """
+
+    def __init__(self, client: MarketDataClient, index: int, uri: str, **options):
+        """
+        Args:
+            client (MarketDataClient): The client the updates are delivered through.
+            index (int): Position of this connection in `client.feeds`.
+            uri (str): WebSocket server URI of this connection.
+            **options: Passed on to `WebSocketClient`.
+        """
+        super().__init__(uri, client.headers, **options)
+        self.client = client
+        self.handlers = {
+            MarketData.message_type: functools.partial(client.handle_feed_data, index),
+            Heartbeat.message_type: self.handle_heartbeat,
+        }
+
+    async def handle_messages(self, websocket):
+        # The server may restart sequence numbers, but only a connection that comes up while all
+        # the others are down can tell
+        if not any(feed.websocket for feed in self.client.feeds if feed is not self):
+            self.client.sequences.reset()
+            self.client.arbiter.reset()
+        await super().handle_messages(websocket)
@@ -0,0 +1,189 @@
+import asyncio
+import re
+import time
+from typing import Any
+
+import orjson as json
+
+# Sub-bucket resolution of the histograms: 2**(SUB_BUCKET_BITS - 1) buckets per power of two,
+# ie. values are recorded with a relative error of at most ~3%.
+SUB_BUCKET_BITS = 6
+_HALF = 1 << (SUB_BUCKET_BITS - 1)
+_BUCKETS = (64 + 2) * _HALF
+
+
+class Histogram:
+    """Log-linear (HDR-style) histogram of non-negative integer values, eg. latencies in nanoseconds.
+
+    Values below 2**SUB_BUCKET_BITS are counted exactly; larger values fall into one of a fixed
+    number of sub-buckets per power of two. Recording is a few integer operations and a list
+    increment, with no allocation; count, mean and max are derived from the buckets when read.
+    """
+    __slots__ = ("counts",)
+
+    def __init__(self):
+        self.counts = [0] * _BUCKETS
+
+    def record(self, value: int):
+        """Count `value`, an integer; negative values, eg. from clock skew, are counted as 0."""
+        if value < 0:
+            value = 0
+        shift = value.bit_length() - SUB_BUCKET_BITS
+        self.counts[value if shift <= 0 else shift * _HALF + (value >> shift)] += 1
+
+    @staticmethod
+    def bucket_value(index: int) -> int:
+        """Highest value counted in bucket `index`."""
+        if index < 2 * _HALF:
+            return index
+        shift = index // _HALF - 1
+        return ((index - shift * _HALF + 1) << shift) - 1
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    @property
+    def total(self) -> int:
+        """Approximate sum of the recorded values, from the bucket upper bounds."""
+        return sum(count * self.bucket_value(index) for index, count in enumerate(self.counts) if count)
+
+    @property
+    def max(self) -> int:
+        for index in range(_BUCKETS - 1, -1, -1):
+            if self.counts[index]:
+                return self.bucket_value(index)
+        return 0
+
+    def percentile(self, pct: float) -> int:
+        count = self.count
+        if not count:
+            return 0
+        rank = max(1, round(pct / 100 * count))
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return self.bucket_value(index)
+        return 0
+
+    def reset(self):
+        self.counts = [0] * _BUCKETS
+
+    def snapshot(self) -> dict[str, float]:
+        count = self.count
+        return {
+            "count": count,
+            "mean": self.total / count if count else 0,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "p99.9": self.percentile(99.9),
+            "max": self.max,
+        }
+
+
+class Metrics:
+    """Registry of latency histograms and counters shared by one or more clients.
+
+    Usage:
+        metrics = Metrics()
+        client.metrics = metrics
+        metrics.histogram("handler.marketdata").record(elapsed_ns)
+        metrics.count("reconnects")
+    """
+
+    def __init__(self, prefix: str = "alphastar"):
+        self.prefix = prefix
+        self.histograms: dict[str, Histogram] = {}
+        self.counters: dict[str, int] = {}
+        self.started_at = time.time()
+
+    def histogram(self, name: str) -> Histogram:
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        return histogram
+
+    def count(self, name: str, value: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def snapshot(self, reset: bool = False) -> dict[str, Any]:
+        """Current values of all metrics, latencies in the recorded unit (nanoseconds).
+
+        Args:
+            reset (bool): Reset the histograms afterwards, so each snapshot covers one interval.
+        """
+        now = time.time()
+        snapshot = {
+            "timestamp": now,
+            "interval": now - self.started_at,
+            "counters": dict(self.counters),
+            "histograms": {name: histogram.snapshot() for name, histogram in self.histograms.items()},
+        }
+        if reset:
+            for histogram in self.histograms.values():
+                histogram.reset()
+            self.started_at = now
+        return snapshot
+
+    def prometheus(self) -> str:
+        """Metrics in the Prometheus text exposition format. Histograms are exported as summaries
+        in seconds.
+        """
+        lines = []
+        for name, value in self.counters.items():
+            metric = self._metric_name(name) + "_total"
+            lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+        for name, histogram in self.histograms.items():
+            metric = self._metric_name(name) + "_seconds"
+            lines.append(f"# TYPE {metric} summary")
+            for quantile in (0.5, 0.9, 0.99, 0.999):
+                lines.append(f'{metric}{{quantile="{quantile}"}} {histogram.percentile(quantile * 100) / 1e9}')
+            lines += [f"{metric}_sum {histogram.total / 1e9}", f"{metric}_count {histogram.count}"]
+        return "\n".join(lines) + "\n"
+
+    def _metric_name(self, name: str) -> str:
+        return re.sub(r"[^a-zA-Z0-9_]", "_", f"{self.prefix}_{name}")
+
+
+async def log_snapshots(metrics: Metrics, path: str, interval: float = 10.0):
+    """Append a JSON snapshot of `metrics` to the file at `path` every `interval` seconds.
+
+    Histograms are reset after each snapshot, so every line covers one interval.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(interval)
+        line = json.dumps(metrics.snapshot(reset=True)) + b"\n"
+        await loop.run_in_executor(None, _append, path, line)
+
+
+def _append(path: str, data: bytes):
+    with open(path, "ab") as f:
+        f.write(data)
+
+
+async def serve_prometheus(metrics: Metrics, host: str = "127.0.0.1", port: int = 9100) -> asyncio.AbstractServer:
+    """Serve `metrics` as Prometheus text on http://host:port/metrics.
+
+    Returns the running server; close it to stop serving.
+    """
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request = await reader.readuntil(b"\r\n\r\n")
+            if request.startswith(b"GET /metrics"):
+                status, body = b"200 OK", metrics.prometheus().encode()
+            else:
+                status, body = b"404 Not Found", b"not found\n"
+            writer.write(
+                b"HTTP/1.1 " + status + b"\r\nContent-Type: text/plain; version=0.0.4\r\n"
+                b"Content-Length: " + str(len(body)).encode() + b"\r\nConnection: close\r\n\r\n" + body
+            )
+            await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
@@ -0,0 +1,256 @@
+"""In-flight order tracking for takers.
+
+`OrderTracker` keeps every `quoteresponse` sent until its `takertrademessage` comes back, keyed by
+`quote_resp_id` (the `quote_id` of the response), so matching a response is one dictionary lookup.
+Orders without a response are filed in a `TimingWheel` and expired in O(1) each once their timeout
+has passed. New orders are admitted against a cap on outstanding orders and an optional orders per
+second limit per pool; `admit` waits until both allow another order.
+
+Every response records how long the order took, in nanoseconds:
+    order.round_trip      local send to local receive
+    order.to_match        `taker_timestamp` (the order's `sending_time`) to `match_timestamp`
+    order.match_to_recv   `match_timestamp` to local receive
+
+Usage:
+    tracker = OrderTracker(timeout=5, max_outstanding=16, pool_rate=10)
+    if not tracker.try_admit(pool_id):
+        await tracker.admit(pool_id)
+    tracker.track(quote_resp_id, route, price, time.time())
+    ...
+    order = tracker.complete(trade_message, time.time())
+"""
+import asyncio
+import math
+import time
+from typing import Any, Hashable
+
+from .messages import TakerTradeMessage
+from .metrics import Metrics
+from .router import Route
+from examples.ratelimit import RateLimiter
+
+
+class InFlightOrder:
+    """An order sent and not yet answered.
+    """
+    __slots__ = ("quote_resp_id", "pool_id", "symbol", "side", "quantity", "price", "sent_at", "slot")
+
+    def __init__(self, quote_resp_id: str, pool_id: str, symbol: str, side: str, quantity: int, price: int, sent_at: float):
+        self.quote_resp_id = quote_resp_id
+        self.pool_id = pool_id
+        self.symbol = symbol
+        self.side = side
+        # Fixed-point quantity and price, see examples.fixedpoint
+        self.quantity = quantity
+        self.price = price
+        self.sent_at = sent_at
+        # The timing wheel slot holding the order
+        self.slot: int = None
+
+
+class TimingWheel:
+    """Hashed timing wheel of deadlines: adding, cancelling and expiring an entry are O(1).
+
+    Time is cut into ticks of `resolution` seconds and an entry is filed in the slot of the tick its
+    deadline falls in, rounded up. `advance` empties the slots of the ticks that have passed, so
+    entries expire between 0 and `resolution` seconds after their deadline. Deadlines further out
+    than the wheel's `span` go round it more than once, and are only expired on their own lap.
+    """
+
+    def __init__(self, span: float, resolution: float = 0.05):
+        """
+        Args:
+            span (float): Seconds covered by one turn of the wheel, eg. the longest timeout.
+            resolution (float): Seconds per tick.
+        """
+        self.resolution = resolution
+        self.slots: list[dict[Hashable, tuple[int, Any]]] = [{} for _ in range(math.ceil(span / resolution) + 1)]
+        # The last tick expired, None until the wheel is first used
+        self.tick: int = None
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def add(self, key: Hashable, value: Any, deadline: float) -> int:
+        """File `value` under `key` to expire at `deadline`.
+
+        Returns:
+            int: The slot, for `remove`.
+        """
+        tick = math.ceil(deadline / self.resolution)
+        if self.tick is None:
+            self.tick = tick - 1
+        # A deadline already passed expires on the next advance
+        tick = max(tick, self.tick + 1)
+        slot = tick % len(self.slots)
+        self.slots[slot][key] = (tick, value)
+        self.size += 1
+        return slot
+
+    def remove(self, key: Hashable, slot: int) -> Any:
+        """Cancel the entry `key`, returning its value or None if it was not in the wheel."""
+        entry = self.slots[slot].pop(key, None)
+        if entry is None:
+            return None
+        self.size -= 1
+        return entry[1]
+
+    def advance(self, now: float) -> list[Any]:
+        """Move the wheel to `now`.
+
+        Returns:
+            list: The values of the entries whose deadline has passed, in deadline order.
+        """
+        target = math.floor(now / self.resolution)
+        if self.tick is None:
+            self.tick = target
+            return []
+        expired = []
+        slots = self.slots
+        # Every slot is visited at most once, however long since the last advance
+        for tick in range(self.tick + 1, min(target, self.tick + len(slots)) + 1):
+            slot = slots[tick % len(slots)]
+            if not slot:
+                continue
+            for key, (due, value) in list(slot.items()):
+                if due <= target:
+                    del slot[key]
+                    expired.append(value)
+        self.size -= len(expired)
+        self.tick = max(self.tick, target)
+        return expired
+
+
+class OrderTracker:
+    """Outstanding orders of a taker: correlation, timeouts, caps and latencies.
+    """
+
+    def __init__(self, timeout: float = 5.0, max_outstanding: int = 16, pool_rate: float = None, pool_burst: float = None,
+                 resolution: float = 0.05, metrics: Metrics = None):
+        """
+        Args:
+            timeout (float): Seconds to wait for an order's response before expiring it.
+            max_outstanding (int): Most orders in flight at once, across all pools.
+            pool_rate (float, optional): Most orders per second sent to a pool, unlimited by default.
+            pool_burst (float, optional): Orders a pool can be sent at once within its rate, `pool_rate`
+                by default.
+            resolution (float): Seconds between timeout checks; orders expire up to this late.
+            metrics (Metrics, optional): Registry for the latency histograms, a new one by default.
+        """
+        self.timeout = timeout
+        self.max_outstanding = max_outstanding
+        self.pool_rate = pool_rate
+        self.pool_burst = pool_burst
+        self.resolution = resolution
+        self.metrics = metrics or Metrics()
+
+        # quote_resp_id -> order
+        self.orders: dict[str, InFlightOrder] = {}
+        self.wheel = TimingWheel(timeout, resolution)
+        # pool id -> order rate limit
+        self.limits: dict[str, RateLimiter] = {}
+        # Set whenever an order leaves, for orders waiting in `admit`
+        self.capacity = asyncio.Event()
+
+        self.sent = 0
+        self.completed = 0
+        self.timeouts = 0
+        # Responses to orders that had already expired, or were never tracked
+        self.unmatched = 0
+        self.admission_waits = 0
+
+    def __len__(self) -> int:
+        return len(self.orders)
+
+    def limit(self, pool_id: str) -> RateLimiter | None:
+        if self.pool_rate is None:
+            return None
+        limiter = self.limits.get(pool_id)
+        if limiter is None:
+            limiter = self.limits[pool_id] = RateLimiter(self.pool_rate, self.pool_burst)
+        return limiter
+
+    def try_admit(self, pool_id: str) -> bool:
+        """Admit an order to `pool_id` if neither cap is hit, without waiting."""
+        if len(self.orders) >= self.max_outstanding:
+            return False
+        limiter = self.limit(pool_id)
+        return limiter is None or limiter.try_acquire()
+
+    async def admit(self, pool_id: str) -> float:
+        """Wait until an order to `pool_id` is within both caps.
+
+        The caller must `track` the order before its next await, or the slot may be taken again.
+
+        Returns:
+            float: Seconds waited.
+        """
+        self.admission_waits += 1
+        start = time.perf_counter_ns()
+        limiter = self.limit(pool_id)
+        if limiter is not None:
+            await limiter.acquire()
+        while len(self.orders) >= self.max_outstanding:
+            self.capacity.clear()
+            await self.capacity.wait()
+        waited = time.perf_counter_ns() - start
+        self.metrics.histogram("order.admission_wait").record(waited)
+        return waited / 1e9
+
+    def track(self, quote_resp_id: str, route: Route, price: int, sent_at: float) -> InFlightOrder:
+        """Start tracking an order sent at `sent_at`, at `price` on `route`'s pool."""
+        order = InFlightOrder(quote_resp_id, route.pool_id, route.symbol, route.side, route.quantity, price, sent_at)
+        self.orders[quote_resp_id] = order
+        order.slot = self.wheel.add(quote_resp_id, order, sent_at + self.timeout)
+        self.sent += 1
+        return order
+
+    def complete(self, data: TakerTradeMessage, received_at: float) -> InFlightOrder | None:
+        """Match a response to its order and record the order's latencies.
+
+        Returns:
+            InFlightOrder: The order, or None if it had expired or was not sent by this tracker.
+        """
+        order = self.orders.pop(data.quote_id, None)
+        if order is None:
+            self.unmatched += 1
+            return None
+        self.wheel.remove(order.quote_resp_id, order.slot)
+        self.capacity.set()
+        self.completed += 1
+
+        histogram = self.metrics.histogram
+        histogram("order.round_trip").record(int(max(0.0, received_at - order.sent_at) * 1e9))
+        if data.match_timestamp:
+            # Server timestamps, clamped against clock skew
+            if data.taker_timestamp:
+                histogram("order.to_match").record(int(max(0.0, data.match_timestamp - data.taker_timestamp) * 1e9))
+            histogram("order.match_to_recv").record(int(max(0.0, received_at - data.match_timestamp) * 1e9))
+        return order
+
+    def expire(self, now: float) -> list[InFlightOrder]:
+        """Drop the orders whose timeout has passed by `now`.
+
+        Returns:
+            list[InFlightOrder]: The expired orders, oldest first.
+        """
+        expired = self.wheel.advance(now)
+        for order in expired:
+            del self.orders[order.quote_resp_id]
+        if expired:
+            self.timeouts += len(expired)
+            self.capacity.set()
+        return expired
+
+    def stats(self) -> dict[str, Any]:
+        histograms = self.metrics.histograms
+        return {
+            "outstanding": len(self.orders),
+            "sent": self.sent,
+            "completed": self.completed,
+            "timeouts": self.timeouts,
+            "unmatched": self.unmatched,
+            "admission_waits": self.admission_waits,
+            "latency": {name: histogram.snapshot() for name, histogram in histograms.items() if name.startswith("order.")},
+        }
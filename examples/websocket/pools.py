@@ -0,0 +1,127 @@
+import random
+
+from .messages import MarketData
+from .quote_encoder import QuoteEncoder, QuoteIdGenerator
+from .quote_throttle import QuoteThrottle
+from examples.fixedpoint import SCALE, format_ladder, from_float, to_fixed
+
+DEFAULT_POOL_ID = "DCN-ALPHA_common"
+
+
+def pool_symbol(pool_id: str) -> str:
+    """The traded symbol of a pool, eg. "DCN-ALPHA" for "DCN-ALPHA_common"."""
+    return pool_id.rsplit("_", 1)[0]
+
+
+class MakerPool:
+    """Quoting state and parameters of a single pool a `MakerClient` makes markets in.
+
+    Usage:
+        pool = MakerPool(wallet, "DCN-ALPHA_common", true_mid="1.0")
+        quote, bids, asks = pool.make_quote(time.time())
+    """
+
+    def __init__(self, wallet_id: str, pool_id: str = DEFAULT_POOL_ID, symbol: str = None, true_mid: str = "1.0",
+                 valid_until_time: float = 5, size_premium: dict[str, str] = None, quote_ids: QuoteIdGenerator = None,
+                 threshold_ticks: int = 0, max_quote_rate: float = None, refresh_before: float = 0.5):
+        """
+        Args:
+            wallet_id (str): Wallet address of the maker.
+            pool_id (str): Identifier for the trading pool.
+            symbol (str, optional): The traded symbol, derived from the pool id by default.
+            true_mid (str): Initial true mid price.
+            valid_until_time (float): Validity duration for quotes.
+            size_premium (dict, optional): Rung size -> price premium over the top of book.
+            quote_ids (QuoteIdGenerator, optional): Source of quote ids, shared across pools if given.
+            threshold_ticks (int): Price ticks a rung must move before the ladder is re-quoted; 0
+                quotes every time.
+            max_quote_rate (float, optional): Most quotes per second, unlimited by default.
+            refresh_before (float): Seconds before the last quote expires from which an unchanged
+                ladder is quoted again.
+        """
+        self.pool_id = pool_id
+        self.symbol = symbol or pool_symbol(pool_id)
+        self.valid_until_time = valid_until_time
+        # Precompiled quote message, only the time, id and rungs change per quote
+        self.quote_encoder = QuoteEncoder(wallet_id, pool_id, valid_until_time, quote_ids)
+
+        # Market making parameters, prices are fixed-point integers (see examples.fixedpoint)
+        self.true_mid = to_fixed(true_mid)
+        self.true_mu = 0
+        self.true_sigma = 0.01
+
+        # Quote time generation
+        self.quote_every_sec = 5
+        self.quote_every_mu = 10
+        self.quote_every_sigma = 2
+
+        # Quoted prices are on a grid of `price_places` decimals
+        self.price_places = 2
+        # Which of the quotes made are sent, see `MakerClient.publish_quote`
+        self.throttle = QuoteThrottle(threshold_ticks * SCALE // 10 ** self.price_places, max_quote_rate, refresh_before)
+
+        # Quote randomised bid/ask spread generation
+        self.spread_mu = 0.001
+        self.spread_sigma = 0.0001
+
+        # NOTE: Sizes are fixed per stream see liquidity_levels REST endpoint
+        size_premium = size_premium or {"1": "0.0", "2": "0.01", "3": "0.02", "5": "0.05", "10": "0.10", "20": "0.20"}
+        self.size_premium = {size: to_fixed(premium) for size, premium in size_premium.items()}
+
+        # Per-pool activity
+        self.quotes_sent = 0
+        self.quote_rejects = 0
+        self.trade_requests = 0
+        self.trades_done = 0
+
+    def update_true_mid(self):
+        self.true_mid += from_float(random.gauss(self.true_mu, self.true_sigma), 2)
+
+    def next_quote_delay(self) -> float:
+        return random.gauss(self.quote_every_mu, self.quote_every_sigma)
+
+    def make_ladder(self) -> tuple[list[int], list[int]]:
+        """Bid and offer rungs around the true mid with a randomised spread, as fixed-point integers."""
+        places = self.price_places
+        bid = self.true_mid - from_float(max(0, random.gauss(self.spread_mu, self.spread_sigma)), places)
+        ask = self.true_mid + from_float(max(0, random.gauss(self.spread_mu, self.spread_sigma)), places)
+        premiums = self.size_premium.values()
+        return [bid - premium for premium in premiums], [ask + premium for premium in premiums]
+
+    def encode_quote(self, sending_time: float, bids: list[int], asks: list[int]) -> tuple[bytes, list[str], list[str]]:
+        """Encode the quote of a ladder.
+
+        Returns:
+            tuple: The encoded quote message and its bid and offer ladders.
+        """
+        bids = format_ladder(bids, self.price_places)
+        asks = format_ladder(asks, self.price_places)
+        self.quotes_sent += 1
+        return self.quote_encoder.encode(sending_time, bids, asks), bids, asks
+
+    def make_quote(self, sending_time: float) -> tuple[bytes, list[str], list[str]]:
+        """Build a quote around the true mid with a randomised spread.
+
+        Returns:
+            tuple: The encoded quote message and its bid and offer ladders.
+        """
+        return self.encode_quote(sending_time, *self.make_ladder())
+
+
+class TakerPool:
+    """Market data state of a single pool an `OrderClient` takes liquidity in.
+    """
+
+    def __init__(self, pool_id: str, symbol: str = None, action_percentage: float = 0.25):
+        """
+        Args:
+            pool_id (str): Identifier for the trading pool.
+            symbol (str, optional): The traded symbol, taken from the market data by default.
+            action_percentage (float): Share of market data updates that trigger an order.
+        """
+        self.pool_id = pool_id
+        self.symbol = symbol or pool_symbol(pool_id)
+        self.action_percentage = action_percentage
+        self.last: MarketData = None
+        self.updates = 0
+        self.orders_sent = 0
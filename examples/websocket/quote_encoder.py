@@ -0,0 +1,90 @@
+import itertools
+import uuid
+
+import orjson as json
+
+
+class QuoteIdGenerator:
+    """Cheap, monotonic quote ids: a random per-session prefix plus a counter, eg. "3f2a9c1d7e4b-42".
+
+    The prefix keeps ids unique across restarts while each new id costs a counter increment and a
+    string format instead of a `uuid4` call.
+    """
+
+    def __init__(self, prefix: str = None):
+        """
+        Args:
+            prefix (str, optional): Prefix of every id, a random one by default.
+
+        Raises:
+            ValueError: If the prefix would need escaping in JSON, as the ids are encoded as-is.
+        """
+        self.prefix = prefix or uuid.uuid4().hex[:12]
+        if json.dumps(self.prefix).decode() != f'"{self.prefix}"':
+            raise ValueError(f"Quote id prefix {self.prefix!r} needs escaping in JSON")
+        # Formatting runs in C, so taking an id is a single call
+        self.next_id = map(f"{self.prefix}-{{}}".format, itertools.count(1)).__next__
+
+    def __call__(self) -> str:
+        return self.next_id()
+
+
+class QuoteEncoder:
+    """Encodes `quote` messages for a single pool from a precompiled template.
+
+    Everything that does not change between quotes -- the message type, wallet id, pool id,
+    valid_until_time and the key layout -- is serialized once, up front. Encoding a quote only
+    fills in the sending time, the quote id and the price rungs, producing the same bytes as
+    `orjson.dumps` of the equivalent dict. The sending time is formatted by `orjson` too, which is
+    several times cheaper than `repr` of a float.
+
+    Usage:
+        encoder = QuoteEncoder(wallet_id, "DCN-ALPHA_common", valid_until_time=5)
+        await client.send_message(encoder.encode(time.time(), bids, offers))
+    """
+
+    def __init__(self, wallet_id: str, pool_id: str, valid_until_time: float, quote_ids: QuoteIdGenerator = None):
+        """
+        Args:
+            wallet_id (str): Wallet address of the maker.
+            pool_id (str): The pool the quotes are streamed to.
+            valid_until_time (float): Validity duration for quotes, in seconds.
+            quote_ids (QuoteIdGenerator, optional): Source of quote ids, shared across encoders if given.
+        """
+        self.wallet_id = wallet_id
+        self.pool_id = pool_id
+        self.valid_until_time = valid_until_time
+        self.quote_ids = quote_ids or QuoteIdGenerator()
+        self._next_quote_id = self.quote_ids.next_id
+
+        static = lambda value: json.dumps(value).decode().replace("%", "%%")
+        self._template = (
+            '{"type":"quote","data":{"sending_time":%s,"quote_id":"%s",'
+            f'"wallet_id":{static(wallet_id)},"pool_id":{static(pool_id)},'
+            '"bid_px":[%s],"offer_px":[%s],'
+            f'"valid_until_time":{static(valid_until_time)}}}}}'
+        )
+
+    def encode(self, sending_time: float, bids: list[str], offers: list[str], quote_id: str = None) -> bytes:
+        """Encode a quote.
+
+        Args:
+            sending_time (float): Unix timestamp in seconds.
+            bids (list[str]): Bid prices per rung as wire strings, eg. from `format_ladder`.
+            offers (list[str]): Offer prices per rung as wire strings.
+            quote_id (str, optional): The quote id, escaped as needed, by default the next id from
+                `quote_ids`.
+
+        Rung prices are inserted as-is, so they must be plain numeric strings.
+        """
+        if quote_id is None:
+            # Generated ids never need escaping, see `QuoteIdGenerator`
+            quote_id = self._next_quote_id()
+        else:
+            quote_id = json.dumps(quote_id).decode()[1:-1]
+        return (self._template % (
+            json.dumps(sending_time).decode(),
+            quote_id,
+            '"' + '","'.join(bids) + '"' if bids else "",
+            '"' + '","'.join(offers) + '"' if offers else "",
+        )).encode()
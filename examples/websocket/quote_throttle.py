@@ -0,0 +1,118 @@
+"""Per-pool throttling of a maker's quotes.
+
+`QuoteThrottle` sits between a pool's ladder maker and the wire: ladders that barely moved are
+suppressed, the last quote is re-sent shortly before it expires, and an optional rate limit merges
+ladders made too fast into the newest one. It holds no timers itself; the caller sends, `flush`es
+after the returned delay and re-quotes at `refresh_at`, see `MakerClient.publish_quote`.
+"""
+
+
+class QuoteThrottle:
+    """Decides which of a pool's quotes go on the wire.
+
+    Each new ladder is compared with the last one sent. It is suppressed if every rung moved by
+    less than `threshold` and the last quote is not yet within `refresh_before` seconds of expiring,
+    so unchanged quotes are only re-sent to keep them alive. At most `max_rate` quotes per second
+    are sent: a quote due sooner waits, and ladders made while one is waiting replace it, so only
+    the newest goes out.
+
+    Usage:
+        throttle = QuoteThrottle(threshold=to_fixed("0.01"), max_rate=4)
+        delay = throttle.offer(bids, asks, now)
+        if delay == 0:
+            throttle.sent_quote(bids, asks, now, valid_for)   # and send it, valid for `valid_for` seconds
+        elif delay is not None:
+            ...                                               # `flush` after `delay` seconds
+        ...
+        # With every ladder suppressed until `throttle.refresh_at()`, offer `throttle.last` again then
+    """
+    __slots__ = ("threshold", "min_interval", "refresh_before", "last", "last_sent_at", "expires_at", "pending",
+                 "sent", "suppressed", "coalesced")
+
+    def __init__(self, threshold: int = 0, max_rate: float = None, refresh_before: float = 0.5):
+        """
+        Args:
+            threshold (int): Fixed-point price move a rung needs before the ladder is re-quoted; 0
+                sends every quote.
+            max_rate (float, optional): Most quotes per second, unlimited by default.
+            refresh_before (float): Seconds before the last quote expires from which an unchanged
+                ladder is sent again.
+        """
+        self.threshold = threshold
+        self.min_interval = 1 / max_rate if max_rate else 0.0
+        self.refresh_before = refresh_before
+        # Bids and offers of the last quote sent, as fixed-point integers
+        self.last: tuple[list[int], list[int]] = None
+        self.last_sent_at: float = None
+        self.expires_at: float = None
+        # The newest ladder waiting for the rate limit
+        self.pending: tuple[list[int], list[int]] = None
+
+        self.sent = 0
+        self.suppressed = 0
+        self.coalesced = 0
+
+    def changed(self, bids: list[int], asks: list[int]) -> bool:
+        """True if any rung moved by at least the threshold since the last quote sent."""
+        if self.last is None:
+            return True
+        last_bids, last_asks = self.last
+        if len(bids) != len(last_bids) or len(asks) != len(last_asks):
+            return True
+        threshold = self.threshold
+        for new, old in zip(bids, last_bids):
+            if abs(new - old) >= threshold:
+                return True
+        for new, old in zip(asks, last_asks):
+            if abs(new - old) >= threshold:
+                return True
+        return False
+
+    def refresh_at(self) -> float | None:
+        """When the last quote sent becomes due for a refresh, None before the first quote."""
+        return None if self.expires_at is None else self.expires_at - self.refresh_before
+
+    def due(self, now: float) -> bool:
+        """True if the last quote sent is about to expire, or has."""
+        return self.expires_at is None or now >= self.expires_at - self.refresh_before
+
+    def offer(self, bids: list[int], asks: list[int], now: float) -> float | None:
+        """Offer a new ladder for sending.
+
+        Returns:
+            float: 0 to send it now, the seconds to wait before `flush`ing it, or None if it is not
+                to be sent: suppressed, or merged into the ladder already waiting.
+        """
+        if self.pending is not None:
+            self.pending = (bids, asks)
+            self.coalesced += 1
+            return None
+        if not self.changed(bids, asks) and not self.due(now):
+            self.suppressed += 1
+            return None
+        if self.last_sent_at is not None:
+            wait = self.last_sent_at + self.min_interval - now
+            if wait > 0:
+                self.pending = (bids, asks)
+                return wait
+        return 0.0
+
+    def flush(self, now: float) -> tuple[list[int], list[int]] | None:
+        """Take the waiting ladder once the rate allows, None if it no longer needs sending."""
+        ladder, self.pending = self.pending, None
+        if ladder is None:
+            return None
+        if not self.changed(*ladder) and not self.due(now):
+            self.suppressed += 1
+            return None
+        return ladder
+
+    def sent_quote(self, bids: list[int], asks: list[int], now: float, valid_for: float):
+        """Record a quote sent at `now`, valid for `valid_for` seconds."""
+        self.last = (bids, asks)
+        self.last_sent_at = now
+        self.expires_at = now + valid_for
+        self.sent += 1
+
+    def stats(self) -> dict[str, int]:
+        return {"sent": self.sent, "suppressed": self.suppressed, "coalesced": self.coalesced}
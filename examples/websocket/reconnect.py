@@ -0,0 +1,56 @@
+import random
+from typing import NamedTuple
+
+
+class Backoff:
+    """Jittered exponential backoff between reconnect attempts.
+
+    The nominal delay starts at `initial` and is multiplied by `multiplier` per failed attempt up
+    to `maximum`. Each delay is drawn uniformly from the upper half of the nominal delay, so many
+    clients dropped at once do not reconnect in lockstep.
+
+    Usage:
+        backoff = Backoff(initial=0.005, maximum=5.0)
+        await asyncio.sleep(backoff.next())  # after a failed attempt
+        backoff.reset()                      # once connected
+    """
+
+    def __init__(self, initial: float = 0.005, maximum: float = 5.0, multiplier: float = 2.0, rng: random.Random = None):
+        """
+        Args:
+            initial (float): Nominal delay after the first failed attempt, in seconds.
+            maximum (float): Largest nominal delay, in seconds.
+            multiplier (float): Growth of the nominal delay per failed attempt.
+            rng (random.Random, optional): Source of the jitter.
+        """
+        self.initial = initial
+        self.maximum = maximum
+        self.multiplier = multiplier
+        self.rng = rng or random.Random()
+        self.attempts = 0
+
+    def next(self) -> float:
+        """The delay before the next attempt, in seconds."""
+        delay = min(self.maximum, self.initial * self.multiplier ** self.attempts)
+        self.attempts += 1
+        return self.rng.uniform(delay / 2, delay)
+
+    def reset(self):
+        self.attempts = 0
+
+
+class Outage(NamedTuple):
+    """A period without a connection, from the drop to the next connected socket.
+    """
+    uri: str
+    started: float
+    ended: float
+    # Failed connection attempts during the outage
+    attempts: int
+    # Whether the client failed over to its standby connection
+    standby: bool
+    reason: str
+
+    @property
+    def downtime(self) -> float:
+        return self.ended - self.started
@@ -0,0 +1,144 @@
+"""Event-driven replay of recorded streams into the strategy clients, faster than real time.
+
+The engine merges the recorded frames of any number of clients by time, moves a shared
+`VirtualClock` to each frame's time -- firing the strategies' own timers, eg. the quote and
+true mid loops of `MakerClient`, on the way -- and calls the client's `handle_message` directly,
+without a socket. Whatever the clients send is collected on a `ReplaySocket` per client.
+
+Usage:
+    engine = ReplayEngine()
+    engine.add_client(maker, frames_from_capture("captures", "maker"), background=[maker.simulate_true_mid, maker.simulate_quotes])
+    stats = await engine.run()
+"""
+import asyncio
+import contextlib
+import heapq
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Iterable, Iterator, NamedTuple
+
+from .base import WebSocketClient
+from .capture import CaptureReader
+from .clock import VirtualClock
+
+
+class ReplayFrame(NamedTuple):
+    """A frame to feed to a client at unix time `timestamp`, in seconds.
+    """
+    timestamp: float
+    message: str | bytes
+
+
+def frames_from_capture(directory: str, name: str, start_ns: int = None, end_ns: int = None) -> Iterator[ReplayFrame]:
+    """The inbound frames of a capture written by `CaptureRecorder`, at their local receive times.
+    """
+    with CaptureReader(directory, name) as reader:
+        for record in reader.records(start_ns, end_ns):
+            if not record.outbound:
+                yield ReplayFrame(record.time_ns / 1e9, record.message())
+
+
+class ReplaySocket:
+    """Stands in for the websocket of a replayed client and keeps what the client sent.
+    """
+
+    def __init__(self, clock: VirtualClock, keep: bool = True):
+        self.clock = clock
+        self.keep = keep
+        self.sent: list[tuple[float, Any]] = []
+        self.count = 0
+
+    async def send(self, message):
+        self.count += 1
+        if self.keep:
+            self.sent.append((self.clock.now, message))
+
+
+class ReplayEngine:
+    """Drives clients from recorded frames on a virtual clock.
+    """
+
+    def __init__(self, clock: VirtualClock = None, quiet: bool = True, keep_sent: bool = True):
+        """
+        Args:
+            clock (VirtualClock, optional): The shared clock, starting at the first frame by default.
+            quiet (bool): Discard the clients' prints and info logs while replaying, which otherwise dominate the run time.
+            keep_sent (bool): Keep every frame the clients send on their `ReplaySocket`.
+        """
+        self.clock = clock or VirtualClock()
+        self.quiet = quiet
+        self.keep_sent = keep_sent
+        self.clients: list[WebSocketClient] = []
+        self._feeds: list[Iterator[tuple[float, int, int, str | bytes, WebSocketClient]]] = []
+        self._background: list[Callable[[], Awaitable[None]]] = []
+
+    def add_client(self, client: WebSocketClient, frames: Iterable[ReplayFrame],
+                   background: Iterable[Callable[[], Awaitable[None]]] = ()) -> ReplaySocket:
+        """Replay `frames` into `client`.
+
+        Args:
+            client (WebSocketClient): The client; its clock and websocket are replaced.
+            frames (Iterable[ReplayFrame]): Time-ordered frames, eg. from `frames_from_capture`.
+            background (Iterable[Callable]): Coroutine functions of the client to run alongside,
+                eg. `maker.simulate_quotes`; they must sleep through `client.clock`.
+
+        Returns:
+            ReplaySocket: Collects the frames the client sends.
+        """
+        client.clock = self.clock
+        client.websocket = ReplaySocket(self.clock, self.keep_sent)
+        index = len(self.clients)
+        self.clients.append(client)
+        # Frames with the same time are fed in client order, then in recorded order
+        self._feeds.append(
+            (timestamp, index, position, message, client) for position, (timestamp, message) in enumerate(frames)
+        )
+        self._background.extend(background)
+        return client.websocket
+
+    async def run(self, until: float = None) -> dict[str, float]:
+        """Replay all frames, then run the timers up to `until` if given.
+
+        Returns:
+            dict: Events processed -- frames plus timers fired -- and replay speed statistics.
+        """
+        clock = self.clock
+        frames = timers = 0
+        started = time.perf_counter()
+        first = None
+        tasks = []
+        with contextlib.ExitStack() as stack:
+            if self.quiet:
+                stack.enter_context(contextlib.redirect_stdout(stack.enter_context(open(os.devnull, "w"))))
+                logging.disable(logging.INFO)
+                stack.callback(logging.disable, logging.NOTSET)
+            try:
+                for timestamp, _, _, message, client in heapq.merge(*self._feeds):
+                    if first is None:
+                        first = timestamp
+                        await clock.advance(timestamp)
+                        # Background loops start once the clock is at the first frame
+                        tasks = [asyncio.create_task(function()) for function in self._background]
+                        await clock.settle()
+                    timers += await clock.advance(timestamp)
+                    await client.handle_message(message)
+                    frames += 1
+                if until is not None and clock.now is not None:
+                    timers += await clock.advance(until)
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+        wall = time.perf_counter() - started
+        virtual = clock.now - first if first is not None else 0.0
+        events = frames + timers
+        return {
+            "frames": frames,
+            "timers": timers,
+            "events_per_sec": events / wall if wall else 0.0,
+            "virtual_seconds": virtual,
+            "wall_seconds": wall,
+            "speedup": virtual / wall if wall else 0.0,
+        }
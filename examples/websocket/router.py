@@ -0,0 +1,178 @@
+"""Smart order routing for takers across every pool of a symbol.
+
+`OrderRouter` keeps the latest ladder of each pool, indexed for lookups: sizes and prices as
+fixed-point integers, each parsed only once a route needs it, with the parsed size ladder shared
+between all pools that stream the same rungs. A route finds the rung of any quantity by binary
+search -- a quantity in between two rungs rounds up to the next one, as the README specifies --
+and compares the full-amount price at that rung across all pools of the symbol in one pass,
+looking up the rung once per distinct size ladder and parsing one price per pool. The chosen route is encoded straight into a
+`quoteresponse` message.
+
+Usage:
+    router.update(data)                                   # every MarketData tick
+    route = router.route("DCN-ALPHA", "BUY", to_fixed("8"))
+    if route is not None:
+        await client.send_message(router.encode(route, quote_resp_id, wallet, time.time()))
+"""
+from typing import NamedTuple
+
+import orjson as json
+
+from .messages import MarketData
+from examples.fixedpoint import parse_ladder, rung_index, to_fixed, to_wire
+
+
+class Route(NamedTuple):
+    """The pool and price an order of `quantity` is sent to.
+    """
+    pool_id: str
+    symbol: str
+    side: str
+    quantity: int
+    # Rung the quantity fills, by index and size
+    rung: int
+    size: int
+    price: int
+    # The price as quoted on the wire
+    price_wire: str
+
+
+class PoolLadder:
+    """Latest ladder of one pool, parsed into fixed-point integers rung by rung as routes read it.
+    """
+    __slots__ = ("pool_id", "symbol", "data", "sizes", "bids", "offers", "_template")
+
+    def __init__(self, pool_id: str, symbol: str):
+        self.pool_id = pool_id
+        self.symbol = symbol
+        self.data: MarketData = None
+        self.sizes: list[int] = None
+        self.bids: list[int] = None
+        self.offers: list[int] = None
+        static = lambda value: json.dumps(value).decode().replace("%", "%%")
+        # Everything of the pool's quoteresponse except the order itself, serialized once
+        self._template = (
+            f'{{"type":"quoteresponse","data":{{"pool_id":{static(pool_id)},"price":"%s","quantity":"%s",'
+            f'"quote_resp_id":"%s","side":"%s","symbol":{static(symbol)},"sending_time":%r,"wallet_id":%s}}}}'
+        )
+
+    def update(self, data: MarketData):
+        self.data = data
+        self.sizes = self.bids = self.offers = None
+
+    def parse_sizes(self, size_ladders: dict[tuple[str, ...], list[int]], max_size_ladders: int) -> list[int]:
+        """The parsed sizes, shared through `size_ladders` with other pools quoting the same rungs."""
+        sizes = size_ladders.get(key := tuple(self.data.sizes))
+        if sizes is None:
+            if len(size_ladders) >= max_size_ladders:
+                # Drop the oldest; pools still holding it keep their own reference
+                del size_ladders[next(iter(size_ladders))]
+            sizes = size_ladders[key] = parse_ladder(self.data.sizes)
+        self.sizes = sizes
+        return sizes
+
+    def price(self, buy: bool, rung: int) -> int:
+        """The offer (`buy`) or bid of a rung, parsed on first use."""
+        prices = self.offers if buy else self.bids
+        if prices is None:
+            prices = [None] * len(self.sizes)
+            if buy:
+                self.offers = prices
+            else:
+                self.bids = prices
+        price = prices[rung]
+        if price is None:
+            price = prices[rung] = to_fixed((self.data.offers if buy else self.data.bids)[rung])
+        return price
+
+
+class OrderRouter:
+    """Routes taker orders to the pool with the best full-amount price for their quantity.
+    """
+
+    def __init__(self, max_size_ladders: int = 64):
+        """
+        Args:
+            max_size_ladders (int): Most distinct size ladders kept for sharing between pools.
+        """
+        # symbol -> pool id -> ladder
+        self.symbols: dict[str, dict[str, PoolLadder]] = {}
+        # Raw sizes -> parsed sizes, so pools quoting the same rungs share one list
+        self.size_ladders: dict[tuple[str, ...], list[int]] = {}
+        self.max_size_ladders = max_size_ladders
+        self.routes = 0
+        self.misses = 0
+
+    def update(self, data: MarketData) -> PoolLadder:
+        """Take in a market data update; the ladder is only parsed once a route needs it."""
+        pools = self.symbols.get(data.symbol)
+        if pools is None:
+            pools = self.symbols[data.symbol] = {}
+        ladder = pools.get(data.pool_id)
+        if ladder is None:
+            ladder = pools[data.pool_id] = PoolLadder(data.pool_id, data.symbol)
+        ladder.update(data)
+        return ladder
+
+    def remove(self, pool_id: str):
+        for pools in self.symbols.values():
+            pools.pop(pool_id, None)
+
+    def route(self, symbol: str, side: str, quantity: int, limit: int = None, pools: set[str] = None) -> Route | None:
+        """The best pool for an order, or None if no pool can fill it.
+
+        Buys go to the lowest offer and sells to the highest bid at the rung that fills `quantity`.
+        A price of zero means the rung has no liquidity. Ties go to the pool whose market data
+        arrived first, ie. the earliest added to the router.
+
+        Args:
+            symbol (str): The traded symbol, eg. "DCN-ALPHA".
+            side (str): "BUY" or "SELL".
+            quantity (int): Fixed-point quantity; any positive amount up to a pool's largest rung.
+            limit (int, optional): Fixed-point limit price: the highest price to buy at or the
+                lowest to sell at.
+            pools (set, optional): Only consider these pool ids.
+        """
+        buy = side == "BUY"
+        best = best_ladder = None
+        best_rung = 0
+        sizes = rung = None
+        for ladder in self.symbols.get(symbol, {}).values():
+            if ladder.data is None or (pools is not None and ladder.pool_id not in pools):
+                continue
+            # Pools with the same rungs share their size ladder, so the search runs once for them
+            if (ladder.sizes or ladder.parse_sizes(self.size_ladders, self.max_size_ladders)) is not sizes:
+                sizes = ladder.sizes
+                try:
+                    rung = rung_index(sizes, quantity)
+                except ValueError:
+                    rung = None
+            if rung is None:
+                continue
+            price = ladder.price(buy, rung)
+            if price > 0 and (best is None or (price < best if buy else price > best)):
+                best, best_ladder, best_rung = price, ladder, rung
+
+        if best is None or (limit is not None and (best > limit if buy else best < limit)):
+            self.misses += 1
+            return None
+        self.routes += 1
+        data = best_ladder.data
+        return Route(
+            best_ladder.pool_id, symbol, side, quantity, best_rung, best_ladder.sizes[best_rung], best,
+            (data.offers if buy else data.bids)[best_rung],
+        )
+
+    def encode(self, route: Route, quote_resp_id: str, wallet_id: str, sending_time: float,
+               price: str = None, quantity: str = None) -> bytes:
+        """The `quoteresponse` message of `route`, the same bytes as `orjson.dumps` of the dict.
+
+        Args:
+            price (str, optional): Wire price to send instead of the route's, eg. a limit.
+            quantity (str, optional): Wire quantity, formatted from the route's by default.
+        """
+        ladder = self.symbols[route.symbol][route.pool_id]
+        return (ladder._template % (
+            price or route.price_wire, quantity or to_wire(route.quantity), quote_resp_id, route.side,
+            sending_time, json.dumps(wallet_id).decode(),
+        )).encode()
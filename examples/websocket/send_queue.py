@@ -0,0 +1,170 @@
+"""Prioritised queue of outbound frames, drained by a single writer per connection.
+
+Every frame a client sends goes through its `SendQueue`, so only one coroutine writes to the
+socket and a time-critical frame never waits behind a less urgent one:
+    PRIORITY_RESPONSE  trade ACCEPT/REJECT responses, always sent first
+    PRIORITY_QUOTE     quote updates; a newer quote for a pool replaces the unsent older one
+    PRIORITY_DEFAULT   everything else, eg. taker orders
+Frames of the same priority are sent in the order they were queued.
+"""
+import asyncio
+from collections import deque
+import socket
+import time
+from typing import Any, Hashable
+
+PRIORITY_RESPONSE = 0
+PRIORITY_QUOTE = 1
+PRIORITY_DEFAULT = 2
+_PRIORITIES = 3
+
+
+class SendQueue:
+    """Outbound frames by priority, with replacement by key and back-pressure on a slow socket.
+
+    Usage:
+        queue.put(quote, PRIORITY_QUOTE, key=pool_id)   # replaces the pool's unsent quote
+        for message, enqueued_ns in queue.take(32):
+            await websocket.send(message)
+    """
+
+    def __init__(self, high_water: int = 256, low_water: int = None):
+        """
+        Args:
+            high_water (int): Queued frames at which producers of anything but trade responses
+                wait in `wait_writable`.
+            low_water (int, optional): Queued frames below which they resume, half of `high_water`
+                by default.
+        """
+        self.high_water = high_water
+        self.low_water = high_water // 2 if low_water is None else low_water
+        # One FIFO per priority of [message, key, enqueued_ns] entries
+        self._queues = [deque() for _ in range(_PRIORITIES)]
+        # key -> the unsent entry it replaces
+        self._keyed: dict[Hashable, list] = {}
+        self._size = 0
+        self.ready = asyncio.Event()
+        self.writable = asyncio.Event()
+        self.writable.set()
+
+        self.queued = 0
+        self.replaced = 0
+        self.dropped = 0
+        self.blocked = 0
+        self.max_depth = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def put(self, message: Any, priority: int = PRIORITY_DEFAULT, key: Hashable = None) -> bool:
+        """Queue a frame.
+
+        Args:
+            message (str | bytes): The frame.
+            priority (int): One of the `PRIORITY_*` constants, lower goes first.
+            key (Hashable, optional): Replace the unsent frame queued with the same key, keeping
+                its place in the queue, eg. the pool id of a quote.
+
+        Returns:
+            bool: False if the frame replaced an unsent one.
+        """
+        now = time.perf_counter_ns()
+        if key is not None:
+            entry = self._keyed.get(key)
+            if entry is not None:
+                entry[0], entry[2] = message, now
+                self.replaced += 1
+                return False
+        entry = [message, key, now]
+        if key is not None:
+            self._keyed[key] = entry
+        self._queues[priority].append(entry)
+        self._size += 1
+        self.queued += 1
+        if self._size > self.max_depth:
+            self.max_depth = self._size
+        if self._size >= self.high_water:
+            self.writable.clear()
+        self.ready.set()
+        return True
+
+    def take(self, limit: int) -> list[tuple[Any, int]]:
+        """Remove up to `limit` frames, highest priority first.
+
+        Returns:
+            list: (message, enqueued_ns) of each frame, in sending order.
+        """
+        frames = []
+        for pending in self._queues:
+            while pending and len(frames) < limit:
+                message, key, enqueued_ns = pending.popleft()
+                if key is not None:
+                    del self._keyed[key]
+                frames.append((message, enqueued_ns))
+        self._size -= len(frames)
+        if not self._size:
+            self.ready.clear()
+        if self._size < self.low_water:
+            self.writable.set()
+        return frames
+
+    def clear(self) -> int:
+        """Drop every unsent frame, eg. when the connection closed, and release waiting producers."""
+        dropped = self._size
+        for pending in self._queues:
+            pending.clear()
+        self._keyed.clear()
+        self._size = 0
+        self.dropped += dropped
+        self.ready.clear()
+        self.writable.set()
+        return dropped
+
+    async def wait_writable(self) -> int:
+        """Wait while the queue is above its high water mark.
+
+        Returns:
+            int: Nanoseconds waited, 0 if the queue had room.
+        """
+        if self.writable.is_set():
+            return 0
+        self.blocked += 1
+        start = time.perf_counter_ns()
+        await self.writable.wait()
+        return time.perf_counter_ns() - start
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "depth": self._size,
+            "max_depth": self.max_depth,
+            "queued": self.queued,
+            "replaced": self.replaced,
+            "dropped": self.dropped,
+            "blocked": self.blocked,
+        }
+
+
+class Cork:
+    """Holds back partial TCP segments while a batch of frames is written, Linux only.
+
+    Small frames written back to back are then sent in as few segments as the kernel can pack
+    them into, instead of one segment per frame. Does nothing where `TCP_CORK` or the underlying
+    socket is not available, eg. on a replay socket.
+    """
+
+    def __init__(self, websocket):
+        transport = getattr(websocket, "transport", None)
+        sock = transport.get_extra_info("socket") if transport is not None else None
+        self.sock = sock if sock is not None and hasattr(socket, "TCP_CORK") else None
+
+    def __enter__(self):
+        if self.sock is not None:
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_CORK, 1)
+        return self
+
+    def __exit__(self, *exc):
+        if self.sock is not None:
+            try:
+                self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_CORK, 0)
+            except OSError:
+                pass
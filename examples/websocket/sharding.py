@@ -0,0 +1,275 @@
+"""Sharded runtime: clients spread over worker processes, one event loop per process.
+
+`WebSocketClientManager` runs every client on a single loop, so a slow handler on one client
+delays all the others. `ShardedClientManager` splits the clients into shards, each run by a
+`WebSocketClientManager` in its own process, optionally on uvloop and pinned to a core. The
+parent supervises the shards: it starts, stops and restarts them, restarts shards that die, and
+collects a `ShardHealth` report from every shard.
+
+Clients are added as factories rather than instances, as they are built inside the worker
+process. Factories must be picklable, eg. module level functions or `functools.partial`s of them.
+
+Usage:
+    manager = ShardedClientManager(shards=4, use_uvloop=True)
+    for key in private_keys:
+        manager.add_client(f"maker-{key[:8]}", functools.partial(make_maker, key))
+    manager.run()
+"""
+import asyncio
+import multiprocessing
+import os
+import queue
+import sys
+import time
+from typing import Callable, NamedTuple
+
+from .base import WebSocketClient, WebSocketClientManager
+from .logs import LogPipeline
+
+ClientFactory = Callable[[], WebSocketClient]
+
+
+class ShardHealth(NamedTuple):
+    """A shard's periodic report to the parent.
+    """
+    shard: int
+    pid: int
+    timestamp: float
+    uptime: float
+    clients: int
+    # Clients with an open connection
+    connected: int
+    # Outages across the shard's clients since the shard started
+    outages: int
+    # Largest delay of the shard's event loop over the report interval, in milliseconds
+    loop_lag_ms: float
+    loop: str
+
+
+def install_uvloop() -> bool:
+    """Make uvloop the event loop of this process, if it is installed."""
+    try:
+        import uvloop
+    except ImportError:
+        return False
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return True
+
+
+def run_shard(shard: int, factories: list[tuple[str, ClientFactory]], use_uvloop: bool, core: int | None,
+              health: multiprocessing.Queue, stop, health_interval: float, log_dir: str = None):
+    """Entry point of a shard process: build the clients and run them until `stop` is set."""
+    logs = LogPipeline(
+        path=os.path.join(log_dir, f"shard-{shard}.log") if log_dir else None,
+        stream=None if log_dir else sys.stdout,
+    ).start()
+    if core is not None and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, {core})
+    if use_uvloop and not install_uvloop():
+        print(f"Shard {shard}: uvloop is not installed, using the asyncio event loop")
+    try:
+        asyncio.run(serve_shard(shard, factories, health, stop, health_interval))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        logs.stop()
+
+
+async def serve_shard(shard: int, factories: list[tuple[str, ClientFactory]], health: multiprocessing.Queue,
+                      stop, health_interval: float, probe_interval: float = 0.05):
+    manager = WebSocketClientManager()
+    for name, factory in factories:
+        manager.add_client(name, factory())
+    clients = list(manager.clients.values())
+    loop_name = type(asyncio.get_running_loop()).__module__.split(".")[0]
+    started = time.time()
+    running = asyncio.create_task(manager.start())
+    try:
+        next_report = time.perf_counter() + health_interval
+        max_lag = 0.0
+        while not stop.is_set() and not running.done():
+            # The loop lag is how late the probe sleep wakes up
+            before = time.perf_counter()
+            await asyncio.sleep(probe_interval)
+            now = time.perf_counter()
+            max_lag = max(max_lag, now - before - probe_interval)
+            if now >= next_report:
+                health.put(ShardHealth(
+                    shard, os.getpid(), time.time(), time.time() - started, len(clients),
+                    sum(1 for client in clients if client.connected),
+                    sum(len(client.outages) for client in clients), max_lag * 1000, loop_name,
+                ))
+                next_report, max_lag = now + health_interval, 0.0
+    finally:
+        await manager.stop()
+        running.cancel()
+        await asyncio.gather(running, return_exceptions=True)
+
+
+class ShardedClientManager:
+    """Runs clients in worker processes, one event loop per shard, and supervises the shards.
+    """
+
+    def __init__(self, shards: int = None, use_uvloop: bool = False, pin_cores: bool = False,
+                 health_interval: float = 5.0, restart_delay: float = 1.0, log_dir: str = None):
+        """
+        Args:
+            shards (int, optional): Number of worker processes, one per core by default.
+            use_uvloop (bool): Run the shards on uvloop when it is installed.
+            pin_cores (bool): Pin shard `i` to core `i % cores`, where the platform supports it.
+            health_interval (float): Seconds between the health reports of a shard. A shard
+                without a report for three intervals is reported unhealthy.
+            restart_delay (float): Seconds before a shard that died is restarted, doubling for
+                each consecutive restart up to a minute.
+            log_dir (str, optional): Directory for a log file per shard, the shards log to stdout by default.
+        """
+        self.shards = shards or os.cpu_count() or 1
+        self.use_uvloop = use_uvloop
+        self.pin_cores = pin_cores
+        self.health_interval = health_interval
+        self.restart_delay = restart_delay
+        self.log_dir = log_dir
+        self.assignments: list[list[tuple[str, ClientFactory]]] = [[] for _ in range(self.shards)]
+        self.health: dict[int, ShardHealth] = {}
+        self.restarts = [0] * self.shards
+        self._context = multiprocessing.get_context("spawn")
+        self._health_queue = self._context.Queue()
+        self._processes: list[multiprocessing.Process | None] = [None] * self.shards
+        self._stop_events = [None] * self.shards
+        self._started_at = [0.0] * self.shards
+        self._restart_at: dict[int, float] = {}
+
+    def add_client(self, name: str, factory: ClientFactory, shard: int = None) -> int:
+        """Add a client to `shard`, by default to the shard with the fewest clients.
+
+        Args:
+            name (str): Name of the client within its shard.
+            factory (Callable): Builds the client in the worker process; must be picklable.
+            shard (int, optional): The shard to run the client on.
+
+        Returns:
+            int: The shard of the client.
+        """
+        if shard is None:
+            shard = min(range(self.shards), key=lambda index: len(self.assignments[index]))
+        self.assignments[shard].append((name, factory))
+        return shard
+
+    def start_shard(self, shard: int):
+        if self.is_alive(shard):
+            return
+        cores = os.cpu_count() or 1
+        stop = self._context.Event()
+        process = self._context.Process(
+            target=run_shard,
+            args=(shard, self.assignments[shard], self.use_uvloop, shard % cores if self.pin_cores else None,
+                  self._health_queue, stop, self.health_interval, self.log_dir),
+            name=f"shard-{shard}",
+            daemon=True,
+        )
+        process.start()
+        self._processes[shard], self._stop_events[shard] = process, stop
+        self._started_at[shard] = time.time()
+        self.health.pop(shard, None)
+        print(f"Started shard {shard} with {len(self.assignments[shard])} clients, pid {process.pid}")
+
+    def stop_shard(self, shard: int, timeout: float = 5.0):
+        """Stop a shard, letting its clients close their connections for up to `timeout` seconds."""
+        process = self._processes[shard]
+        if process is None:
+            return
+        self._stop_events[shard].set()
+        process.join(timeout)
+        if process.is_alive():
+            process.terminate()
+            process.join()
+        self._processes[shard] = None
+        self._restart_at.pop(shard, None)
+        print(f"Stopped shard {shard}")
+
+    def restart_shard(self, shard: int):
+        self.stop_shard(shard)
+        self.start_shard(shard)
+
+    def start(self):
+        for shard in range(self.shards):
+            if self.assignments[shard]:
+                self.start_shard(shard)
+
+    def stop(self):
+        for shard in range(self.shards):
+            self.stop_shard(shard)
+
+    def is_alive(self, shard: int) -> bool:
+        process = self._processes[shard]
+        return process is not None and process.is_alive()
+
+    def poll(self, timeout: float = 0.0):
+        """Collect the health reports sent since the last poll, waiting up to `timeout` for the first."""
+        try:
+            report = self._health_queue.get(timeout=timeout) if timeout else self._health_queue.get_nowait()
+            while True:
+                self.health[report.shard] = report
+                report = self._health_queue.get_nowait()
+        except queue.Empty:
+            pass
+
+    def supervise(self):
+        """Restart shards that died, after a backoff that grows with consecutive restarts."""
+        now = time.time()
+        for shard, process in enumerate(self._processes):
+            if process is None or process.is_alive():
+                continue
+            if shard not in self._restart_at:
+                # A shard that ran for a while starts over with the shortest delay
+                if now - self._started_at[shard] > 60:
+                    self.restarts[shard] = 0
+                delay = min(60.0, self.restart_delay * 2 ** self.restarts[shard])
+                self._restart_at[shard] = now + delay
+                print(f"Shard {shard} exited with code {process.exitcode}, restarting in {delay:.1f}s")
+            elif now >= self._restart_at[shard]:
+                del self._restart_at[shard]
+                self.restarts[shard] += 1
+                self._processes[shard] = None
+                self.start_shard(shard)
+
+    def status(self) -> dict[int, dict]:
+        """Per shard: liveness, restarts, whether it reported recently, and its last report."""
+        now = time.time()
+        status = {}
+        for shard in range(self.shards):
+            report = self.health.get(shard)
+            status[shard] = {
+                "alive": self.is_alive(shard),
+                "restarts": self.restarts[shard],
+                "healthy": report is not None and now - report.timestamp < 3 * self.health_interval,
+                "health": report._asdict() if report else None,
+            }
+        return status
+
+    def print_status(self):
+        for shard, status in self.status().items():
+            report = status["health"]
+            if report is None:
+                print(f"Shard {shard} -- alive: {status['alive']} | no report yet")
+                continue
+            print(f"Shard {shard} -- healthy: {status['healthy']} | pid: {report['pid']} | loop: {report['loop']} | "
+                  f"connected: {report['connected']}/{report['clients']} | outages: {report['outages']} | "
+                  f"loop lag: {report['loop_lag_ms']:.1f} ms | restarts: {status['restarts']}")
+
+    def run(self):
+        """Start the shards and supervise them until interrupted, then stop them."""
+        self.start()
+        try:
+            next_status = time.time() + self.health_interval
+            while True:
+                self.poll(timeout=0.5)
+                self.supervise()
+                if time.time() >= next_status:
+                    self.print_status()
+                    next_status = time.time() + self.health_interval
+        except KeyboardInterrupt:
+            print("Interrupt detected...")
+        finally:
+            print("Stopping shards...")
+            self.stop()
@@ -1,44 +1,144 @@
 import asyncio
-from typing import Any
 import uuid
 import random
 
-import orjson as json
-import requests
-import random
-
 from .base import WebSocketClient
-from examples.signing import sign_auth_headers
-import time
+from .logs import Sampler, get_logger
+from .messages import Heartbeat, MarketData, TakerTradeMessage
+from .orders import OrderTracker
+from .pools import TakerPool
+from .router import OrderRouter, Route
+from examples.fixedpoint import to_fixed, to_wire
+from examples.ledger import BalanceLedger
+from examples.rest import AsyncRestClient
+from examples.signing import HeaderSigner
+
+logger = get_logger(__name__)
+
+
+class BalanceSnapshot:
+    """Ledger balances of a symbol's tokens, captured as integers and only formatted when logged.
+    """
+    __slots__ = ("title", "rows")
+
+    def __init__(self, title: str, ledger: BalanceLedger, symbol: str):
+        self.title = title
+        self.rows = []
+        for ccy in symbol.split("-", 1):
+            token = ledger.token(ccy)
+            self.rows.append((ccy, token.balance, token.in_flight, token.available))
+
+    def __str__(self):
+        return self.title + "".join(
+            f"\n{ccy} -- balance: {to_wire(balance)} | in flight: {to_wire(in_flight)} | available: {to_wire(available)}"
+            for ccy, balance, in_flight, available in self.rows
+        )
 
 
 class OrderClient(WebSocketClient):
-    def __init__(self, uri, account, headers, force_buying: bool = False):
-        super().__init__(uri, headers)
+    def __init__(self, uri, account, headers, force_buying: bool = False, rest: AsyncRestClient = None,
+                 reconcile_interval: float = 60.0, pools: list = None, tick_log_every: int = 100,
+                 order_sizes: list[str] = None, order_timeout: float = 5.0, max_outstanding: int = 16,
+                 pool_order_rate: float = None, **options):
+        """
+        Args:
+            uri (str): WebSocket server URI.
+            account (Account): The taker's account, used for the REST balance calls.
+            headers (dict): Headers for WebSocket connection.
+            force_buying (bool): Always BUY at a price of 1000.
+            rest (AsyncRestClient, optional): REST client, created for `account` by default with a
+                `HeaderSigner` that runs while connected.
+            reconcile_interval (float): Seconds between ledger reconciliations, None to disable.
+            pools (list, optional): Pool ids or `TakerPool`s to trade. By default every pool seen in
+                the market data is traded.
+            tick_log_every (int): Log one in this many market data updates.
+            order_sizes (list[str], optional): Quantities to order, one picked at random per order;
+                the smallest rung of the ladder by default. Quantities in between rungs are priced
+                at the next rung up.
+            order_timeout (float): Seconds to wait for an order's trade message before giving up on
+                it and releasing its reservation.
+            max_outstanding (int): Most orders in flight at once; further orders wait for a response.
+            pool_order_rate (float, optional): Most orders per second sent to one pool, unlimited by
+                default. Orders over a cap wait, at most one per pool, and are re-priced when sent.
+            **options: Passed on to `WebSocketClient`, eg. `header_factory` or `standby`.
+        """
+        super().__init__(uri, headers, **options)
         self.force_buying = force_buying
         self.account = account
+        # Pooled, non-blocking REST client -- balance calls never stall the websocket loop.
+        # Its auth headers are pre-signed once per second instead of signed per call; a client
+        # passed in brings its own headers.
+        self.signer = None
+        if rest is None:
+            self.signer = HeaderSigner([account] if account is not None else None)
+            rest = AsyncRestClient(account, header_factory=self.signer)
+        self.rest = rest
+        self._background_tasks = set()
+
+        # Local balances, updated from trade messages and reconciled against /balances
+        # every `reconcile_interval` seconds (None disables periodic reconciliation)
+        self.ledger = BalanceLedger()
+        self.reconcile_interval = reconcile_interval
+
+        self.handlers = {
+            MarketData.message_type: self.handle_quote,
+            TakerTradeMessage.message_type: self.handle_taker_trade,
+            Heartbeat.message_type: self.handle_heartbeat,
+        }
+
+        # pool id -> per-pool state, the routing table for market data
+        self.pools: dict[str, TakerPool] = {}
+        for pool in pools or []:
+            self.add_pool(pool)
+        self.trade_any_pool = not pools
+        # Every pool's latest ladder, each order goes to the best pool of its symbol
+        self.router = OrderRouter()
+        self.order_sizes = [to_fixed(size) for size in order_sizes or []]
+        # Orders awaiting their trade message, keyed by quote_resp_id
+        self.orders = OrderTracker(order_timeout, max_outstanding, pool_order_rate)
+        # Pools with an order waiting for admission
+        self._waiting: set[str] = set()
 
         # logging market data messages
         self.mkt_data_time = 0
         self.mkt_data_count = 0
+        self.tick_log = Sampler(tick_log_every)
 
-        print(f"Balances: {self.get_balances(self.account.address)}")
+    def add_pool(self, pool) -> TakerPool:
+        """Trade another pool.
 
-    async def handle_message(self, message):
-        data = json.loads(message)
-        message_type = data.get('type')
-        message = json.loads(data["data"])
+        Args:
+            pool (str | TakerPool): A pool id or a configured `TakerPool`.
+        """
+        if isinstance(pool, str):
+            pool = TakerPool(pool)
+        self.pools[pool.pool_id] = pool
+        return pool
 
-        if message_type == 'marketdata':
-            await self.handle_quote(message)
-        elif message_type == 'takertrademessage':
-            await self.handle_taker_trade(message)
-        elif message_type == 'alphastarheartbeat':
-            await self.handle_heartbeat(message)
-        else:
-            await self.handle_unknown(data)
+    async def connect(self):
+        signer = self.spawn(self.signer.run()) if self.signer is not None else None
+        expiry = self.spawn(self.expire_orders())
+        reconciliation = None
+        if self.metrics is not None:
+            self.orders.metrics = self.metrics
+        try:
+            balances = await self.get_balances(self.account.address)
+            logger.info("Balances: %s", balances)
+            self.ledger.load(balances['balances'])
 
-    async def handle_quote(self, data: dict[str, Any]):
+            if self.reconcile_interval:
+                fetch = lambda: self.get_balances(self.account.address)
+                reconciliation = self.spawn(self.ledger.run_reconciliation(fetch, self.reconcile_interval))
+            await super().connect()
+        finally:
+            if signer is not None:
+                signer.cancel()
+            expiry.cancel()
+            if reconciliation is not None:
+                reconciliation.cancel()
+            await self.rest.close()
+
+    async def handle_quote(self, data: MarketData):
         """
             MarketData:
             {
@@ -69,49 +169,88 @@ class OrderClient(WebSocketClient):
                 }
             }
         """
+        pool = self.pools.get(data.pool_id)
+        if pool is None:
+            if not self.trade_any_pool:
+                return
+            pool = self.add_pool(TakerPool(data.pool_id, data.symbol))
+        pool.last = data
+        pool.updates += 1
+        self.router.update(data)
+
         self.mkt_data_count += 1
-        print(f"market update received -- {self.mkt_data_count}")
-        if time.time() - self.mkt_data_time > 60:
-            print(f"Market Updates Processed: {self.mkt_data_count}")
-            self.mkt_data_time = time.time()
+        if self.tick_log():
+            logger.info("market update received -- %s -- %d", data.pool_id, self.mkt_data_count)
+        if self.now - self.mkt_data_time > 60:
+            logger.info("Market Updates Processed: %d", self.mkt_data_count)
+            self.mkt_data_time = self.now
             self.mkt_data_count = 0
 
-        action_percentage = 0.25
-        if random.random() < action_percentage:
+        if random.random() < pool.action_percentage:
 
-            balances = self.get_balances(self.account.address)
-            balances = balances['balances']
-            bid_price = data['bids'][0]
-            ask_price = data['offers'][0]
-            quantity  = data['sizes'][0]
             side = random.choice(['BUY', 'SELL'])
-            price = bid_price if side == "SELL" else ask_price
             if self.force_buying:
                 side = "BUY" # FORCE BUY
-                price = 1000  # FORCE PRICE
+            order_quantity = random.choice(self.order_sizes) if self.order_sizes else to_fixed(data.sizes[0])
+            await self.place_order(pool.symbol, side, order_quantity)
 
-            quote_response = {
-                "type": "quoteresponse",
-                "data": {
-                    'pool_id': 'DCN-ALPHA_common', 
-                    'price': price, 
-                    'quantity': quantity,
-                    'quote_resp_id': str(uuid.uuid4()), 
-                    'side': side, 
-                    'symbol': 'DCN-ALPHA', 
-                    'sending_time': self.now, 
-                    'wallet_id': self.wallet
-                }
-            }
-            print("---------------------------------------------------")
-            print(f"Trade Initiated: {side} {quantity} @ {price}")
-            print(f"Pre-Trade Balances")
-            print(f"DCN -- contract balance: {balances['DCN']['contract_balance']} | balance: {balances['DCN']['balance']} | in flight: {balances['DCN']['in_flight']} | available: {balances['DCN']['available']}")
-            print(f"ALPHA -- contract balance: {balances['ALPHA']['contract_balance']} | balance: {balances['ALPHA']['balance']} | in flight: {balances['ALPHA']['in_flight']} | available: {balances['ALPHA']['available']}")
-            print("---------------------------------------------------")
-            await self.send_message(json.dumps(quote_response))
-
-    async def handle_taker_trade(self, data: dict[str, Any]):
+    def route_order(self, symbol: str, side: str, quantity: int, pools=None) -> Route | None:
+        """Best full-amount price for the quantity across the traded pools of the symbol, or `pools`."""
+        if pools is None and not self.trade_any_pool:
+            pools = self.pools
+        route = self.router.route(symbol, side, quantity, pools=pools)
+        if route is None:
+            logger.info("Trade Skipped: no pool quotes %s %s %s", symbol, side, to_wire(quantity))
+        return route
+
+    async def place_order(self, symbol: str, side: str, quantity: int):
+        """Route an order and send it, or leave it waiting for admission if its pool is at a cap.
+        """
+        route = self.route_order(symbol, side, quantity)
+        if route is None:
+            return
+        if self.orders.try_admit(route.pool_id):
+            await self.send_order(route)
+        elif route.pool_id in self._waiting:
+            logger.debug("Trade Skipped: an order to %s is already waiting for admission", route.pool_id)
+        else:
+            # Waits off the market data path, so the ladders keep updating meanwhile
+            self._waiting.add(route.pool_id)
+            self.spawn(self.send_when_admitted(route))
+
+    async def send_when_admitted(self, route: Route):
+        pool_id = route.pool_id
+        try:
+            await self.orders.admit(pool_id)
+            # Re-priced on the pool's latest ladder, the book may have moved during the wait
+            route = self.route_order(route.symbol, route.side, route.quantity, pools={pool_id})
+            if route is not None:
+                await self.send_order(route)
+        finally:
+            self._waiting.discard(pool_id)
+
+    async def send_order(self, route: Route):
+        symbol, side = route.symbol, route.side
+        price, order_price = route.price_wire, route.price
+        if self.force_buying:
+            price, order_price = "1000", to_fixed(1000)  # FORCE PRICE
+
+        # Pre-trade check against the local ledger, no network round trip
+        quote_resp_id = str(uuid.uuid4())
+        if not self.ledger.can_afford(side, symbol, route.quantity, order_price):
+            logger.info("Trade Skipped: insufficient available balance for %s %s @ %s", side, to_wire(route.quantity), price)
+            return
+        self.ledger.reserve(quote_resp_id, side, symbol, route.quantity, order_price)
+
+        sending_time = self.now
+        quote_response = self.router.encode(route, quote_resp_id, self.wallet, sending_time, price=price)
+        balances = BalanceSnapshot("Pre-Trade Balances", self.ledger, symbol)
+        self.orders.track(quote_resp_id, route, order_price, sending_time)
+        self.pools[route.pool_id].orders_sent += 1
+        await self.send_message(quote_response)
+        logger.info("Trade Initiated: %s %s %s @ %s\n%s", route.pool_id, side, to_wire(route.quantity), price, balances)
+
+    async def handle_taker_trade(self, data: TakerTradeMessage):
         """
             TakerTradeMessage:
             {
@@ -139,21 +278,28 @@ class OrderClient(WebSocketClient):
             }
         """
         # Handle taker trade messages (filled or rejected)
-        print("---------------------------------------------------")
-        print(f"Taker trade message received: {data}")
-        balances = self.get_balances(self.account.address)
-        balances = balances['balances']
-        print(f"Post-Trade Balances")
-        print(f"DCN -- contract balance: {balances['DCN']['contract_balance']} | balance: {balances['DCN']['balance']} | in flight: {balances['DCN']['in_flight']} | available: {balances['DCN']['available']}")
-        print(f"ALPHA -- contract balance: {balances['ALPHA']['contract_balance']} | balance: {balances['ALPHA']['balance']} | in flight: {balances['ALPHA']['in_flight']} | available: {balances['ALPHA']['available']}")
-        print("---------------------------------------------------")
-
-    def get_balances(self, wallet_id):
-        headers = sign_auth_headers(account=self.account)
-        payload = {
-            'account': wallet_id
-        }
-        response = requests.post(f"https://dcn.alpha.deepqdigital.net/balances", json=payload, headers=headers)
-        response.raise_for_status()
-        return response.json()
+        if self.orders.complete(data, self.now) is None:
+            logger.debug("Trade message for an expired or unknown order: %s", data.quote_id)
+        self.ledger.apply_taker_trade(data)
+        logger.info("Taker trade message received: %s\n%s", data, BalanceSnapshot("Post-Trade Balances", self.ledger, data.symbol))
+
+    async def expire_orders(self):
+        """Give up on orders without a trade message once they time out, releasing their reservations.
+        """
+        while True:
+            await self.clock.sleep(self.orders.resolution)
+            for order in self.orders.expire(self.now):
+                self.ledger.release(order.quote_resp_id)
+                logger.warning("Order timed out: %s %s %s %s", order.pool_id, order.side, to_wire(order.quantity), order.quote_resp_id)
+
+    async def get_balances(self, wallet_id):
+        return await self.rest.get_balances(wallet_id)
+
+    def spawn(self, coro):
+        """Run `coro` as a background task, keeping a reference until it completes.
+        """
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return task
 
@@ -0,0 +1,160 @@
+import asyncio
+from collections import deque
+import inspect
+import time
+from operator import itemgetter
+from typing import Awaitable, Callable, NamedTuple, Union
+
+import orjson as json
+
+from .messages import MakerTradeMessage
+
+
+class TradeDecision(NamedTuple):
+    """A maker's answer to a trade REQUEST.
+    """
+    status: str
+    executed_quantity: str
+    executed_price: str
+    msg: str
+
+    @classmethod
+    def accept(cls, data: MakerTradeMessage, price: str = None, msg: str = "Trade Accepted") -> "TradeDecision":
+        """Accept the full requested quantity, at the requested price unless an improved `price` is given."""
+        return cls("ACCEPT", data.requested_quantity, price or data.requested_price, msg)
+
+    @classmethod
+    def reject(cls, msg: str = "Trade Rejected") -> "TradeDecision":
+        return cls("REJECT", "0.0", "0.0", msg)
+
+
+class ResponseRecord(NamedTuple):
+    """Timing of a single trade response, in seconds.
+    """
+    trade_id: int
+    status: str
+    # Local receive of the REQUEST to the response being handed to the socket
+    receive_to_send: float
+    # Time left before the `timestamp` + window deadline when the response was sent
+    margin: float
+    # True if the decision callback missed its budget and the trade was safely rejected
+    timed_out: bool
+
+
+DecisionCallback = Callable[[MakerTradeMessage], Union[TradeDecision, Awaitable[TradeDecision]]]
+
+# Fields of a MakerTradeMessage the response changes, everything else is echoed back as received
+_RESPONSE_FIELDS = ("timestamp", "executed_quantity", "executed_price", "status", "msg")
+_ECHO_FIELDS = tuple(field for field in MakerTradeMessage._fields if field not in _RESPONSE_FIELDS)
+_echo = itemgetter(*(MakerTradeMessage._fields.index(field) for field in _ECHO_FIELDS))
+
+
+def encode_response(data: MakerTradeMessage, decision: TradeDecision, timestamp: float) -> bytes:
+    """Encode the makertrademessage answering `data` with `decision`.
+
+    The echoed fields are serialized straight from the request tuple in one `orjson.dumps` call,
+    and only the status, executed fields, message and timestamp are appended.
+    """
+    echoed = json.dumps(dict(zip(_ECHO_FIELDS, _echo(data))))
+    changed = json.dumps({
+        "timestamp": timestamp,
+        "executed_quantity": decision.executed_quantity,
+        "executed_price": decision.executed_price,
+        "status": decision.status,
+        "msg": decision.msg,
+    })
+    return b'{"type":"makertrademessage","data":' + echoed[:-1] + b"," + changed[1:] + b"}"
+
+
+class TradeResponder:
+    """Answers maker trade REQUESTs within the acceptance window.
+
+    The decision callback gets a hard deadline of `budget_share` of the `window`, counted from the
+    local receive time of the REQUEST. If it has not decided by then -- or raises -- the trade is
+    safely rejected, so a slow strategy can never make the maker miss the window. Every response
+    records its receive-to-send latency and its margin to the window deadline, which is measured
+    from the server's `timestamp` and so includes any clock skew.
+
+    Usage:
+        responder = TradeResponder(lambda data: TradeDecision.accept(data))
+        frame, decision = await responder.respond(data, received_at)
+    """
+
+    def __init__(self, decide: DecisionCallback, window: float = 0.1, budget_share: float = 0.5,
+                 clock: Callable[[], float] = time.time, history: int = 10_000):
+        """
+        Args:
+            decide (Callable): Returns a `TradeDecision` for a REQUEST, either directly or as an awaitable.
+            window (float): Seconds from the REQUEST `timestamp` the maker has to respond.
+            budget_share (float): Share of the window the decision may take before a safe reject.
+            clock (Callable): Current unix time in seconds.
+            history (int): Number of most recent `ResponseRecord`s to keep.
+        """
+        self.decide = decide
+        self.window = window
+        self.budget_share = budget_share
+        self.clock = clock
+        self.records: deque[ResponseRecord] = deque(maxlen=history)
+        self.timeouts = 0
+        self.errors = 0
+        self.missed_window = 0
+
+    async def respond(self, data: MakerTradeMessage, received_at: float = None) -> tuple[bytes, TradeDecision]:
+        """Decide on a REQUEST and encode the response.
+
+        Args:
+            data (MakerTradeMessage): The REQUEST.
+            received_at (float, optional): Local unix time the REQUEST was received, defaults to now.
+
+        Returns:
+            tuple: The encoded response frame and the decision it carries.
+        """
+        now = self.clock()
+        received_at = received_at or now
+        # Budgeted on the local clock only: the server's timestamp is on another clock, and a skew
+        # between the two would eat into (or wipe out) the budget. It is only used for the margin.
+        deadline = received_at + self.window * self.budget_share
+
+        timed_out = False
+        try:
+            remaining = deadline - now
+            if remaining <= 0:
+                raise asyncio.TimeoutError
+            decision = self.decide(data)
+            if inspect.isawaitable(decision):
+                decision = await asyncio.wait_for(decision, remaining)
+            if self.clock() > deadline:
+                # A synchronous callback cannot be interrupted, it is only caught afterwards
+                raise asyncio.TimeoutError
+        except asyncio.TimeoutError:
+            timed_out = True
+            self.timeouts += 1
+            decision = TradeDecision.reject("Decision deadline exceeded")
+        except Exception as e:
+            self.errors += 1
+            decision = TradeDecision.reject(f"Decision failed: {e!r}")
+
+        sent_at = self.clock()
+        frame = encode_response(data, decision, sent_at)
+        margin = data.timestamp + self.window - sent_at
+        if margin < 0:
+            self.missed_window += 1
+        self.records.append(ResponseRecord(data.trade_id, decision.status, sent_at - received_at, margin, timed_out))
+        return frame, decision
+
+    def stats(self) -> dict[str, float]:
+        """Summary of the recorded responses, latencies in milliseconds.
+        """
+        if not self.records:
+            return {"responses": 0, "timeouts": self.timeouts, "errors": self.errors, "missed_window": self.missed_window}
+        latencies = sorted(record.receive_to_send for record in self.records)
+        margins = [record.margin for record in self.records]
+        return {
+            "responses": len(self.records),
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "missed_window": self.missed_window,
+            "p50_receive_to_send_ms": latencies[len(latencies) // 2] * 1e3,
+            "max_receive_to_send_ms": latencies[-1] * 1e3,
+            "min_margin_ms": min(margins) * 1e3,
+        }
@@ -1,15 +1,19 @@
+import asyncio
 from decimal import Decimal
 import os
 
-import requests
 from examples.constants import URL
-from examples.signing import sign_auth_headers
+from examples.rest import AsyncRestClient
 from web3 import Account
 
 def withdraw(withdrawal_amount: Decimal, currency: str):
     """
     Triggers the withdrawal for the given amount and token from the clearinghouse contract.
 
+    The request is sent with the non-blocking `AsyncRestClient`; inside a running event loop
+    (eg. next to the websocket clients) await `AsyncRestClient.withdraw` directly instead.
+    To move funds for many wallets or tokens at once use `examples.treasury.Treasury`.
+
     :param withdrawal_amount: 
         The amount to withdraw. Eg. if you want to withdraw 2.3 ETH, you would pass 2.3.
         Has to be a Decimal to avoid floating point issues.
@@ -20,21 +24,13 @@ def withdraw(withdrawal_amount: Decimal, currency: str):
     # User must set private key
     account = Account.from_key(os.environ["TAKER_PRIVATE_KEY"])
 
-    # First sign the auth headers
-    headers = sign_auth_headers(account=account)
-    print(f"Headers: {headers}")
-
-    # Create deposit request payload
-    payload = {
-        "account": account.address,
-        "amount": str(withdrawal_amount),
-        "currency": currency,
-    }
-
-    # Send deposit request
-    response = requests.post(f"http://{URL}/withdraw", json=payload, headers=headers)
-    response.raise_for_status()
-    print(response.json())
+    async def _withdraw():
+        # The client signs fresh auth headers for the request
+        async with AsyncRestClient(account, base_url=f"http://{URL}") as rest:
+            return await rest.withdraw(withdrawal_amount, currency)
+
+    # Send withdrawal request
+    print(asyncio.run(_withdraw()))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,26 @@
+import asyncio
+
+from examples.websocket.capture import CaptureReader, CaptureRecorder
+
+
+def test_reader_only_picks_up_the_segments_of_its_own_name(tmp_path):
+    async def record(name: str, frames: list[str]):
+        recorder = CaptureRecorder(str(tmp_path), name=name, segment_bytes=1)
+        for frame in frames:
+            recorder.inbound(frame)
+            # A segment per flush with `segment_bytes=1`
+            await recorder.flush()
+        await recorder.close()
+
+    async def run():
+        await record("maker", ["a", "b"])
+        await record("maker-2", ["c"])
+
+    asyncio.run(run())
+    with CaptureReader(str(tmp_path), name="maker") as reader:
+        assert len(reader.paths) == 2
+        assert reader.starts == sorted(reader.starts)
+        assert [record.message() for record in reader] == ["a", "b"]
+    with CaptureReader(str(tmp_path), name="maker-2") as reader:
+        assert [record.message() for record in reader] == ["c"]
+    assert CaptureReader(str(tmp_path / "missing")).paths == []
@@ -0,0 +1,40 @@
+from examples.websocket.conflation import FeedArbiter
+from examples.websocket.messages import MarketData
+
+
+def update(sequence_number: int, pool_id: str = "DCN-ALPHA_common") -> MarketData:
+    return MarketData(0.0, pool_id, sequence_number, "DCN-ALPHA", [], [], [])
+
+
+def test_each_update_is_passed_on_once_from_the_first_connection():
+    arbiter = FeedArbiter(2)
+    assert arbiter.arrived(0, update(1), 1_000)
+    assert not arbiter.arrived(1, update(1), 4_000)
+    assert arbiter.arrived(1, update(2), 5_000)
+    assert not arbiter.arrived(0, update(2), 5_500)
+    # Pools are sequenced independently
+    assert arbiter.arrived(0, update(1, "DCN-BETA_common"), 6_000)
+
+    assert arbiter.wins == [2, 1]
+    assert arbiter.duplicates == [1, 1]
+    assert arbiter.lag[1].count == 1
+
+
+def test_a_late_copy_outside_the_window_is_still_a_duplicate():
+    arbiter = FeedArbiter(2, window=4)
+    for sequence_number in range(1, 11):
+        assert arbiter.arrived(0, update(sequence_number), sequence_number)
+    # Long gone from the window of 4
+    assert not arbiter.arrived(1, update(2), 20)
+    assert arbiter.wins == [10, 0]
+    assert arbiter.duplicates == [0, 1]
+    assert arbiter.lag[1].count == 0
+
+
+def test_an_older_update_arriving_after_a_newer_one_is_not_passed_on():
+    arbiter = FeedArbiter(2)
+    assert arbiter.arrived(0, update(5), 0)
+    assert not arbiter.arrived(1, update(4), 1)
+    arbiter.reset()
+    # Every connection was down, sequence numbers may restart
+    assert arbiter.arrived(1, update(1), 2)
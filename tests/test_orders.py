@@ -0,0 +1,47 @@
+from examples.fixedpoint import to_fixed
+from examples.websocket.messages import TakerTradeMessage
+from examples.websocket.orders import OrderTracker, TimingWheel
+from examples.websocket.router import Route
+
+ROUTE = Route("DCN-ALPHA_common", "DCN-ALPHA", "BUY", to_fixed("1"), 0, to_fixed("1"), to_fixed("1.01"), "1.01")
+
+
+def response(quote_id: str, match_timestamp: float = 0.0) -> TakerTradeMessage:
+    return TakerTradeMessage("1.01", "1", "0xm", match_timestamp, "", ROUTE.pool_id, "1.01", "1", quote_id,
+                             "BUY", "SUCCESS", ROUTE.symbol, "0", "DCN", 0.0, match_timestamp)
+
+
+def test_orders_expire_once_their_timeout_has_passed():
+    tracker = OrderTracker(timeout=1.0, resolution=0.1)
+    tracker.track("a", ROUTE, ROUTE.price, sent_at=100.0)
+    tracker.track("b", ROUTE, ROUTE.price, sent_at=100.5)
+
+    assert tracker.expire(100.95) == []
+    assert [order.quote_resp_id for order in tracker.expire(101.05)] == ["a"]
+    # Expired at most `resolution` late
+    assert [order.quote_resp_id for order in tracker.expire(101.6)] == ["b"]
+    assert len(tracker) == 0 and tracker.timeouts == 2
+    assert tracker.capacity.is_set()
+
+
+def test_an_answered_order_does_not_expire_and_a_late_answer_is_unmatched():
+    tracker = OrderTracker(timeout=1.0, resolution=0.1)
+    tracker.track("a", ROUTE, ROUTE.price, sent_at=100.0)
+    tracker.track("b", ROUTE, ROUTE.price, sent_at=100.0)
+
+    order = tracker.complete(response("a", match_timestamp=100.2), received_at=100.25)
+    assert order.quote_resp_id == "a"
+    assert [order.quote_resp_id for order in tracker.expire(102.0)] == ["b"]
+    assert tracker.complete(response("b"), received_at=102.1) is None
+    assert tracker.stats()["completed"] == 1 and tracker.unmatched == 1
+
+
+def test_deadlines_beyond_the_span_wait_for_their_own_lap():
+    wheel = TimingWheel(span=1.0, resolution=0.25)
+    wheel.advance(0.0)
+    wheel.add("far", "far", deadline=3.0)
+    wheel.add("near", "near", deadline=0.5)
+    assert wheel.advance(1.0) == ["near"]
+    assert wheel.advance(2.9) == []
+    assert wheel.advance(3.0) == ["far"]
+    assert len(wheel) == 0
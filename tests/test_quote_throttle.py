@@ -0,0 +1,42 @@
+import pytest
+
+from examples.websocket.quote_throttle import QuoteThrottle
+
+
+def test_small_moves_are_suppressed_until_the_quote_is_due_for_a_refresh():
+    throttle = QuoteThrottle(threshold=10, refresh_before=0.5)
+    assert throttle.refresh_at() is None
+    assert throttle.offer([100], [200], now=0.0) == 0.0
+    throttle.sent_quote([100], [200], now=0.0, valid_for=2.0)
+    assert throttle.refresh_at() == 1.5
+
+    assert throttle.offer([109], [191], now=1.0) is None
+    assert throttle.suppressed == 1
+    # A rung moving by the threshold is sent
+    assert throttle.offer([110], [200], now=1.0) == 0.0
+    # An unchanged ladder is sent again once the last quote is within `refresh_before` of expiring
+    assert throttle.offer(*throttle.last, now=1.5) == 0.0
+
+
+def test_ladders_made_faster_than_the_rate_are_merged_into_the_newest():
+    throttle = QuoteThrottle(max_rate=4)
+    throttle.sent_quote([100], [200], now=0.0, valid_for=2.0)
+
+    assert throttle.offer([101], [201], now=0.1) == pytest.approx(0.15)
+    assert throttle.pending == ([101], [201])
+    assert throttle.offer([102], [202], now=0.2) is None
+    assert throttle.coalesced == 1
+
+    assert throttle.flush(now=0.25) == ([102], [202])
+    assert throttle.pending is None
+    assert throttle.flush(now=0.25) is None
+
+
+def test_a_waiting_ladder_back_within_the_threshold_is_not_flushed():
+    throttle = QuoteThrottle(threshold=10, max_rate=1)
+    throttle.sent_quote([100], [200], now=0.0, valid_for=5.0)
+    assert throttle.offer([120], [200], now=0.5) > 0
+    # Merged into the waiting ladder, which is back near the last quote by the time it may be sent
+    assert throttle.offer([101], [200], now=0.6) is None
+    assert throttle.flush(now=1.0) is None
+    assert throttle.suppressed == 1
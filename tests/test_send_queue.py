@@ -0,0 +1,42 @@
+from examples.websocket.send_queue import PRIORITY_DEFAULT, PRIORITY_QUOTE, PRIORITY_RESPONSE, SendQueue
+
+
+def messages(frames: list) -> list:
+    return [message for message, _ in frames]
+
+
+def test_frames_leave_by_priority_then_in_queued_order():
+    queue = SendQueue()
+    queue.put("order-1", PRIORITY_DEFAULT)
+    queue.put("quote-a", PRIORITY_QUOTE, key="a")
+    queue.put("order-2", PRIORITY_DEFAULT)
+    queue.put("accept", PRIORITY_RESPONSE)
+    assert queue.ready.is_set()
+
+    assert messages(queue.take(2)) == ["accept", "quote-a"]
+    assert messages(queue.take(10)) == ["order-1", "order-2"]
+    assert not queue and not queue.ready.is_set()
+
+
+def test_a_newer_quote_replaces_the_unsent_one_in_place():
+    queue = SendQueue()
+    assert queue.put("quote-a1", PRIORITY_QUOTE, key="a")
+    assert queue.put("quote-b1", PRIORITY_QUOTE, key="b")
+    assert not queue.put("quote-a2", PRIORITY_QUOTE, key="a")
+    assert len(queue) == 2 and queue.replaced == 1
+
+    assert messages(queue.take(10)) == ["quote-a2", "quote-b1"]
+    # Once sent, the next quote of the pool is queued again
+    assert queue.put("quote-a3", PRIORITY_QUOTE, key="a")
+
+
+def test_producers_wait_above_the_high_water_mark_until_below_the_low_one():
+    queue = SendQueue(high_water=4, low_water=2)
+    for i in range(4):
+        queue.put(i)
+    assert not queue.writable.is_set()
+    queue.take(2)
+    assert not queue.writable.is_set()
+    queue.take(1)
+    assert queue.writable.is_set()
+    assert queue.clear() == 1 and queue.dropped == 1
@@ -0,0 +1,46 @@
+from eth_account import Account
+
+from examples.signing import HeaderSigner, sign_auth_headers
+
+
+class FakeClock:
+    def __init__(self, now: float):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_presigned_window_survives_the_next_presign_without_calls():
+    account = Account.create()
+    clock = FakeClock(1000.8)
+    signer = HeaderSigner([account], clock=clock)
+    # What `run` does: the current window, then each next one `lead` seconds ahead
+    signer.presign(1000)
+    signer.presign(1001)
+    clock.now = 1001.8
+    # No call during window 1001 before the window after it is pre-signed
+    signer.presign(1002)
+    signer.prune(signer.window())
+
+    headers = signer.headers(account)
+    assert headers == sign_auth_headers(account=account, timestamp=1001)
+    assert signer.stats() == {"hits": 1, "misses": 0, "signed": 3}
+
+    clock.now = 1002.1
+    assert signer.headers(account)["timestamp"] == "1002"
+    assert signer.misses == 0
+
+
+def test_headers_are_signed_once_per_window_without_run():
+    account = Account.create()
+    clock = FakeClock(1000.2)
+    signer = HeaderSigner(validity=2, clock=clock)
+    first = signer.headers(account)
+    clock.now = 1001.9
+    assert signer.headers(account) is first
+    clock.now = 1002.0
+    assert signer.headers(account)["timestamp"] == "1002"
+    assert signer.stats() == {"hits": 1, "misses": 2, "signed": 2}
+    # Only the current window is kept
+    assert len(signer._signed) == 1
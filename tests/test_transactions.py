@@ -0,0 +1,59 @@
+import asyncio
+
+from eth_account import Account
+import pytest
+
+from examples.approve import approval_transaction
+from examples.server import StandInRpc
+from examples.transactions import JsonRpcClient, ReceiptTimeout, TransactionPipeline
+
+
+async def start_node(**options) -> tuple[StandInRpc, object, str]:
+    node = StandInRpc(**options)
+    runner = await node.start("127.0.0.1", 0)
+    host, port = runner.addresses[0][:2]
+    return node, runner, f"http://{host}:{port}/"
+
+
+def test_many_transactions_per_account_are_submitted_in_nonce_order():
+    async def run():
+        node, runner, url = await start_node(block_time=0.05, latency=0.002)
+        accounts = [Account.create() for _ in range(3)]
+        try:
+            async with TransactionPipeline(JsonRpcClient(url), poll_interval=0.02, signing_workers=8) as pipeline:
+                results = await asyncio.gather(*(
+                    pipeline.submit(account, approval_transaction(amount, "DCN"))
+                    for amount in range(1, 31) for account in accounts
+                ))
+        finally:
+            await runner.cleanup()
+        return node, accounts, results
+
+    node, accounts, results = asyncio.run(run())
+    assert all(result.success for result in results)
+    assert node.stats["nonce_errors"] == 0
+    for account in accounts:
+        assert sorted(result.nonce for result in results if result.address == account.address) == list(range(30))
+
+
+def test_missing_receipt_times_out_and_frees_the_nonce():
+    async def run():
+        # No block is mined within the test
+        node, runner, url = await start_node(block_time=3600)
+        account = Account.create()
+        try:
+            async with TransactionPipeline(JsonRpcClient(url), poll_interval=0.02, receipt_timeout=0.2) as pipeline:
+                with pytest.raises(ReceiptTimeout):
+                    await pipeline.submit(account, approval_transaction(1, "DCN"))
+                # The transaction is dropped from the node: its nonce is read back and reused
+                node.mempool.clear()
+                node.pending.clear()
+                with pytest.raises(ReceiptTimeout):
+                    await pipeline.submit(account, approval_transaction(1, "DCN"))
+        finally:
+            await runner.cleanup()
+        return node
+
+    node = asyncio.run(run())
+    assert node.stats["transactions"] == 2
+    assert node.stats["nonce_errors"] == 0